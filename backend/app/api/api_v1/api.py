@@ -1,5 +1,6 @@
-from fastapi import APIRouter
-from app.api.api_v1.endpoints import users, login, events, chat
+from fastapi import APIRouter, Response
+from app.api.api_v1.endpoints import users, login, events, chat, sync
+from app.startup import readiness
 
 api_router = APIRouter()
 
@@ -7,7 +8,19 @@ api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(events.router, prefix="/events", tags=["events"])
 api_router.include_router(chat.router, tags=["chat"])
+api_router.include_router(sync.router, tags=["sync"])
 
 @api_router.get("/status")
 def status():
     return {"status": "ok"}
+
+@api_router.get("/ready")
+def ready(response: Response):
+    """
+    Readiness: 503 until startup warm-up has finished and again once the
+    worker starts shutting down. /status only says the process is alive.
+    """
+    state = readiness.state()
+    if not state["ready"]:
+        response.status_code = 503
+    return state
@@ -1,89 +1,121 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
-from sqlalchemy.orm import Session
-from jose import jwt, JWTError
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import json
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query, Response
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 from app import deps
-from app.core import config
+from app.core.metrics import chat_messages_received_total
+from app.core.principals import principal_cache
+from app.core.rate_limit import chat_buckets, rate_limiter
 from app.websocket.manager import manager
 from app.services import chat as chat_service
+from app.services.membership import membership_cache
 from app.services.notification.service import notification_service
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
+from app.services.serialization import dumps, message_rows_to_dicts, select_message_rows
 
 router = APIRouter()
-executor = ThreadPoolExecutor(max_workers=10)
 
-def get_db_sync():
-    """Create a synchronous database session for use in async context"""
-    db = SessionLocal()
-    try:
-        return db
-    finally:
-        pass  # Will be closed manually
+@router.get("/events/{event_id}/messages", response_model=schemas.ChatHistoryPage)
+async def read_messages(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    event_id: int,
+    before_id: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Chat history for an event, newest first, for its creator and
+    participants only (the same check as the WebSocket handshake).
+    Pass next_before_id as before_id to load the next (older) page. Each
+    page is one range scan on (event_id, id), so deep pages cost the same
+    as the first.
+    """
+    if not await membership_cache.is_member(current_user.id, event_id):
+        if await db.get(models.Event, event_id) is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        raise HTTPException(status_code=403, detail="Not a participant of this event")
+    query = select_message_rows().where(models.ChatMessage.event_id == event_id)
+    if before_id is not None:
+        query = query.where(models.ChatMessage.id < before_id)
+    # Fetch one extra row to know whether older messages exist
+    rows = (await db.execute(query.order_by(models.ChatMessage.id.desc()).limit(limit + 1))).all()
+    items = message_rows_to_dicts(rows[:limit])
+    next_before_id = items[-1]["id"] if len(rows) > limit else None
+    return Response(
+        content=dumps({"items": items, "next_before_id": next_before_id}),
+        media_type="application/json",
+    )
 
 @router.websocket("/ws/chat/{event_id}")
 async def websocket_chat_endpoint(
     websocket: WebSocket,
     event_id: int,
     token: str = Query(...),
+    last_seen_id: Optional[int] = Query(None, ge=0),
 ):
+    """
+    Live chat for an event, open to its creator and participants.
+    Reconnecting clients pass the id of the last message they received as
+    last_seen_id and are sent everything newer before live messages resume,
+    or, after a long absence, a {"type": "replay_truncated", "before_id": ...}
+    frame followed by the newest messages; older ones come from the history
+    endpoint with that before_id.
+    The handshake never blocks the event loop: the token, user and
+    membership checks are cache hits or async queries. Messages over the
+    sender's or the room's rate limit are dropped and answered with a
+    {"type": "error", "error": "rate_limited"} frame.
+    """
     # Authenticate via token
-    user_id_int = None
     try:
-        payload = jwt.decode(token, config.settings.SECRET_KEY, algorithms=[config.settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            await websocket.close(code=4003) # Forbidden
-            return
-        user_id_int = int(user_id)
-        
-        # Verify user exists
-        db = get_db_sync()
-        try:
-            user = db.query(models.User).filter(models.User.id == user_id_int).first()
-            if not user:
-                await websocket.close(code=4003)
-                return
-        finally:
-            db.close()
+        user_id_int = principal_cache.decode_token(token)
     except (JWTError, ValueError):
+        await websocket.close(code=4003) # Forbidden
+        return
+
+    # Verify user exists
+    user = principal_cache.get_user(user_id_int)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            db_user = await db.get(models.User, user_id_int)
+            if db_user:
+                user = principal_cache.put_user(db_user)
+    if not user or not user.is_active:
+        await websocket.close(code=4003)
+        return
+
+    if not await membership_cache.is_member(user_id_int, event_id):
         await websocket.close(code=4003)
         return
 
-    await manager.connect(websocket, event_id)
-    
+    await manager.connect(websocket, event_id, user_id_int, last_seen_id)
+
     try:
         while True:
             data = await websocket.receive_text()
-            
-            # Save message to DB using thread pool for sync DB operations
-            loop = asyncio.get_event_loop()
-            db = get_db_sync()
-            try:
-                saved_msg = await loop.run_in_executor(
-                    executor, 
-                    chat_service.save_message, 
-                    db, user_id_int, event_id, data
-                )
-                
-                message_data = {
-                    "id": saved_msg.id,
-                    "content": saved_msg.content,
-                    "sender_id": saved_msg.sender_id,
-                    "event_id": saved_msg.event_id,
-                    "created_at": str(saved_msg.created_at)
-                }
-                
-                # Publish to Redis -> Broadcast to all
-                await manager.publish_message(event_id, message_data)
-            finally:
-                db.close()
-            
+            chat_messages_received_total.inc()
+
+            # Over budget: drop the message before it costs a write and a publish
+            decision = await rate_limiter.hit(*chat_buckets(user_id_int, event_id))
+            if not decision.allowed:
+                manager.send_personal(websocket, json.dumps({
+                    "type": "error",
+                    "error": "rate_limited",
+                    "retry_after": round(decision.retry_after, 3),
+                }))
+                continue
+
+            # Persist via the write-behind batcher; resolves once the batch is committed
+            saved_msg = await chat_service.message_batcher.submit(user_id_int, event_id, data)
+
+            # Publish to Redis -> Broadcast to all
+            await manager.publish_message(event_id, chat_service.message_payload(saved_msg))
+
     except WebSocketDisconnect:
-        manager.disconnect(websocket, event_id)
+        await manager.disconnect(websocket, event_id)
     except Exception as e:
         # Handle other errors
-        manager.disconnect(websocket, event_id)
+        await manager.disconnect(websocket, event_id)
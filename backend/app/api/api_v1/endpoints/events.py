@@ -1,19 +1,59 @@
+from datetime import datetime
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from sqlalchemy import Select, delete, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 from app import deps
+from app.db.replicas import is_replica_session
+from app.services.event_cache import event_cache
+from app.services.membership import membership_cache
 from app.services.notification.service import notification_service
+from app.services.pagination import encode_cursor, decode_cursor
+from app.services.search import event_search_query, search_terms
+from app.services.serialization import dumps, event_rows_to_dicts, select_event_rows
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.Event)
-def create_event(
+def _apply_event_filters(
+    query: Select,
+    starts_after: Optional[datetime],
+    ends_before: Optional[datetime],
+    location: Optional[str],
+    creator_id: Optional[int],
+) -> Select:
+    if starts_after is not None:
+        query = query.where(models.Event.start_time >= starts_after)
+    if ends_before is not None:
+        query = query.where(models.Event.end_time <= ends_before)
+    if location is not None:
+        query = query.where(models.Event.location == location)
+    if creator_id is not None:
+        query = query.where(models.Event.creator_id == creator_id)
+    return query
+
+def _filtered_events_query(
+    starts_after: Optional[datetime],
+    ends_before: Optional[datetime],
+    location: Optional[str],
+    creator_id: Optional[int],
+) -> Select:
+    """
+    Build the filtered event query ordered by (start_time, id).
+    The ordering matches the composite indexes declared on Event.
+    Selects the schemas.Event columns as plain rows for the list fast path.
+    """
+    query = _apply_event_filters(select_event_rows(), starts_after, ends_before, location, creator_id)
+    return query.order_by(models.Event.start_time, models.Event.id)
+
+@router.post("/", response_model=schemas.Event, dependencies=[Depends(deps.limit_writes)])
+async def create_event(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     event_in: schemas.EventCreate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Create new event.
@@ -36,56 +76,157 @@ def create_event(
             creator_id=current_user.id,
         )
         db.add(event)
-        db.commit()
-        db.refresh(event)
+        await db.commit()
+        await event_cache.invalidate_lists()
         return event
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create event: {str(e)}"
         )
 
 @router.get("/", response_model=List[schemas.Event])
-def read_events(
-    db: Session = Depends(deps.get_db),
+async def read_events(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    starts_after: Optional[datetime] = None,
+    ends_before: Optional[datetime] = None,
+    location: Optional[str] = None,
+    creator_id: Optional[int] = None,
 ) -> Any:
     """
     Retrieve events.
+    Responses carry an ETag; a matching If-None-Match gets 304.
+    """
+    key = await event_cache.list_key("list", {
+        "skip": skip, "limit": limit, "starts_after": starts_after,
+        "ends_before": ends_before, "location": location, "creator_id": creator_id,
+    })
+    cached = await event_cache.get(key)
+    if cached is None:
+        query = _filtered_events_query(starts_after, ends_before, location, creator_id)
+        rows = (await db.execute(query.offset(skip).limit(limit))).all()
+        cached = await event_cache.set(key, dumps(event_rows_to_dicts(rows)), is_replica_session(db))
+    return event_cache.respond(request, cached)
+
+@router.get("/page", response_model=schemas.EventPage)
+async def read_events_page(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    starts_after: Optional[datetime] = None,
+    ends_before: Optional[datetime] = None,
+    location: Optional[str] = None,
+    creator_id: Optional[int] = None,
+) -> Any:
+    """
+    Retrieve events with keyset pagination ordered by (start_time, id).
+    Pass the returned next_cursor to fetch the following page.
+    """
+    key = await event_cache.list_key("page", {
+        "cursor": cursor, "limit": limit, "starts_after": starts_after,
+        "ends_before": ends_before, "location": location, "creator_id": creator_id,
+    })
+    cached = await event_cache.get(key)
+    if cached is not None:
+        return event_cache.respond(request, cached)
+
+    query = _filtered_events_query(starts_after, ends_before, location, creator_id)
+    if cursor:
+        try:
+            last_start, last_id = decode_cursor(cursor, 2, (datetime, int))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(models.Event.start_time, models.Event.id) > tuple_(last_start, last_id)
+        )
+
+    # Fetch one extra row to know whether another page exists
+    events = event_rows_to_dicts((await db.execute(query.limit(limit + 1))).all())
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        next_cursor = encode_cursor([last["start_time"], last["id"]])
+    cached = await event_cache.set(
+        key, dumps({"items": events, "next_cursor": next_cursor}), is_replica_session(db)
+    )
+    return event_cache.respond(request, cached)
+
+@router.get("/search", response_model=List[schemas.Event])
+async def search_events(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_read_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    starts_after: Optional[datetime] = None,
+    ends_before: Optional[datetime] = None,
+    location: Optional[str] = None,
+    creator_id: Optional[int] = None,
+) -> Any:
     """
-    events = db.query(models.Event).offset(skip).limit(limit).all()
-    return events
+    Full-text search over title, location and description, most relevant
+    first. Every word in q must match, as a prefix ("chem lab" finds
+    "Chemistry Laboratory"). Combine with starts_after/ends_before to
+    search within a time window.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    key = await event_cache.list_key("search", {
+        "terms": terms, "skip": skip, "limit": limit, "starts_after": starts_after,
+        "ends_before": ends_before, "location": location, "creator_id": creator_id,
+    })
+    cached = await event_cache.get(key)
+    if cached is None:
+        query = _apply_event_filters(
+            event_search_query(terms, db.bind.dialect.name),
+            starts_after, ends_before, location, creator_id,
+        )
+        rows = (await db.execute(query.offset(skip).limit(limit))).all()
+        cached = await event_cache.set(key, dumps(event_rows_to_dicts(rows)), is_replica_session(db))
+    return event_cache.respond(request, cached)
 
 @router.get("/{event_id}", response_model=schemas.Event)
-def read_event(
+async def read_event(
     *,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_read_db),
     event_id: int,
 ) -> Any:
     """
     Get event by ID.
+    Responses carry an ETag; a matching If-None-Match gets 304.
     """
-    event = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    key = await event_cache.event_key(event_id)
+    cached = await event_cache.get(key)
+    if cached is None:
+        event = await db.get(models.Event, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        body = schemas.Event.model_validate(event).model_dump_json().encode()
+        cached = await event_cache.set(key, body, is_replica_session(db))
+    return event_cache.respond(request, cached)
 
-@router.put("/{event_id}", response_model=schemas.Event)
-def update_event(
+@router.put("/{event_id}", response_model=schemas.Event, dependencies=[Depends(deps.limit_writes)])
+async def update_event(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     event_id: int,
     event_in: schemas.EventUpdate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Update an event.
     """
-    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    event = await db.get(models.Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event.creator_id != current_user.id and not current_user.is_superuser:
@@ -96,61 +237,59 @@ def update_event(
         setattr(event, field, value)
     
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await event_cache.invalidate_event(event_id)
     return event
 
-@router.delete("/{event_id}", response_model=schemas.Event)
-def delete_event(
+@router.delete("/{event_id}", response_model=schemas.Event, dependencies=[Depends(deps.limit_writes)])
+async def delete_event(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     event_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Delete an event.
     """
-    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    event = await db.get(models.Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event.creator_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    # Tell syncing clients to drop it (participations and messages go with it)
+    db.add(models.Tombstone(entity="event", entity_id=event_id))
+    await db.commit()
+    await event_cache.invalidate_event(event_id)
+    membership_cache.clear()
     return event
 
-@router.post("/{event_id}/join", response_model=schemas.EventParticipant)
-def join_event(
+@router.post("/{event_id}/join", response_model=schemas.EventParticipant, dependencies=[Depends(deps.limit_event_membership)])
+async def join_event(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     event_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Join an event.
     """
-    event = db.query(models.Event).filter(models.Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if already joined
-    participant = db.query(models.EventParticipant).filter(
-        models.EventParticipant.event_id == event_id,
-        models.EventParticipant.user_id == current_user.id
-    ).first()
-    
-    if participant:
-        raise HTTPException(status_code=400, detail="Already joined this event")
-
-    # Check capacity
-    if event.capacity is not None:
-        count = db.query(models.EventParticipant).filter(
-            models.EventParticipant.event_id == event_id,
-            models.EventParticipant.status.in_([models.ParticipantStatus.GOING, models.ParticipantStatus.INTERESTED])
-        ).count()
-        if count >= event.capacity:
-             raise HTTPException(status_code=400, detail="Event is at full capacity")
+    # Claim a spot: increments only while below capacity, atomically per row
+    event_title = await db.scalar(
+        update(models.Event)
+        .where(
+            models.Event.id == event_id,
+            or_(
+                models.Event.capacity.is_(None),
+                models.Event.participant_count < models.Event.capacity,
+            ),
+        )
+        .values(participant_count=models.Event.participant_count + 1)
+        .returning(models.Event.title)
+    )
+    if event_title is None:
+        await _raise_join_conflict(db, event_id, current_user.id)
 
     participant = models.EventParticipant(
         event_id=event_id,
@@ -158,41 +297,67 @@ def join_event(
         status=models.ParticipantStatus.GOING
     )
     db.add(participant)
-    db.commit()
-    db.refresh(participant)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Unique (event_id, user_id): the rollback also releases the claimed spot
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Already joined this event")
+    await event_cache.invalidate_event(event_id)
+    membership_cache.invalidate(current_user.id, event_id)
     
-    # Send notification (async, but we're in sync context - run in background)
+    # Send notification in the background
     # Note: In production, use a proper task queue like Celery
-    import asyncio
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            asyncio.create_task(notification_service.send_event_joined(current_user.id, event.title))
-        else:
-            loop.run_until_complete(notification_service.send_event_joined(current_user.id, event.title))
+        await notification_service.send_event_joined(current_user.id, event_title)
     except Exception:
         pass # Don't fail request if notification fails check logs
         
     return participant
 
-@router.post("/{event_id}/leave", response_model=schemas.EventParticipant)
-def leave_event(
+async def _raise_join_conflict(db: AsyncSession, event_id: int, user_id: int):
+    """
+    Explain why no spot could be claimed. Only runs on the failure path.
+    """
+    if await db.get(models.Event, event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    participant_id = await db.scalar(select(models.EventParticipant.id).where(
+        models.EventParticipant.event_id == event_id,
+        models.EventParticipant.user_id == user_id
+    ))
+    if participant_id is not None:
+        raise HTTPException(status_code=409, detail="Already joined this event")
+    raise HTTPException(status_code=409, detail="Event is at full capacity")
+
+@router.post("/{event_id}/leave", response_model=schemas.EventParticipant, dependencies=[Depends(deps.limit_event_membership)])
+async def leave_event(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     event_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Leave an event.
     """
-    participant = db.query(models.EventParticipant).filter(
-        models.EventParticipant.event_id == event_id,
-        models.EventParticipant.user_id == current_user.id
-    ).first()
+    participant = await db.scalar(
+        delete(models.EventParticipant)
+        .where(
+            models.EventParticipant.event_id == event_id,
+            models.EventParticipant.user_id == current_user.id
+        )
+        .returning(models.EventParticipant)
+    )
     
     if not participant:
         raise HTTPException(status_code=404, detail="Not participating in this event")
 
-    db.delete(participant)
-    db.commit()
+    db.add(models.Tombstone(entity="participation", entity_id=participant.id, user_id=current_user.id))
+    await db.execute(
+        update(models.Event)
+        .where(models.Event.id == event_id, models.Event.participant_count > 0)
+        .values(participant_count=models.Event.participant_count - 1)
+    )
+    await db.commit()
+    await event_cache.invalidate_event(event_id)
+    membership_cache.invalidate(current_user.id, event_id)
     return participant
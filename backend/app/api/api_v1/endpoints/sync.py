@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import Select, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app import deps
+from app.core.config import settings
+from app.services.pagination import encode_cursor, decode_cursor
+
+router = APIRouter()
+
+# (timestamp, id) of the last row each stream has delivered; (None, 0) = from the start
+Position = Tuple[Optional[datetime], int]
+
+async def _changes(
+    db: AsyncSession, query: Select, ts_column, id_column, position: Position, limit: int,
+) -> Tuple[Sequence[Any], bool]:
+    """Next rows of one stream in (timestamp, id) order, plus whether more remain"""
+    if position[0] is not None:
+        query = query.where(tuple_(ts_column, id_column) > tuple_(*position))
+    rows = (await db.scalars(query.order_by(ts_column, id_column).limit(limit + 1))).all()
+    return rows[:limit], len(rows) > limit
+
+def _advance(position: Position, last: Optional[Position], has_more: bool, horizon: datetime) -> Position:
+    """
+    Move a stream past its last delivered row. Once the stream is caught up,
+    never move past the safety horizon: a transaction that stamped its rows
+    earlier but committed later than what we just read is still picked up.
+    """
+    if last is not None:
+        position = last
+    if not has_more and position[0] is not None and position[0] > horizon:
+        position = (horizon, 0)
+    return position
+
+@router.get("/sync", response_model=schemas.SyncResponse)
+async def sync(
+    db: AsyncSession = Depends(deps.get_db),
+    since: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=500),
+    current_user: schemas.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Changes since a sync token, for the mobile offline cache.
+
+    Returns events, the current user's participations and messages in events
+    they participate in that were created or changed since `since`, plus
+    tombstones for deleted events and participations. Without `since` this is
+    a full sync. Each stream returns at most `limit` rows; repeat with
+    `next_token` while `has_more` is true. Rows near the end of the previous
+    sync may be sent again, so clients should upsert by id. A tombstoned
+    event takes its participations and messages with it. Messages from
+    before the user joined come from the message history endpoint.
+    """
+    now = datetime.utcnow()
+    horizon = now - timedelta(seconds=settings.SYNC_SAFETY_WINDOW_SECONDS)
+    if since:
+        try:
+            values = decode_cursor(since, 8, [(datetime, type(None)), int] * 4)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+        positions: List[Position] = [(values[i], values[i + 1]) for i in range(0, 8, 2)]
+    else:
+        # A fresh client has nothing to delete, so tombstones start from now
+        positions = [(None, 0), (None, 0), (None, 0), (horizon, 0)]
+
+    my_events = select(models.EventParticipant.event_id).where(
+        models.EventParticipant.user_id == current_user.id
+    )
+    streams = [
+        (select(models.Event), models.Event.updated_at, models.Event.id),
+        (
+            select(models.EventParticipant).where(models.EventParticipant.user_id == current_user.id),
+            models.EventParticipant.updated_at, models.EventParticipant.id,
+        ),
+        (
+            select(models.ChatMessage).where(models.ChatMessage.event_id.in_(my_events)),
+            models.ChatMessage.updated_at, models.ChatMessage.id,
+        ),
+        (
+            select(models.Tombstone).where(or_(
+                models.Tombstone.user_id.is_(None),
+                models.Tombstone.user_id == current_user.id,
+            )),
+            models.Tombstone.deleted_at, models.Tombstone.id,
+        ),
+    ]
+
+    results = []
+    next_positions = []
+    any_more = False
+    for (query, ts_column, id_column), position in zip(streams, positions):
+        rows, has_more = await _changes(db, query, ts_column, id_column, position, limit)
+        last = (getattr(rows[-1], ts_column.key), rows[-1].id) if rows else None
+        next_positions.append(_advance(position, last, has_more, horizon))
+        results.append(rows)
+        any_more = any_more or has_more
+
+    events, participations, messages, tombstones = results
+    return {
+        "events": events,
+        "participations": participations,
+        "messages": messages,
+        "tombstones": tombstones,
+        "next_token": encode_cursor([value for position in next_positions for value in position]),
+        "has_more": any_more,
+    }
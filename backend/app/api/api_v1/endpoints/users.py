@@ -1,7 +1,8 @@
 from typing import Any, List
 from fastapi import APIRouter, Body, Depends, HTTPException
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 from app import deps
@@ -10,35 +11,43 @@ from app.core import security
 router = APIRouter()
 
 @router.post("/", response_model=schemas.User)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     user_in: schemas.UserCreate,
 ) -> Any:
     """
     Create new user.
     """
-    user = db.query(models.User).filter(models.User.email == user_in.email).first()
+    user = await db.scalar(select(models.User).where(models.User.email == user_in.email))
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
     
+    try:
+        hashed_password = await security.get_password_hash_async(user_in.password)
+    except security.PasswordHashingBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many requests in progress, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
     user = models.User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         full_name=user_in.full_name,
         is_active=True,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     return user
 
 @router.get("/me", response_model=schemas.User)
-def read_user_me(
-    current_user: models.User = Depends(deps.get_current_user),
+async def read_user_me(
+    current_user: schemas.User = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get current user.
@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import List, Optional, Union
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "CampusConnect Backend"
@@ -10,12 +10,134 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "YOUR_SECRET_KEY_PLEASE_CHANGE_IN_PRODUCTION" # TODO: Change this
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Argon2 runs on a dedicated pool; requests beyond workers + queue get a 503.
+    # Defaults to half the cores so request handling keeps the other half.
+    PASSWORD_HASH_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    # Cache of decoded tokens and user snapshots used by get_current_user
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    # Cache of (user, event) chat membership checked on WebSocket handshakes;
+    # refusals are cached briefly so a user who just joined elsewhere gets in
+    MEMBERSHIP_CACHE_SIZE: int = 50000
+    MEMBERSHIP_CACHE_TTL_SECONDS: float = 60.0
+    MEMBERSHIP_NEGATIVE_TTL_SECONDS: float = 5.0
     
     # Database
     DATABASE_URL: str = "postgresql://postgres:postgres@db:5432/campusconnect"
-    
+    # Async driver URL; derived from DATABASE_URL (asyncpg / aiosqlite) when unset
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool sizing and timeouts (seconds)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_CONNECT_TIMEOUT: float = 10.0
+    # Schema handling at startup: 'create' runs create_all and logs what it
+    # could not fix, 'verify' only inspects the database and refuses to start
+    # if a table, column or index is missing, 'off' does neither. 'auto'
+    # verifies in production and creates everywhere else.
+    DB_SCHEMA_MODE: str = "auto"
+    # Read replicas for read-only endpoints, as a JSON list of URLs. Users who
+    # wrote within the sticky window read the primary; replicas failing a
+    # health check (or lagging more than the max) are skipped until they pass.
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_STICKY_SECONDS: float = 5.0
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_HEALTH_INTERVAL: float = 5.0
+    DB_REPLICA_HEALTH_TIMEOUT: float = 2.0
+    # Opt-in per-request SQL profiler: slow-query log, N+1 warnings and, in
+    # development, X-DB-* response headers
+    QUERY_PROFILING: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    # Identical SELECTs repeated this often in one request are reported as N+1
+    N_PLUS_ONE_THRESHOLD: int = 3
+
+    # Delta sync: rows changed this close to "now" are sent again on the next
+    # sync, so commits that land out of timestamp order are not missed
+    SYNC_SAFETY_WINDOW_SECONDS: float = 5.0
+
+    # Chat write-behind batching: flush every N messages or every few milliseconds.
+    # Senders wait once this many messages are queued behind a slow database.
+    CHAT_BATCH_MAX_SIZE: int = 100
+    CHAT_BATCH_MAX_DELAY_MS: float = 5.0
+    CHAT_BATCH_MAX_QUEUE: int = 10000
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    # One connection pool per process, shared by chat pubsub and publishes, the
+    # event cache and the rate limiter. Callers wait up to the pool timeout for
+    # a free connection; connections idle for the health-check interval are
+    # PINGed before reuse; commands failing on a dropped connection are retried.
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_RETRIES: int = 3
+    # Chat publishes queued while a pipeline is in flight go out together in
+    # the next one, up to this many
+    REDIS_PUBLISH_MAX_BATCH: int = 500
+    # Backoff bounds (seconds) when the pubsub dispatcher reconnects
+    REDIS_RECONNECT_MIN_DELAY: float = 0.5
+    REDIS_RECONNECT_MAX_DELAY: float = 30.0
+
+    # Token-bucket rate limits: 'redis' (shared by all nodes) or 'memory' (per
+    # process). If Redis fails, in-process buckets are used for a while.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "redis"
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.25
+    RATE_LIMIT_REDIS_RETRY_SECONDS: float = 5.0
+    RATE_LIMIT_FALLBACK_SIZE: int = 100000
+    # Budgets as a sustained rate per second and a burst
+    RATE_LIMIT_CHAT_USER_RATE: float = 5.0
+    RATE_LIMIT_CHAT_USER_BURST: float = 20.0
+    RATE_LIMIT_CHAT_EVENT_RATE: float = 100.0
+    RATE_LIMIT_CHAT_EVENT_BURST: float = 400.0
+    # Event create/update/delete/join/leave per user; join/leave per event
+    RATE_LIMIT_WRITE_USER_RATE: float = 1.0
+    RATE_LIMIT_WRITE_USER_BURST: float = 20.0
+    RATE_LIMIT_JOIN_EVENT_RATE: float = 50.0
+    RATE_LIMIT_JOIN_EVENT_BURST: float = 200.0
+
+    # Event response cache: 'memory' (per process) or 'redis' (shared by all workers)
+    EVENT_CACHE_BACKEND: str = "memory"
+    EVENT_CACHE_TTL_SECONDS: float = 60.0
+    EVENT_CACHE_SIZE: int = 2048
+
+    # Notification delivery pipeline
+    NOTIFICATION_QUEUE_SIZE: int = 10000
+    NOTIFICATION_WORKERS: int = 4
+    NOTIFICATION_BATCH_SIZE: int = 100
+    NOTIFICATION_MAX_RETRIES: int = 3
+    NOTIFICATION_RETRY_BACKOFF_SECONDS: float = 0.5
+    NOTIFICATION_COALESCE_SECONDS: float = 30.0
+    # Push fan-out of chat messages to offline participants
+    CHAT_PUSH_DIGEST_WINDOW_SECONDS: float = 10.0
+    CHAT_PUSH_MIN_INTERVAL_SECONDS: float = 60.0
+    CHAT_PUSH_QUEUE_SIZE: int = 10000
+    CHAT_PUSH_PREVIEW_LENGTH: int = 80
+    # Chat presence is shared through Redis; a node's entries expire this long
+    # after it stops refreshing them (e.g. because it died)
+    PRESENCE_TTL_SECONDS: float = 30.0
+    # Mock provider simulation knobs for benchmarking
+    NOTIFICATION_MOCK_LATENCY_MS: float = 0.0
+    NOTIFICATION_MOCK_FAILURE_RATE: float = 0.0
+
+    # WebSocket fan-out: frames buffered per client before it is dropped as too slow
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_CLOSE_TIMEOUT: float = 5.0
+    # Recent frames kept per event for replay on reconnect (last_seen_id), with a
+    # cap on total frame bytes; rooms stay subscribed and buffered this long after
+    # their last local socket leaves. Larger gaps are read from the database.
+    WS_REPLAY_BUFFER_SIZE: int = 256
+    WS_REPLAY_MAX_BYTES: int = 16 * 1024 * 1024
+    WS_REPLAY_IDLE_SECONDS: float = 120.0
+    WS_REPLAY_MAX_MESSAGES: int = 500
+
+    # Startup warm-up, run before /api/v1/ready reports ready: pool connections
+    # opened per database, and the time allowed for each step (seconds)
+    STARTUP_DB_CONNECTIONS: int = 4
+    STARTUP_WARMUP_TIMEOUT: float = 5.0
 
     # Environment: 'development', 'production', 'testing'
     ENVIRONMENT: str = "development"
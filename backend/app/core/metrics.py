@@ -0,0 +1,338 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from sqlalchemy import event
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow requests
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelValues = Tuple[str, ...]
+T = TypeVar("T")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter; label values are passed positionally."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, set directly by the code it measures."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labelvalues: str):
+        self._values[labelvalues] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class CallbackGauge(_Metric):
+    """
+    Gauge read at scrape time. The callback returns a single value, or a
+    mapping of label-value tuples to values when the gauge has labels.
+    """
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Union[float, Dict[LabelValues, float]]],
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labelvalues, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """
+    Cumulative histogram. observe() is a bisect plus two additions, so it is
+    cheap enough for every request and every SQL statement.
+    """
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    """
+    Collection of metrics rendered in the Prometheus text exposition format.
+    Not thread-safe; metrics are updated from the event loop.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        # Incremented by every render(), so per_scrape() knows when to recompute
+        self._scrapes = 0
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def per_scrape(self, fn: Callable[[], T]) -> Callable[[], T]:
+        """
+        Wrap fn so it runs at most once per render(); gauges reading the same
+        stats() share one call instead of computing it once each.
+        """
+        cached: List = [-1, None]
+
+        def wrapper() -> T:
+            if cached[0] != self._scrapes:
+                cached[1] = fn()
+                cached[0] = self._scrapes
+            return cached[1]
+        return wrapper
+
+    def render(self) -> str:
+        self._scrapes += 1
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4"
+
+http_requests_total = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+))
+http_request_duration_seconds = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route"),
+))
+http_requests_in_flight = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.",
+))
+db_queries_total = REGISTRY.register(Counter(
+    "db_queries_total", "SQL statements executed on the primary and replica engines.",
+))
+db_query_duration_seconds = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Duration of single SQL statements.",
+))
+db_reads_total = REGISTRY.register(Counter(
+    "db_reads_total", "Read-only requests by the database they were routed to.",
+    ("target",),
+))
+db_queries_per_request = REGISTRY.register(Histogram(
+    "db_queries_per_request", "SQL statements issued while serving one HTTP request.",
+    ("route",), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+))
+db_time_per_request_seconds = REGISTRY.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL while serving one HTTP request.",
+    ("route",),
+))
+redis_publish_duration_seconds = REGISTRY.register(Histogram(
+    "redis_publish_duration_seconds", "Time from queueing a chat publish until Redis acknowledged it.",
+))
+redis_publish_batch_size = REGISTRY.register(Histogram(
+    "redis_publish_batch_size", "Chat publishes sent to Redis in one pipeline.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+))
+redis_publish_errors_total = REGISTRY.register(Counter(
+    "redis_publish_errors_total", "Chat publishes lost because their Redis pipeline failed.",
+))
+chat_messages_received_total = REGISTRY.register(Counter(
+    "chat_messages_received_total", "Chat messages received from WebSocket clients on this node.",
+))
+chat_messages_sent_total = REGISTRY.register(Counter(
+    "chat_messages_sent_total", "Chat frames queued to WebSocket clients on this node.",
+))
+chat_replays_total = REGISTRY.register(Counter(
+    "chat_replays_total", "Reconnect replays by where the missed messages came from.",
+    ("source",),
+))
+rate_limit_rejections_total = REGISTRY.register(Counter(
+    "rate_limit_rejections_total", "Requests and chat messages refused by a rate limit, per budget.",
+    ("scope",),
+))
+rate_limit_backend_errors_total = REGISTRY.register(Counter(
+    "rate_limit_backend_errors_total", "Redis failures that switched rate limiting to in-process buckets.",
+))
+
+
+class RequestDbStats:
+    """SQL statement count and time accumulated for the current request."""
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware; SQL hooks add to it when present
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_queries_total.inc()
+    db_query_duration_seconds.observe(elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for failed statements
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(sync_engine):
+    """Attach query counting and timing hooks to an Engine (use AsyncEngine.sync_engine)"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, status counts, requests
+    in flight and per-request SQL usage. Routes are labelled by their path
+    template (e.g. /api/v1/events/{event_id}) so label cardinality stays
+    bounded; requests that match no route share the "unmatched" label.
+    """
+
+    def __init__(self, app, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            request_db_stats.reset(token)
+            # The router stores the matched route on the (shared) scope
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests_total.inc(method, route_label, str(status_code))
+            http_request_duration_seconds.observe(elapsed, method, route_label)
+            db_queries_per_request.observe(stats.queries, route_label)
+            db_time_per_request_seconds.observe(stats.seconds, route_label)
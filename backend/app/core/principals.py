@@ -0,0 +1,81 @@
+import time
+from typing import Dict, Optional
+
+from jose import JWTError
+from sqlalchemy import event
+
+from app import models, schemas
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class PrincipalCache:
+    """
+    Caches decoded access tokens (token -> user id) and user snapshots
+    (user id -> schemas.User) so authenticating a request is usually two
+    dictionary lookups instead of a JWT decode plus a database round trip.
+
+    Token entries never outlive the token's own expiry. User snapshots are
+    dropped whenever the ORM updates or deletes that user; other workers
+    pick up changes within AUTH_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.tokens = TTLCache(maxsize, ttl)
+        self.users = TTLCache(maxsize, ttl)
+
+    def decode_token(self, token: str) -> int:
+        """
+        Return the user id carried by an access token.
+        Raises JWTError or ValueError for invalid tokens.
+        """
+        user_id = self.tokens.get(token)
+        if user_id is not None:
+            return user_id
+
+        from jose import jwt
+
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        sub = payload.get("sub")
+        if sub is None:
+            raise JWTError("Token has no subject")
+        user_id = int(schemas.TokenPayload(sub=sub).sub)
+        exp = payload.get("exp")
+        if exp is not None:
+            self.tokens.set(token, user_id, ttl=exp - time.time())
+        return user_id
+
+    def get_user(self, user_id: int) -> Optional[schemas.User]:
+        return self.users.get(user_id)
+
+    def put_user(self, user: models.User) -> schemas.User:
+        snapshot = schemas.User.model_validate(user)
+        self.users.set(user.id, snapshot)
+        return snapshot
+
+    def invalidate_user(self, user_id: int):
+        self.users.pop(user_id)
+
+    def clear(self):
+        self.tokens.clear()
+        self.users.clear()
+
+    def stats(self) -> Dict[str, int]:
+        tokens, users = self.tokens.stats(), self.users.stats()
+        return {
+            "token_cache_size": tokens["size"],
+            "token_cache_hits": tokens["hits"],
+            "token_cache_misses": tokens["misses"],
+            "user_cache_size": users["size"],
+            "user_cache_hits": users["hits"],
+            "user_cache_misses": users["misses"],
+        }
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
@@ -0,0 +1,182 @@
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Bound parameter styles used by the sqlite, asyncpg and psycopg2 dialects
+_PARAM = r"(?:\?|\$\d+|%\(\w+\)s|%s)"
+_PARAM_LIST = re.compile(r"\(\s*" + _PARAM + r"(?:\s*,\s*" + _PARAM + r")*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape so that executions differing only in
+    parameters or IN-list length compare equal.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _LITERAL.sub("?", statement)
+    return _PARAM_LIST.sub("(?)", statement)
+
+
+class QueryProfile:
+    """Statements executed during one request (or one capture_queries block)."""
+    __slots__ = ("endpoint", "count", "seconds", "statements")
+
+    def __init__(self, endpoint: str = "-"):
+        self.endpoint = endpoint
+        self.count = 0
+        self.seconds = 0.0
+        # normalized SQL -> [executions, total seconds]
+        self.statements: Dict[str, list] = {}
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def duplicates(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """SELECTs repeated at least threshold times: likely lazy loads in a loop"""
+        threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        return [
+            (sql, entry[0]) for sql, entry in self.statements.items()
+            if entry[0] >= threshold and sql[:6].upper() == "SELECT"
+        ]
+
+    def summary(self) -> str:
+        lines = [f"{self.count} queries, {self.seconds * 1000:.1f} ms"]
+        for sql, (count, seconds) in sorted(self.statements.items(), key=lambda kv: -kv[1][0]):
+            lines.append(f"  {count:>4}x {seconds * 1000:8.1f} ms  {sql}")
+        return "\n".join(lines)
+
+
+# Profile of the request being served, set by QueryProfilerMiddleware
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_profile", default=None)
+# Open capture_queries blocks; they see every statement regardless of context
+_captures: List[QueryProfile] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["profile_start"].pop()
+    profile = current_profile.get()
+    if profile is None and not _captures:
+        return
+    sql = normalize_sql(statement)
+    if profile is not None:
+        profile.record(sql, elapsed)
+    for capture in _captures:
+        capture.record(sql, elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        endpoint = profile.endpoint if profile is not None else "-"
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) on {endpoint}: {sql}")
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("profile_start"):
+        conn.info["profile_start"].pop()
+
+
+def enable_query_profiling(sync_engine):
+    """Attach the profiler hooks to an Engine (use AsyncEngine.sync_engine); idempotent"""
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def capture_queries(sync_engine=None) -> Iterator[QueryProfile]:
+    """
+    Record every statement executed on the engine inside the block, from any
+    thread or task (so it works around TestClient calls). Without an engine,
+    statements on the primary and on every read replica are recorded.
+    """
+    if sync_engine is None:
+        from app.db.replicas import read_router
+        from app.db.session import async_engine
+        for engine in [async_engine] + [replica.engine for replica in read_router.replicas]:
+            enable_query_profiling(engine.sync_engine)
+    else:
+        enable_query_profiling(sync_engine)
+    profile = QueryProfile("capture")
+    _captures.append(profile)
+    try:
+        yield profile
+    finally:
+        _captures.remove(profile)
+
+
+@contextmanager
+def assert_max_queries(limit: int, sync_engine=None) -> Iterator[QueryProfile]:
+    """
+    Fail with the statement breakdown if the block runs more than limit queries:
+
+        with assert_max_queries(3):
+            client.get("/api/v1/events/")
+    """
+    with capture_queries(sync_engine) as profile:
+        yield profile
+    if profile.count > limit:
+        raise AssertionError(f"Expected at most {limit} queries, got {profile.summary()}")
+
+
+class QueryProfilerMiddleware:
+    """
+    Pure ASGI middleware giving each HTTP request its own QueryProfile. Logs
+    a warning with the offending statements when a request looks like N+1,
+    and with expose_headers adds X-DB-Query-Count, X-DB-Time-Ms and
+    X-DB-Duplicate-Queries to the response.
+    """
+
+    def __init__(self, app, expose_headers: bool = False):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(profile.count).encode()))
+                headers.append((b"x-db-time-ms", f"{profile.seconds * 1000:.2f}".encode()))
+                headers.append((b"x-db-duplicate-queries", str(len(profile.duplicates())).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                profile.endpoint = f"{scope['method']} {route.path}"
+            duplicates = profile.duplicates()
+            if duplicates:
+                repeated = "\n".join(f"  {count}x {sql}" for sql, count in duplicates)
+                logger.warning(f"Possible N+1 on {profile.endpoint} ({profile.count} queries):\n{repeated}")
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import rate_limit_backend_errors_total, rate_limit_rejections_total
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit:"
+
+# Refills every bucket in KEYS to the Redis clock, then takes ARGV[1] tokens
+# from all of them or from none. ARGV[2 * i], ARGV[2 * i + 1] are the rate
+# (tokens per second) and burst of KEYS[i]. Returns {1} when allowed, else
+# {0, seconds until the cost fits, index of the bucket that is shortest}.
+# Numbers go back as strings; Redis would truncate Lua floats to integers.
+TOKEN_BUCKET_LUA = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local levels = {}
+local wait, blocked = 0, 0
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[i * 2]), tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = burst
+    if state[1] then
+        level = math.min(burst, tonumber(state[1]) + math.max(0, now - tonumber(state[2])) * rate)
+    end
+    levels[i] = level
+    if level < cost and (cost - level) / rate > wait then
+        wait, blocked = (cost - level) / rate, i
+    end
+end
+if blocked > 0 then
+    return {0, tostring(wait), blocked}
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[i * 2]), tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return {1}
+"""
+
+
+class Limit(NamedTuple):
+    """Sustained rate in tokens per second, and how many can be spent at once"""
+    rate: float
+    burst: float
+
+
+class Bucket(NamedTuple):
+    # Budget name, used in the Redis key and as the metrics label
+    scope: str
+    # Whose budget: a user id, an event id
+    key: str
+    limit: Limit
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    # Seconds until the same request would be allowed; 0 when allowed
+    retry_after: float = 0.0
+    # Scope of the bucket that refused the request
+    scope: Optional[str] = None
+
+
+ALLOWED = Decision(True)
+
+
+class MemoryBuckets:
+    """
+    Per-process token buckets with the same semantics as the Lua script.
+    Evicted or expired buckets are full, which is also what a bucket idle
+    for long enough would be.
+    """
+
+    def __init__(self, maxsize: int, timer: Callable[[], float] = time.monotonic):
+        self.timer = timer
+        # ttl is set per entry to the bucket's time to refill
+        self.buckets = TTLCache(maxsize, float("inf"), timer=timer)
+
+    def take(self, buckets: Sequence[Bucket], cost: float) -> Decision:
+        now = self.timer()
+        levels: List[float] = []
+        wait, blocked = 0.0, None
+        for bucket in buckets:
+            rate, burst = bucket.limit
+            state = self.buckets.get((bucket.scope, bucket.key))
+            level = burst if state is None else min(burst, state[0] + max(0.0, now - state[1]) * rate)
+            levels.append(level)
+            if level < cost and (cost - level) / rate > wait:
+                wait, blocked = (cost - level) / rate, bucket.scope
+        if blocked is not None:
+            return Decision(False, wait, blocked)
+        for bucket, level in zip(buckets, levels):
+            rate, burst = bucket.limit
+            self.buckets.set((bucket.scope, bucket.key), (level - cost, now), ttl=burst / rate)
+        return ALLOWED
+
+
+class RedisBuckets:
+    """
+    Token buckets in Redis, shared by every node; one round trip per check.
+    Uses the shared client, but gives each check at most timeout seconds.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.script = None
+
+    def _script(self):
+        if self.script is None:
+            self.script = get_redis().register_script(TOKEN_BUCKET_LUA)
+        return self.script
+
+    async def load(self):
+        """Load the script ahead of time, so the first check is a plain EVALSHA"""
+        await asyncio.wait_for(get_redis().script_load(TOKEN_BUCKET_LUA), self.timeout)
+
+    async def take(self, buckets: Sequence[Bucket], cost: float) -> Decision:
+        script = self._script()
+        args: List[float] = [cost]
+        for bucket in buckets:
+            args.extend(bucket.limit)
+        result = await asyncio.wait_for(
+            script(keys=[f"{KEY_PREFIX}{b.scope}:{b.key}" for b in buckets], args=args, client=get_redis()),
+            self.timeout,
+        )
+        if int(result[0]) == 1:
+            return ALLOWED
+        return Decision(False, float(result[1]), buckets[int(result[2]) - 1].scope)
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting over one or more budgets at once: a request
+    is allowed only if every bucket has the tokens, and then all of them
+    are charged.
+
+    With shared set the buckets are shared by all nodes and updated
+    atomically by a Lua script. If Redis fails, checks fall back to
+    per-process buckets for retry_seconds before Redis is tried again, so
+    an outage neither blocks writes nor removes the limit (though each
+    node then enforces it separately).
+    """
+
+    def __init__(self, shared: bool, fallback_size: int, timeout: float, retry_seconds: float):
+        self.shared = RedisBuckets(timeout) if shared else None
+        self.local = MemoryBuckets(fallback_size)
+        self.retry_seconds = retry_seconds
+        self._shared_down_until = 0.0
+
+    async def warm_up(self):
+        if self.shared is not None and settings.RATE_LIMIT_ENABLED:
+            await self.shared.load()
+
+    async def hit(self, *buckets: Bucket, cost: float = 1.0) -> Decision:
+        if not settings.RATE_LIMIT_ENABLED or not buckets:
+            return ALLOWED
+        decision = None
+        if self.shared is not None and time.monotonic() >= self._shared_down_until:
+            try:
+                decision = await self.shared.take(buckets, cost)
+            except Exception as e:
+                logger.warning(f"Rate limiter falling back to in-process buckets: {e}")
+                rate_limit_backend_errors_total.inc()
+                self._shared_down_until = time.monotonic() + self.retry_seconds
+        if decision is None:
+            decision = self.local.take(buckets, cost)
+        if not decision.allowed:
+            rate_limit_rejections_total.inc(decision.scope)
+        return decision
+
+
+def retry_after_header(decision: Decision) -> str:
+    """Whole seconds for a Retry-After header, at least 1"""
+    return str(max(1, math.ceil(decision.retry_after)))
+
+
+# Budgets; rates are per second
+CHAT_USER = Limit(settings.RATE_LIMIT_CHAT_USER_RATE, settings.RATE_LIMIT_CHAT_USER_BURST)
+CHAT_EVENT = Limit(settings.RATE_LIMIT_CHAT_EVENT_RATE, settings.RATE_LIMIT_CHAT_EVENT_BURST)
+WRITE_USER = Limit(settings.RATE_LIMIT_WRITE_USER_RATE, settings.RATE_LIMIT_WRITE_USER_BURST)
+JOIN_EVENT = Limit(settings.RATE_LIMIT_JOIN_EVENT_RATE, settings.RATE_LIMIT_JOIN_EVENT_BURST)
+
+
+def chat_buckets(user_id: int, event_id: int) -> List[Bucket]:
+    """One chat message: the sender's own budget and the room's"""
+    return [Bucket("chat_user", str(user_id), CHAT_USER), Bucket("chat_event", str(event_id), CHAT_EVENT)]
+
+
+def write_buckets(user_id: int, event_id: Optional[int] = None) -> List[Bucket]:
+    """A REST write; joins and leaves also draw on the event's budget"""
+    buckets = [Bucket("write_user", str(user_id), WRITE_USER)]
+    if event_id is not None:
+        buckets.append(Bucket("join_event", str(event_id), JOIN_EVENT))
+    return buckets
+
+
+rate_limiter = RateLimiter(
+    settings.RATE_LIMIT_BACKEND == "redis",
+    settings.RATE_LIMIT_FALLBACK_SIZE,
+    settings.RATE_LIMIT_REDIS_TIMEOUT,
+    settings.RATE_LIMIT_REDIS_RETRY_SECONDS,
+)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import redis_publish_batch_size, redis_publish_duration_seconds, redis_publish_errors_total
+
+logger = logging.getLogger(__name__)
+
+# The process-wide client and its pool; created on first use, inside the
+# running loop, so importing the app does not import redis
+_client = None
+
+
+def get_redis():
+    """
+    The Redis client shared by everything in this process: chat pubsub and
+    publishes, the event cache and the rate limiter.
+
+    Its pool is bounded at REDIS_MAX_CONNECTIONS (callers wait for a free
+    connection rather than opening more), PINGs connections that sat idle
+    before handing them out, and retries commands that hit a dropped
+    connection with exponential backoff, reconnecting as it goes. Replies
+    are bytes.
+    """
+    global _client
+    if _client is None:
+        import redis.asyncio as redis
+        from redis.asyncio.retry import Retry
+        from redis.backoff import ExponentialBackoff
+        from redis.exceptions import ConnectionError, TimeoutError
+
+        pool = redis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            # Short sleeps: a request is waiting on the command
+            retry=Retry(ExponentialBackoff(cap=0.5, base=0.01), settings.REDIS_RETRIES),
+            retry_on_error=[ConnectionError, TimeoutError],
+        )
+        _client = redis.Redis(connection_pool=pool)
+    return _client
+
+
+async def close_redis():
+    """Close the shared client and every pooled connection; call on shutdown"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+        await client.connection_pool.disconnect()
+
+
+class RedisPublisher:
+    """
+    Coalesces PUBLISH commands into pipelines.
+
+    One pipeline is in flight at a time. Messages published while it is
+    out are queued and sent together in the next one, up to max_batch per
+    pipeline, so under load many messages share a round trip while a lone
+    message is sent straight away. Order is preserved. publish() returns
+    once Redis has acknowledged the message, or raises if its pipeline
+    failed.
+    """
+
+    def __init__(self, client_factory: Callable = get_redis, max_batch: Optional[int] = None):
+        self.client_factory = client_factory
+        self.max_batch = max_batch or settings.REDIS_PUBLISH_MAX_BATCH
+        # (channel, payload, monotonic time queued, future)
+        self._pending: Deque[Tuple[str, str, float, asyncio.Future]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.pipelines = 0
+        self.published = 0
+
+    async def publish(self, channel: str, payload: str):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((channel, payload, time.perf_counter(), future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+        await future
+
+    async def _drain(self):
+        # Started by the first publish of a burst; the rest of the burst has
+        # been queued by the time this runs
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            try:
+                async with self.client_factory().pipeline(transaction=False) as pipe:
+                    for channel, payload, _, _ in batch:
+                        pipe.publish(channel, payload)
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"Failed to publish {len(batch)} chat messages: {e}")
+                redis_publish_errors_total.inc(amount=len(batch))
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            self.pipelines += 1
+            self.published += len(batch)
+            redis_publish_batch_size.observe(len(batch))
+            for _, _, queued, future in batch:
+                redis_publish_duration_seconds.observe(done - queued)
+                if not future.done():
+                    future.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._pending),
+            "pipelines": self.pipelines,
+            "published": self.published,
+        }
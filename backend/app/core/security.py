@@ -1,14 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any, Union
-from jose import jwt
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from typing import Optional, Any, Tuple, Union
 
 from app.core.config import settings
 
-# Initialize Argon2 password hasher
-# Argon2 is more secure than bcrypt and doesn't have the 72-byte password limit
-password_hasher = PasswordHasher()
+# jose.jwt and argon2 are imported on first use (or by the startup warm-up)
+# rather than at import time, which keeps worker boot fast
+_password_hasher = None
+
+def get_password_hasher():
+    """
+    The shared Argon2 password hasher.
+    Argon2 is more secure than bcrypt and doesn't have the 72-byte password limit.
+    """
+    global _password_hasher
+    if _password_hasher is None:
+        from argon2 import PasswordHasher
+
+        _password_hasher = PasswordHasher()
+    return _password_hasher
+
+# Dedicated pool for Argon2 so hashing cannot starve the shared request threadpool.
+# argon2-cffi releases the GIL while hashing, so threads run in parallel.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2"
+)
+# Jobs running or waiting on _hash_executor
+_hash_jobs_pending = 0
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing queue is full."""
 
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
@@ -16,6 +38,8 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
+    from jose import jwt
+
     to_encode = {"exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -25,8 +49,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Verify a plain password against an Argon2 hash.
     Returns True if password matches, False otherwise.
     """
+    from argon2.exceptions import VerifyMismatchError
+
     try:
-        password_hasher.verify(hashed_password, plain_password)
+        get_password_hasher().verify(hashed_password, plain_password)
         return True
     except VerifyMismatchError:
         return False
@@ -39,4 +65,45 @@ def get_password_hash(password: str) -> str:
     Hash a password using Argon2.
     Argon2 supports passwords of any length (unlike bcrypt's 72-byte limit).
     """
-    return password_hasher.hash(password)
+    return get_password_hasher().hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if the stored hash uses outdated Argon2
+    parameters, return a fresh hash to persist in its place.
+    """
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    password_hasher = get_password_hasher()
+    if password_hasher.check_needs_rehash(hashed_password):
+        return True, password_hasher.hash(plain_password)
+    return True, None
+
+async def _run_hashing(func, *args):
+    """
+    Run a hashing function on the dedicated pool.
+    Fails fast with PasswordHashingBusy once workers and queue are saturated.
+    """
+    global _hash_jobs_pending
+    limit = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+    if _hash_jobs_pending >= limit:
+        raise PasswordHashingBusy()
+    _hash_jobs_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_jobs_pending -= 1
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_hashing(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+def hashing_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "pending": _hash_jobs_pending,
+        # Jobs waiting for a free worker thread
+        "queued": max(0, _hash_jobs_pending - settings.PASSWORD_HASH_WORKERS),
+    }
@@ -1 +1,10 @@
-from .session import SessionLocal, engine
+from .session import AsyncSessionLocal, async_engine
+
+
+def __getattr__(name: str):
+    # SessionLocal and engine stay importable from here, but like in session.py
+    # the sync engine is only created when one of them is first used
+    if name in ("SessionLocal", "engine"):
+        from . import session
+        return getattr(session, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
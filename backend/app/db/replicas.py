@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import db_reads_total
+from app.db.session import AsyncSessionLocal, create_async_db_engine, get_async_database_url
+
+logger = logging.getLogger(__name__)
+
+# Seconds a streaming Postgres replica is behind; 0 when it has replayed
+# everything it received (an idle primary is not lag)
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    __slots__ = ("name", "engine", "sessionmaker", "healthy")
+
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(
+            bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False,
+        )
+        self.healthy = True
+
+
+class ReadRouter:
+    """
+    Chooses the database a read-only request runs on.
+
+    Reads go round-robin to healthy replicas, except for users who wrote
+    within sticky_seconds: they read the primary, so they always see their
+    own writes. Writes are recorded per process when a primary session that
+    knows its user commits (see deps.get_db). Replicas leave the rotation
+    when a health check or a read on them fails, or when a Postgres replica
+    lags by more than max_lag seconds, and rejoin once a check passes.
+    Without replicas every read goes to the primary.
+    """
+
+    def __init__(self, urls: Iterable[str], sticky_seconds: float, max_lag: float, sticky_size: int = 100000):
+        self.replicas: List[Replica] = [
+            Replica(make_url(url).render_as_string(hide_password=True), create_async_db_engine(get_async_database_url(url)))
+            for url in urls
+        ]
+        self.sticky_seconds = sticky_seconds
+        self.max_lag = max_lag
+        self._recent_writers = TTLCache(sticky_size, sticky_seconds)
+        self._turn = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def mark_write(self, user_id: int):
+        self._recent_writers.set(user_id, True)
+
+    def mark_writes(self, user_ids: Iterable[int]):
+        for user_id in user_ids:
+            self._recent_writers.set(user_id, True)
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        return user_id is not None and self._recent_writers.get(user_id, False)
+
+    def route(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        """The replica to read from, or None for the primary"""
+        if not self.is_sticky(user_id):
+            healthy = [r for r in self.replicas if r.healthy]
+            if healthy:
+                db_reads_total.inc("replica")
+                return healthy[next(self._turn) % len(healthy)]
+        db_reads_total.inc("primary")
+        return None
+
+    def session(self, replica: Optional[Replica]) -> AsyncSession:
+        session = (replica.sessionmaker if replica is not None else AsyncSessionLocal)()
+        session.info["replica"] = replica
+        return session
+
+    def mark_down(self, replica: Replica, reason: Exception):
+        if replica.healthy:
+            logger.warning(f"Replica {replica.name} out of rotation: {reason}")
+        replica.healthy = False
+
+    async def _probe(self, replica: Replica):
+        async with replica.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                lag = float(await conn.scalar(_PG_LAG_SQL) or 0)
+                if lag > self.max_lag:
+                    raise RuntimeError(f"replication lag {lag:.1f}s exceeds {self.max_lag:.1f}s")
+            else:
+                await conn.execute(text("SELECT 1"))
+
+    async def check(self, replica: Replica, timeout: float):
+        try:
+            await asyncio.wait_for(self._probe(replica), timeout)
+        except Exception as e:
+            self.mark_down(replica, e if str(e) else TimeoutError("health check timed out"))
+            return
+        if not replica.healthy:
+            logger.info(f"Replica {replica.name} back in rotation")
+        replica.healthy = True
+
+    async def check_all(self, timeout: float):
+        await asyncio.gather(*(self.check(r, timeout) for r in self.replicas))
+
+    async def _health_loop(self, interval: float, timeout: float):
+        while True:
+            await self.check_all(timeout)
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float, timeout: float):
+        """Run health checks every interval seconds until stop()"""
+        if self.enabled and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.create_task(self._health_loop(interval, timeout))
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "replicas": len(self.replicas),
+            "healthy_replicas": sum(1 for r in self.replicas if r.healthy),
+            "sticky_users": len(self._recent_writers),
+        }
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    """Whether a session from deps.get_read_db reads a replica"""
+    return db.info.get("replica") is not None
+
+
+read_router = ReadRouter(
+    settings.DATABASE_REPLICA_URLS,
+    settings.DB_REPLICA_STICKY_SECONDS,
+    settings.DB_REPLICA_MAX_LAG_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session):
+    # deps.get_db stores the requesting user on primary sessions
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        read_router.mark_write(user_id)
@@ -0,0 +1,140 @@
+"""
+Schema creation and verification at startup.
+
+Development workers create missing tables with create_all, as they always
+have. Production workers inspect the live database instead and refuse to
+start unless every table, column, index and named unique constraint the
+models declare is there, along with the full-text search objects of the
+dialect (see models/event.py). create_all never alters a table that
+already exists, so a database missing a column or index added since it
+was created is reported in both modes; 'create' logs it, 'verify' fails.
+
+Objects are compared by name; column types are not checked.
+
+Check a database as a release step, after migrating:
+    python -m app.db.schema --check
+"""
+import asyncio
+import logging
+import sys
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import UniqueConstraint, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app import models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.config import settings
+from app.db.base_class import Base
+
+logger = logging.getLogger(__name__)
+
+# Search objects created by DDL in models/event.py rather than declared on
+# the models: dialect -> table -> names
+_SEARCH_TABLES: Dict[str, Set[str]] = {"sqlite": {"event_fts"}}
+_SEARCH_COLUMNS: Dict[str, Dict[str, Set[str]]] = {"postgresql": {"event": {"search_vector"}}}
+_SEARCH_INDEXES: Dict[str, Dict[str, Set[str]]] = {"postgresql": {"event": {"ix_event_search_vector"}}}
+
+
+class SchemaMismatch(RuntimeError):
+    """The database is missing tables, columns or indexes the models declare."""
+
+
+def schema_differences(conn: Connection) -> List[str]:
+    """
+    What the models (and the dialect's search objects) declare but the
+    database behind conn lacks, one line each; empty when it matches.
+    On Postgres each kind of object is one catalog query for all tables.
+    """
+    dialect = conn.dialect.name
+    inspector = inspect(conn)
+    live_tables = set(inspector.get_table_names())
+    problems = [f"missing table {name}" for name in sorted(_SEARCH_TABLES.get(dialect, set()) - live_tables)]
+
+    tables = [table for table in Base.metadata.sorted_tables if table.name in live_tables]
+    problems += [f"missing table {t.name}" for t in Base.metadata.sorted_tables if t.name not in live_tables]
+    if not tables:
+        return problems
+    names = [table.name for table in tables]
+    columns = inspector.get_multi_columns(filter_names=names)
+    indexes = inspector.get_multi_indexes(filter_names=names)
+    uniques = inspector.get_multi_unique_constraints(filter_names=names)
+
+    for table in tables:
+        key = (None, table.name)
+        live_columns = {c["name"] for c in columns.get(key, [])}
+        live_indexes = {i["name"] for i in indexes.get(key, [])}
+        # Postgres reports unique constraints separately; SQLite may report them as indexes too
+        live_uniques = {u["name"] for u in uniques.get(key, [])} | live_indexes
+
+        wanted_columns = {c.name for c in table.columns} | _SEARCH_COLUMNS.get(dialect, {}).get(table.name, set())
+        wanted_indexes = {i.name for i in table.indexes} | _SEARCH_INDEXES.get(dialect, {}).get(table.name, set())
+        wanted_uniques = {c.name for c in table.constraints if c.name and isinstance(c, UniqueConstraint)}
+
+        problems += [f"missing column {table.name}.{name}" for name in sorted(wanted_columns - live_columns)]
+        problems += [f"missing index {name} on {table.name}" for name in sorted(wanted_indexes - live_indexes)]
+        problems += [f"missing unique constraint {name} on {table.name}" for name in sorted(wanted_uniques - live_uniques)]
+    return problems
+
+
+def resolve_mode(mode: Optional[str] = None) -> str:
+    """'create', 'verify' or 'off' for DB_SCHEMA_MODE; 'auto' depends on ENVIRONMENT"""
+    mode = mode or settings.DB_SCHEMA_MODE
+    if mode == "auto":
+        return "verify" if settings.ENVIRONMENT == "production" else "create"
+    if mode not in ("create", "verify", "off"):
+        raise ValueError(f"DB_SCHEMA_MODE must be auto, create, verify or off, not {mode!r}")
+    return mode
+
+
+async def create_schema(engine: AsyncEngine) -> List[str]:
+    """
+    Create missing tables, then return (and log) whatever create_all could
+    not add to tables that already existed
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        problems = await conn.run_sync(schema_differences)
+    for problem in problems:
+        logger.warning(f"Database schema is out of date, migrate it: {problem}")
+    return problems
+
+
+async def verify_schema(engine: AsyncEngine) -> None:
+    """Raise SchemaMismatch unless the database has everything the models declare"""
+    async with engine.connect() as conn:
+        problems = await conn.run_sync(schema_differences)
+    if problems:
+        raise SchemaMismatch("Database schema does not match the models; migrate it:\n  " + "\n  ".join(problems))
+
+
+async def prepare_schema(engine: AsyncEngine, mode: Optional[str] = None) -> str:
+    """Run the startup schema step for mode and return the mode that ran"""
+    mode = resolve_mode(mode)
+    if mode == "create":
+        await create_schema(engine)
+    elif mode == "verify":
+        await verify_schema(engine)
+    return mode
+
+
+async def _main(check: bool) -> int:
+    from app.db.session import async_engine
+
+    try:
+        if check:
+            await verify_schema(async_engine)
+        elif await create_schema(async_engine):
+            raise SchemaMismatch("Created missing tables, but existing ones need migrating (see above)")
+    except SchemaMismatch as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        await async_engine.dispose()
+    print("schema matches the models")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s")
+    raise SystemExit(asyncio.run(_main("--check" in sys.argv[1:])))
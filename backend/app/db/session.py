@@ -1,10 +1,75 @@
+from typing import Any, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using them
+# The synchronous engine (engine, SessionLocal) is only used by scripts, so
+# it and its DBAPI driver are created on first access rather than by every
+# worker at import time
+_sync: Dict[str, Any] = {}
+
+
+def __getattr__(name: str):
+    if name in ("engine", "SessionLocal"):
+        if not _sync:
+            _sync["engine"] = create_engine(
+                settings.DATABASE_URL,
+                pool_pre_ping=True,  # Verify connections before using them
+            )
+            _sync["SessionLocal"] = sessionmaker(autocommit=False, autoflush=False, bind=_sync["engine"])
+        return _sync[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Sync backend name -> asyncio driver
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Map a sync database URL onto the matching asyncio driver.
+    URLs that already name an async driver are returned unchanged.
+    """
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver and parsed.drivername != driver:
+        parsed = parsed.set(drivername=driver)
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """
+    Build an AsyncEngine with pool sizing and timeouts taken from settings.
+    SQLite uses its own pool class, so pool sizing only applies to server databases.
+    """
+    parsed = make_url(url)
+    kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    if parsed.get_backend_name() != "sqlite":
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    if parsed.drivername == "postgresql+asyncpg":
+        kwargs["connect_args"] = {"timeout": settings.DB_CONNECT_TIMEOUT}
+    return create_async_engine(url, **kwargs)
+
+
+async_engine = create_async_db_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+)
+# expire_on_commit=False so committed objects can still be serialized without
+# an implicit (and, under asyncio, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
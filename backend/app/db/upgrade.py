@@ -0,0 +1,98 @@
+"""
+In-place upgrades for databases created by an older version.
+
+create_all only creates missing tables, so objects added to existing
+tables have to be added here. Every step checks the live database first
+and is safe to run again. All steps run in one transaction:
+    python -m app.db.upgrade
+
+Then confirm with `python -m app.db.schema --check`.
+"""
+import asyncio
+from typing import Callable, List, Optional
+
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app import models
+
+PARTICIPANT_UNIQUE = "uq_eventparticipant_event_user"
+
+
+def _unique_participants(conn: Connection) -> Optional[str]:
+    """Remove duplicate participations, then enforce one per (event, user)"""
+    inspector = inspect(conn)
+    existing = {u["name"] for u in inspector.get_unique_constraints("eventparticipant")}
+    existing |= {i["name"] for i in inspector.get_indexes("eventparticipant")}
+    if PARTICIPANT_UNIQUE in existing:
+        return None
+    first = select(func.min(models.EventParticipant.id)).group_by(
+        models.EventParticipant.event_id, models.EventParticipant.user_id
+    )
+    removed = conn.execute(delete(models.EventParticipant).where(models.EventParticipant.id.not_in(first))).rowcount
+    if conn.dialect.name == "sqlite":
+        # SQLite cannot add a constraint to an existing table; a unique index enforces the same
+        conn.execute(text(f"CREATE UNIQUE INDEX {PARTICIPANT_UNIQUE} ON eventparticipant (event_id, user_id)"))
+    else:
+        conn.execute(text(f"ALTER TABLE eventparticipant ADD CONSTRAINT {PARTICIPANT_UNIQUE} UNIQUE (event_id, user_id)"))
+    return f"added {PARTICIPANT_UNIQUE} (removed {removed} duplicate participations)"
+
+
+def _participant_count(conn: Connection) -> Optional[str]:
+    """
+    Add event.participant_count if needed and set it to the real number of
+    participants. Without the backfill every event would start at 0 and the
+    capacity check would admit up to capacity joins on top of them.
+    """
+    added = "participant_count" not in {c["name"] for c in inspect(conn).get_columns("event")}
+    if added:
+        conn.execute(text("ALTER TABLE event ADD COLUMN participant_count INTEGER NOT NULL DEFAULT 0"))
+    count = (
+        select(func.count())
+        .where(models.EventParticipant.event_id == models.Event.id)
+        .scalar_subquery()
+    )
+    # updated_at is kept, so delta sync does not send every event again
+    fixed = conn.execute(
+        update(models.Event)
+        .where(models.Event.participant_count != count)
+        .values(participant_count=count, updated_at=models.Event.updated_at)
+    ).rowcount
+    if not added and not fixed:
+        return None
+    return f"{'added' if added else 'checked'} event.participant_count ({fixed} events backfilled)"
+
+
+# In order; each returns a description of what it changed, or None
+STEPS: List[Callable[[Connection], Optional[str]]] = [
+    _unique_participants,
+    _participant_count,
+]
+
+
+def run_steps(conn: Connection) -> List[str]:
+    return [change for change in (step(conn) for step in STEPS) if change]
+
+
+async def upgrade(engine: AsyncEngine) -> List[str]:
+    """Apply every step that is still needed; returns what changed"""
+    async with engine.begin() as conn:
+        return await conn.run_sync(run_steps)
+
+
+async def _main() -> int:
+    from app.db.session import async_engine
+
+    try:
+        changes = await upgrade(async_engine)
+    finally:
+        await async_engine.dispose()
+    for change in changes:
+        print(change)
+    print("database is up to date" if not changes else f"{len(changes)} upgrade steps applied")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(_main()))
@@ -1,44 +1,92 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app import models, schemas
+from app.core.principals import principal_cache
+from app.core.rate_limit import rate_limiter, retry_after_header, write_buckets
 from app.db import session
+from app.db.replicas import read_router
 
-# Placeholder for DB session (Mocking for now as we don't have DB connection code fully wired up)
-# In a real app, this would use SessionLocal from db/session.py
-def get_db() -> Generator:
+def _token_user_id(request: Request) -> Optional[int]:
+    """User id from a valid bearer token, without failing the request"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
     try:
-        db = session.SessionLocal()
+        return principal_cache.decode_token(token)
+    except (JWTError, ValueError):
+        return None
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the primary"""
+    async with session.AsyncSessionLocal() as db:
+        if read_router.enabled:
+            # A commit in this session sends the user's reads to the primary for a while
+            db.info["user_id"] = _token_user_id(request)
         yield db
-    finally:
-        db.close()
-    # pass # For now, just pass
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints: a replica when one is healthy, the
+    primary for users who just wrote or when there are no replicas.
+    """
+    replica = read_router.route(_token_user_id(request) if read_router.enabled else None)
+    async with read_router.session(replica) as db:
+        try:
+            yield db
+        except (OperationalError, InterfaceError) as e:
+            if replica is not None:
+                read_router.mark_down(replica, e)
+            raise
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/access-token")
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
-) -> models.User:
+) -> schemas.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = schemas.TokenPayload(sub=user_id)
+        user_id = principal_cache.decode_token(token)
     except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.id == token_data.sub).first()
-    if not user:
-        raise credentials_exception
+
+    user = principal_cache.get_user(user_id)
+    if user is None:
+        db_user = await db.scalar(select(models.User).where(models.User.id == user_id))
+        if not db_user:
+            raise credentials_exception
+        user = principal_cache.put_user(db_user)
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return user
+
+async def _enforce(*buckets):
+    decision = await rate_limiter.hit(*buckets)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": retry_after_header(decision)},
+        )
+
+async def limit_writes(current_user: schemas.User = Depends(get_current_user)) -> None:
+    """Per-user budget for event writes"""
+    await _enforce(*write_buckets(current_user.id))
+
+async def limit_event_membership(
+    event_id: int,
+    current_user: schemas.User = Depends(get_current_user),
+) -> None:
+    """Joins and leaves: the user's write budget plus the event's own"""
+    await _enforce(*write_buckets(current_user.id, event_id))
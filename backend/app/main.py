@@ -1,11 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core import metrics, profiling, security
+from app.core.principals import principal_cache
+from app.core.redis_client import close_redis
 from app.api.api_v1.api import api_router
-from app.db.base_class import Base
-from app.db.session import engine
+from app.db.replicas import read_router
+from app.db.schema import prepare_schema
+from app.db.session import async_engine
 from app import models  # Import all models to register them
+from app.services.chat import message_batcher
+from app.services.chat_fanout import chat_push_fanout
+from app.services.membership import membership_cache
+from app.services.notification.service import notification_service
+from app.startup import readiness
+from app.websocket.manager import manager
+from app.websocket.presence import presence
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -38,12 +49,92 @@ else:
         allow_headers=["*"],
     )
 
+# The primary and every read replica, for the SQL hooks below
+engines = [async_engine] + [replica.engine for replica in read_router.replicas]
+
+# Per-route latency and per-request SQL usage, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+for engine in engines:
+    metrics.instrument_engine(engine.sync_engine)
+
+if settings.QUERY_PROFILING:
+    # Query counts and DB time are returned as X-DB-* headers in development only
+    app.add_middleware(
+        profiling.QueryProfilerMiddleware,
+        expose_headers=settings.ENVIRONMENT == "development",
+    )
+    for engine in engines:
+        profiling.enable_query_profiling(engine.sync_engine)
+
+# Gauges read from the live components at scrape time. manager.stats() walks
+# every socket, so the gauges built on it share one call per scrape
+manager_stats = metrics.REGISTRY.per_scrape(manager.stats)
+principal_stats = metrics.REGISTRY.per_scrape(principal_cache.stats)
+for name, documentation, callback, labelnames in [
+    ("websocket_connections", "Open chat WebSockets on this node.",
+     lambda: manager_stats()["local_connections"], ()),
+    ("websocket_rooms", "Events with at least one local chat WebSocket.",
+     lambda: manager_stats()["local_rooms"], ()),
+    ("websocket_registry_bytes", "Approximate memory held by the WebSocket connection registry.",
+     lambda: manager.connections.memory_bytes(), ()),
+    ("websocket_send_queue_depth", "Frames waiting in per-socket send queues.",
+     lambda: manager_stats()["queued_messages"], ()),
+    ("redis_publish_queue_depth", "Chat publishes waiting for the next Redis pipeline.",
+     lambda: manager.publisher.stats()["queued"], ()),
+    ("redis_subscribed_channels", "Redis pubsub channels this node listens on.",
+     lambda: manager_stats()["subscribed_channels"], ()),
+    ("websocket_replay_buffer_bytes", "Frame bytes held for replay on reconnect.",
+     lambda: manager.replay.nbytes, ()),
+    ("app_ready", "1 while this worker reports ready on /api/v1/ready.",
+     lambda: int(readiness.ready), ()),
+    ("db_replicas_healthy", "Read replicas currently in rotation.",
+     lambda: read_router.stats()["healthy_replicas"], ()),
+    ("executor_queue_depth", "Jobs waiting for a worker thread, per executor.",
+     lambda: {("argon2",): security.hashing_stats()["queued"]}, ("executor",)),
+    ("executor_jobs_pending", "Jobs running or waiting, per executor.",
+     lambda: {("argon2",): security.hashing_stats()["pending"]}, ("executor",)),
+    ("chat_persist_queue_depth", "Chat messages waiting to be written.",
+     lambda: message_batcher.stats()["queued"], ()),
+    ("chat_push_queue_depth", "Committed chat messages waiting for push fan-out.",
+     lambda: chat_push_fanout.stats()["queued_messages"], ()),
+    ("notification_queue_depth", "Notifications waiting for a delivery worker.",
+     lambda: notification_service.stats()["queued"], ()),
+    ("auth_cache_entries", "Entries in the authentication caches.",
+     lambda: {
+         ("token",): principal_stats()["token_cache_size"],
+         ("user",): principal_stats()["user_cache_size"],
+         ("membership",): membership_cache.stats()["size"],
+     }, ("cache",)),
+]:
+    metrics.REGISTRY.register(metrics.CallbackGauge(name, documentation, callback, labelnames))
+
 @app.on_event("startup")
 async def startup_event():
     """
-    Initialize database tables on startup.
+    Create or verify the database schema (see DB_SCHEMA_MODE), then warm up
+    pools and caches in the background; /api/v1/ready reports when done.
     """
-    Base.metadata.create_all(bind=engine)
+    await prepare_schema(async_engine)
+    # Push committed chat messages to participants who are offline
+    message_batcher.add_listener(chat_push_fanout.enqueue)
+    # Senders read chat history from the primary until replicas have their messages
+    message_batcher.add_listener(lambda batch: read_router.mark_writes(m.sender_id for m in batch))
+    read_router.start(settings.DB_REPLICA_HEALTH_INTERVAL, settings.DB_REPLICA_HEALTH_TIMEOUT)
+    readiness.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stop reporting ready, then flush chat messages and notifications that
+    are still queued.
+    """
+    await readiness.stop()
+    await message_batcher.stop()
+    await chat_push_fanout.stop()
+    await presence.stop()
+    await notification_service.stop()
+    await read_router.stop()
+    await close_redis()
 
 @app.get("/")
 def root():
@@ -52,4 +143,11 @@ def root():
     """
     return {"message": "Welcome to CampusConnect API", "environment": settings.ENVIRONMENT}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint for this process.
+    """
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
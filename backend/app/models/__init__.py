@@ -1,3 +1,4 @@
 from .user import User
 from .event import Event, EventParticipant, ParticipantStatus
 from .chat import ChatMessage
+from .tombstone import Tombstone
@@ -1,10 +1,17 @@
 from datetime import datetime
-from sqlalchemy import Integer, String, ForeignKey, DateTime
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
 
 class ChatMessage(Base):
+    __table_args__ = (
+        # Delta sync scans changes in (updated_at, id) order
+        Index("ix_chatmessage_updated_at_id", "updated_at", "id"),
+        # History pages walk one room backwards by id (ids follow created_at)
+        Index("ix_chatmessage_event_id_id", "event_id", "id"),
+    )
+
     # Base class columns
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,6 +1,6 @@
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy import Integer, String, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import DDL, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint, Enum as SQLEnum, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -12,6 +12,16 @@ class ParticipantStatus(str, enum.Enum):
     NOT_GOING = "not_going"
 
 class Event(Base):
+    # Composite indexes backing keyset pagination on (start_time, id),
+    # optionally narrowed by location or creator
+    __table_args__ = (
+        Index("ix_event_start_time_id", "start_time", "id"),
+        Index("ix_event_location_start_time_id", "location", "start_time", "id"),
+        Index("ix_event_creator_start_time_id", "creator_id", "start_time", "id"),
+        # Delta sync scans changes in (updated_at, id) order
+        Index("ix_event_updated_at_id", "updated_at", "id"),
+    )
+
     # Base class columns
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -24,6 +34,8 @@ class Event(Base):
     end_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     location: Mapped[str] = mapped_column(String, nullable=False)
     capacity: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # None means unlimited
+    # Maintained by join/leave so the capacity check never needs a COUNT
+    participant_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     
     creator_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=False)
     
@@ -32,7 +44,60 @@ class Event(Base):
     participants: Mapped[List["EventParticipant"]] = relationship("EventParticipant", back_populates="event", cascade="all, delete-orphan")
     messages: Mapped[List["ChatMessage"]] = relationship("ChatMessage", back_populates="event", cascade="all, delete-orphan")
 
+# Full-text search over title, location and description (see services/search.py).
+# Postgres: a generated, weighted tsvector column with a GIN index.
+_PG_SEARCH_DDL = [
+    """
+    ALTER TABLE event ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_event_search_vector ON event USING GIN (search_vector)",
+]
+# SQLite: an external-content FTS5 table kept in sync by triggers
+_SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE event_fts USING fts5(
+        title, location, description, content='event', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER event_fts_ai AFTER INSERT ON event BEGIN
+        INSERT INTO event_fts(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER event_fts_ad AFTER DELETE ON event BEGIN
+        INSERT INTO event_fts(event_fts, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER event_fts_au AFTER UPDATE OF title, location, description ON event BEGIN
+        INSERT INTO event_fts(event_fts, rowid, title, location, description)
+        VALUES ('delete', old.id, old.title, old.location, old.description);
+        INSERT INTO event_fts(rowid, title, location, description)
+        VALUES (new.id, new.title, new.location, new.description);
+    END
+    """,
+]
+
+for _statement in _PG_SEARCH_DDL:
+    event.listen(Event.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in _SQLITE_SEARCH_DDL:
+    event.listen(Event.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Event.__table__, "before_drop", DDL("DROP TABLE IF EXISTS event_fts").execute_if(dialect="sqlite"))
+
 class EventParticipant(Base):
+    __table_args__ = (
+        UniqueConstraint("event_id", "user_id", name="uq_eventparticipant_event_user"),
+        # Delta sync of one user's participations in (updated_at, id) order
+        Index("ix_eventparticipant_user_updated_at_id", "user_id", "updated_at", "id"),
+    )
+
     # Base class columns
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
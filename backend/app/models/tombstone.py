@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+class Tombstone(Base):
+    """
+    Record of a deleted row so delta sync (GET /sync) can tell clients to
+    drop it. entity is the sync stream name: 'event' or 'participation'.
+    """
+    __table_args__ = (
+        Index("ix_tombstone_deleted_at_id", "deleted_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    entity: Mapped[str] = mapped_column(String, nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Only this user is told about the deletion; None means everyone
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
@@ -1,4 +1,5 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
-from .event import Event, EventCreate, EventUpdate, EventParticipant, EventParticipantCreate
-from .chat import ChatMessage, ChatMessageCreate, ChatMessageUpdate
+from .event import Event, EventPage, EventCreate, EventUpdate, EventParticipant, EventParticipantCreate
+from .chat import ChatMessage, ChatMessageCreate, ChatMessageUpdate, ChatHistoryMessage, ChatHistoryPage
 from .token import Token, TokenPayload
+from .sync import SyncResponse, SyncTombstone
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -25,3 +25,12 @@ class ChatMessageInDBBase(ChatMessageBase):
 
 class ChatMessage(ChatMessageInDBBase):
     pass
+
+# History entry with the sender's display name (full name, else a placeholder)
+class ChatHistoryMessage(ChatMessage):
+    sender_name: str
+
+# One page of history, newest first; pass next_before_id to load older messages
+class ChatHistoryPage(BaseModel):
+    items: List[ChatHistoryMessage]
+    next_before_id: Optional[int] = None
@@ -25,6 +25,7 @@ class EventUpdate(EventBase):
 class EventInDBBase(EventBase):
     id: int
     creator_id: int
+    participant_count: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -37,6 +38,11 @@ class Event(EventInDBBase):
 class EventInDB(EventInDBBase):
     pass
 
+# Keyset-paginated list of events
+class EventPage(BaseModel):
+    items: List[Event]
+    next_cursor: Optional[str] = None
+
 # Participant Schemas
 class ParticipantStatus(str, Enum):
     GOING = "going"
@@ -0,0 +1,23 @@
+from typing import List
+from pydantic import BaseModel
+from datetime import datetime
+
+from .event import Event, EventParticipant
+from .chat import ChatMessage
+
+class SyncTombstone(BaseModel):
+    entity: str
+    entity_id: int
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Changes since a sync token; repeat with next_token while has_more is true
+class SyncResponse(BaseModel):
+    events: List[Event]
+    participations: List[EventParticipant]
+    messages: List[ChatMessage]
+    tombstones: List[SyncTombstone]
+    next_token: str
+    has_more: bool
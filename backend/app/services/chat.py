@@ -1,13 +1,247 @@
-from sqlalchemy.orm import Session
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
 
-def save_message(db: Session, user_id: int, event_id: int, content: str) -> models.ChatMessage:
+# Queue sentinel that tells the flush loop to drain and exit
+_STOP = object()
+
+async def save_message(db: AsyncSession, user_id: int, event_id: int, content: str) -> models.ChatMessage:
     message = models.ChatMessage(
         content=content,
         sender_id=user_id,
         event_id=event_id
     )
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    # id and created_at are populated by the INSERT; no refresh round trip needed
+    await db.commit()
     return message
+
+
+class SavedMessage(NamedTuple):
+    """Persisted chat message as returned by ChatMessageBatcher."""
+    id: int
+    sender_id: int
+    event_id: int
+    content: str
+    created_at: datetime
+
+
+def message_payload(message) -> Dict[str, Any]:
+    """WebSocket frame body for a persisted message (SavedMessage or a row with the same fields)"""
+    return {
+        "id": message.id,
+        "content": message.content,
+        "sender_id": message.sender_id,
+        "event_id": message.event_id,
+        "created_at": str(message.created_at),
+    }
+
+
+async def load_message_frames(
+    event_id: int,
+    after_id: Optional[int],
+    limit: int,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+) -> List[Tuple[int, str]]:
+    """
+    The newest `limit` messages of an event with id > after_id, oldest
+    first, as (id, frame) pairs identical to what publish_message sends.
+    """
+    query = select(
+        models.ChatMessage.id, models.ChatMessage.content, models.ChatMessage.sender_id,
+        models.ChatMessage.event_id, models.ChatMessage.created_at,
+    ).where(models.ChatMessage.event_id == event_id)
+    if after_id is not None:
+        query = query.where(models.ChatMessage.id > after_id)
+    async with session_factory() as db:
+        rows = (await db.execute(query.order_by(models.ChatMessage.id.desc()).limit(limit))).all()
+    return [(row.id, json.dumps(message_payload(row))) for row in reversed(rows)]
+
+
+class ChatMessageBatcher:
+    """
+    Write-behind persistence for chat messages.
+
+    Messages submitted from every socket are collected into one queue and
+    written as a single multi-row INSERT ... RETURNING per batch. A batch is
+    flushed when it reaches max_batch_size messages or max_delay seconds after
+    its first message arrived. Futures are resolved in submission order, so
+    senders wake up (and publish) in the order their ids were assigned.
+
+    A batch rejected because of its data (say, a message for an event that
+    was just deleted) is split in half and each half retried, until only
+    the offending messages fail; other errors fail the whole batch. At most
+    max_queue messages wait for a flush; further senders wait for room.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: Optional[int] = None,
+        max_delay: Optional[float] = None,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        max_queue: Optional[int] = None,
+    ):
+        self.max_batch_size = max_batch_size or settings.CHAT_BATCH_MAX_SIZE
+        self.max_delay = max_delay if max_delay is not None else settings.CHAT_BATCH_MAX_DELAY_MS / 1000
+        self.max_queue = max_queue or settings.CHAT_BATCH_MAX_QUEUE
+        self.session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.batches = 0
+        self.persisted = 0
+        # Called with each committed batch; must not block
+        self._listeners: List[Callable[[List[SavedMessage]], None]] = []
+
+    def add_listener(self, listener: Callable[[List[SavedMessage]], None]):
+        """Register a callback that receives every committed batch"""
+        self._listeners.append(listener)
+
+    def _ensure_started(self):
+        """Start the flush loop on the running event loop if not already done"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._batch_full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, user_id: int, event_id: int, content: str) -> SavedMessage:
+        """
+        Queue a message for persistence and wait until its batch is committed.
+        Waits for room first if max_queue messages are already queued.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        now = datetime.utcnow()
+        row = {
+            "content": content,
+            "sender_id": user_id,
+            "event_id": event_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self._queue.put((row, future))
+        if self._queue.qsize() >= self.max_batch_size - 1:
+            self._batch_full.set()
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        """Wait for the first message, then gather more until size or time limit"""
+        batch = []
+        item = await self._queue.get()
+        if item is _STOP:
+            self._stopping = True
+            return batch
+        batch.append(item)
+
+        # Give the batch max_delay to fill up unless it is already full
+        if self._queue.qsize() < self.max_batch_size - 1:
+            self._batch_full.clear()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is _STOP:
+                self._stopping = True
+                break
+            batch.append(item)
+        return batch
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> List[int]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                insert(models.ChatMessage).returning(
+                    models.ChatMessage.id, sort_by_parameter_order=True
+                ),
+                rows,
+            )
+            ids = result.scalars().all()
+            await db.commit()
+        return ids
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        rows = [row for row, _ in batch]
+        try:
+            ids = await self._insert(rows)
+        except (IntegrityError, DataError) as e:
+            if len(batch) > 1:
+                # Some row is bad; halves are flushed in order, so ids stay in submission order
+                logger.warning(f"Batch of {len(batch)} chat messages rejected, retrying in halves: {e}")
+                middle = len(batch) // 2
+                await self._flush(batch[:middle])
+                await self._flush(batch[middle:])
+                return
+            logger.error(f"Failed to persist chat message: {e}")
+            self._fail(batch, e)
+            return
+        except Exception as e:
+            logger.error(f"Failed to persist batch of {len(batch)} chat messages: {e}")
+            self._fail(batch, e)
+            return
+
+        saved = [
+            SavedMessage(
+                id=message_id,
+                sender_id=row["sender_id"],
+                event_id=row["event_id"],
+                content=row["content"],
+                created_at=row["created_at"],
+            )
+            for row, message_id in zip(rows, ids)
+        ]
+        self.batches += 1
+        self.persisted += len(saved)
+        for (_, future), message in zip(batch, saved):
+            if not future.done():
+                future.set_result(message)
+        for listener in self._listeners:
+            try:
+                listener(saved)
+            except Exception as e:
+                logger.error(f"Chat batch listener failed: {e}")
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Dict[str, Any], asyncio.Future]], error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run(self):
+        self._stopping = False
+        while not self._stopping:
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def stop(self):
+        """Flush everything already queued, then stop the flush loop"""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(_STOP)
+        self._batch_full.set()
+        await self._task
+        self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "persisted": self.persisted,
+        }
+
+
+message_batcher = ChatMessageBatcher()
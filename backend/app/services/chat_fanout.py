@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.chat import SavedMessage
+from app.services.notification.service import NotificationService, notification_service
+from app.services.serialization import UNNAMED_SENDER
+from app.websocket.presence import Presence, presence
+
+logger = logging.getLogger(__name__)
+
+
+class _Digest:
+    """Messages waiting to be pushed to one user for one event."""
+    __slots__ = ("event_title", "count", "sender_id", "preview", "first_seen")
+
+    def __init__(self, event_title: str, first_seen: float):
+        self.event_title = event_title
+        self.count = 0
+        self.sender_id = 0
+        self.preview = ""
+        self.first_seen = first_seen
+
+
+class ChatPushFanout:
+    """
+    Pushes new chat messages to event members who are not connected.
+
+    Fed with committed batches by the chat message batcher, so no work
+    happens on the WebSocket receive loop. Each drained batch resolves its
+    recipients (the creator and participants of each event) with one
+    set-based query; the sender and users with the chat open on any node
+    (per the shared Presence store) are skipped. Messages are folded into one digest per (user, event), sent
+    after CHAT_PUSH_DIGEST_WINDOW_SECONDS, and each user gets at most one
+    push per CHAT_PUSH_MIN_INTERVAL_SECONDS across all events.
+    """
+
+    def __init__(
+        self,
+        presence: Presence = presence,
+        notifications: NotificationService = notification_service,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ):
+        self.presence = presence
+        self.notifications = notifications
+        self.session_factory = session_factory
+        self.window = settings.CHAT_PUSH_DIGEST_WINDOW_SECONDS
+        self.min_interval = settings.CHAT_PUSH_MIN_INTERVAL_SECONDS
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Dict[Tuple[int, int], _Digest] = {}
+        self._last_push: Dict[int, float] = {}
+        self.counters: Dict[str, int] = {
+            "messages_in": 0, "messages_dropped": 0, "batches": 0, "recipient_queries": 0,
+            "recipients_offline": 0, "digests_sent": 0, "messages_digested": 0,
+        }
+        self.resolve_seconds = 0.0
+
+    def _ensure_started(self):
+        if not self._tasks or all(t.done() for t in self._tasks):
+            self._queue = asyncio.Queue(maxsize=settings.CHAT_PUSH_QUEUE_SIZE)
+            self._tasks = [
+                asyncio.create_task(self._resolve_loop()),
+                asyncio.create_task(self._flush_loop()),
+            ]
+
+    def enqueue(self, messages: List[SavedMessage]):
+        """Batcher listener: hand over a committed batch without blocking"""
+        self._ensure_started()
+        for message in messages:
+            try:
+                self._queue.put_nowait(message)
+                self.counters["messages_in"] += 1
+            except asyncio.QueueFull:
+                self.counters["messages_dropped"] += 1
+
+    async def _resolve_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            start = time.perf_counter()
+            try:
+                await self._resolve(batch)
+            except Exception as e:
+                logger.error(f"Chat push fan-out failed for {len(batch)} messages: {e}")
+            self.resolve_seconds += time.perf_counter() - start
+
+    async def _resolve(self, batch: List[SavedMessage]):
+        self.counters["batches"] += 1
+        by_event: Dict[int, List[SavedMessage]] = defaultdict(list)
+        for message in batch:
+            by_event[message.event_id].append(message)
+
+        # One query for the creator and every participant of every event in the batch
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(models.Event.id, models.Event.title, models.Event.creator_id, models.EventParticipant.user_id)
+                .outerjoin(models.EventParticipant, models.EventParticipant.event_id == models.Event.id)
+                .where(models.Event.id.in_(list(by_event)))
+            )).all()
+        self.counters["recipient_queries"] += 1
+
+        titles: Dict[int, str] = {}
+        recipients: Dict[int, Set[int]] = defaultdict(set)
+        for event_id, title, creator_id, user_id in rows:
+            titles[event_id] = title
+            recipients[event_id].add(creator_id)
+            if user_id is not None:
+                recipients[event_id].add(user_id)
+
+        online = await self.presence.online_users(recipients)
+        now = time.monotonic()
+        for event_id, messages in by_event.items():
+            if event_id not in titles:
+                continue
+            title = titles[event_id]
+            sent_by = Counter(m.sender_id for m in messages)
+            last = messages[-1]
+            for user_id in recipients[event_id]:
+                # Senders do not get pushed their own messages
+                count = len(messages) - sent_by.get(user_id, 0)
+                if count == 0 or user_id in online[event_id]:
+                    continue
+                latest = last
+                if latest.sender_id == user_id:
+                    latest = next(m for m in reversed(messages) if m.sender_id != user_id)
+                key = (user_id, event_id)
+                digest = self._pending.get(key)
+                if digest is None:
+                    digest = self._pending[key] = _Digest(title, now)
+                    self.counters["recipients_offline"] += 1
+                digest.count += count
+                digest.sender_id = latest.sender_id
+                digest.preview = latest.content[:settings.CHAT_PUSH_PREVIEW_LENGTH]
+
+    def _due(self, user_id: int, digest: _Digest) -> float:
+        last = self._last_push.get(user_id)
+        due = digest.first_seen + self.window
+        return due if last is None else max(due, last + self.min_interval)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(min(1.0, self.window) or 0.1)
+            try:
+                await self.flush_due()
+            except Exception as e:
+                logger.error(f"Chat push digest flush failed: {e}")
+
+    async def flush_due(self, now: Optional[float] = None):
+        """Send every digest whose window and per-user rate limit have passed"""
+        now = time.monotonic() if now is None else now
+        due = [
+            (key, digest) for key, digest in self._pending.items()
+            if self._due(key[0], digest) <= now
+        ]
+        if not due:
+            return
+        sender_names = await self._sender_names({d.sender_id for _, d in due if d.count == 1})
+        online = await self.presence.online_users({event_id for (_, event_id), _ in due})
+        pushed: Set[int] = set()
+        for (user_id, event_id), digest in due:
+            if user_id in pushed:
+                # One push per user per flush; the rest wait for the next interval
+                continue
+            del self._pending[(user_id, event_id)]
+            if user_id in online[event_id]:
+                # Came back to the chat and has seen the messages
+                continue
+            pushed.add(user_id)
+            self._last_push[user_id] = now
+            self.counters["digests_sent"] += 1
+            self.counters["messages_digested"] += digest.count
+            if digest.count == 1:
+                await self.notifications.send_new_message(
+                    user_id, sender_names.get(digest.sender_id, UNNAMED_SENDER), digest.event_title, digest.preview
+                )
+            else:
+                await self.notifications.send_message_digest(user_id, digest.event_title, digest.count)
+        self._forget_idle_users(now)
+
+    def _forget_idle_users(self, now: float):
+        if len(self._last_push) > settings.CHAT_PUSH_QUEUE_SIZE:
+            cutoff = now - self.min_interval
+            self._last_push = {u: t for u, t in self._last_push.items() if t > cutoff}
+
+    async def _sender_names(self, sender_ids: Set[int]) -> Dict[int, str]:
+        if not sender_ids:
+            return {}
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(models.User.id, models.User.full_name)
+                .where(models.User.id.in_(sender_ids))
+            )).all()
+        # Recipients see the sender's name, never their email
+        return {user_id: full_name or UNNAMED_SENDER for user_id, full_name in rows}
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self.counters,
+            "pending_digests": len(self._pending),
+            "queued_messages": self._queue.qsize() if self._queue is not None else 0,
+            "resolve_seconds_total": round(self.resolve_seconds, 6),
+        }
+
+
+chat_push_fanout = ChatPushFanout()
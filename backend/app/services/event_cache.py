@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# (etag, serialized JSON body)
+CachedBody = Tuple[str, bytes]
+
+LISTS_VERSION_KEY = "events:gen"
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix is ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class MemoryCacheBackend:
+    """Per-process backend; other workers see changes once entries expire."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize, ttl)
+        # Versions are tiny and must never be evicted, or stale entries could resurface
+        self.versions: Dict[str, int] = {}
+
+    async def warm_up(self):
+        pass
+
+    async def get(self, key: str) -> Optional[CachedBody]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: CachedBody):
+        self.entries.set(key, value)
+
+    async def version(self, key: str) -> int:
+        return self.versions.get(key, 0)
+
+    async def bump(self, key: str):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+
+class RedisCacheBackend:
+    """Shared backend so an invalidation on one worker applies to all of them."""
+
+    def __init__(self, ttl: float):
+        self.ttl = int(ttl)
+
+    async def warm_up(self):
+        await get_redis().ping()
+
+    async def get(self, key: str) -> Optional[CachedBody]:
+        raw = await get_redis().get(key)
+        if raw is None:
+            return None
+        etag, _, body = raw.partition(b"\n")
+        return etag.decode(), body
+
+    async def set(self, key: str, value: CachedBody):
+        etag, body = value
+        await get_redis().set(key, etag.encode() + b"\n" + body, ex=self.ttl)
+
+    async def version(self, key: str) -> int:
+        return int(await get_redis().get(key) or 0)
+
+    async def bump(self, key: str):
+        await get_redis().incr(key)
+
+
+class EventCache:
+    """
+    Serialized event responses keyed by a version that every write bumps.
+
+    Readers look up the version before loading from the database, so a write
+    that lands mid-load leaves the reader's entry under an old key that is
+    never read again. Single events have their own version; every list
+    response shares LISTS_VERSION_KEY. Backend errors degrade to cache misses.
+
+    A body read from a replica is only stored once its version has been
+    current for DB_REPLICA_MAX_LAG_SECONDS; before that the replica may not
+    have the write that bumped it yet.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        # version key -> (version, monotonic time this process first saw it)
+        self._first_seen = TTLCache(settings.EVENT_CACHE_SIZE, settings.EVENT_CACHE_TTL_SECONDS)
+
+    async def _version(self, key: str) -> Optional[int]:
+        try:
+            version = await self.backend.version(key)
+        except Exception as e:
+            logger.warning(f"Event cache unavailable: {e}")
+            return None
+        seen = self._first_seen.get(key)
+        if seen is None or seen[0] != version:
+            self._first_seen.set(key, (version, time.monotonic()))
+        return version
+
+    def _settled(self, key: str) -> bool:
+        """Whether the version in a cache key is older than the replica lag bound"""
+        version_key = LISTS_VERSION_KEY if key.startswith("events:") else key.rsplit(":", 1)[0] + ":v"
+        seen = self._first_seen.get(version_key)
+        return seen is not None and time.monotonic() - seen[1] >= settings.DB_REPLICA_MAX_LAG_SECONDS
+
+    async def event_key(self, event_id: int) -> Optional[str]:
+        version = await self._version(f"event:{event_id}:v")
+        return None if version is None else f"event:{event_id}:{version}"
+
+    async def list_key(self, name: str, params: Dict[str, Any]) -> Optional[str]:
+        version = await self._version(LISTS_VERSION_KEY)
+        if version is None:
+            return None
+        raw = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha256(raw.encode()).hexdigest()[:32]
+        return f"events:{name}:{version}:{digest}"
+
+    async def get(self, key: Optional[str]) -> Optional[CachedBody]:
+        if key is None:
+            return None
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Event cache unavailable: {e}")
+            return None
+
+    async def set(self, key: Optional[str], body: bytes, from_replica: bool = False) -> CachedBody:
+        value = (make_etag(body), body)
+        if key is not None and (not from_replica or self._settled(key)):
+            try:
+                await self.backend.set(key, value)
+            except Exception as e:
+                logger.warning(f"Event cache unavailable: {e}")
+        return value
+
+    async def warm_up(self):
+        """Open the backend's connection ahead of the first request"""
+        await self.backend.warm_up()
+
+    async def _bump(self, key: str):
+        try:
+            await self.backend.bump(key)
+        except Exception as e:
+            logger.error(f"Event cache invalidation failed for {key}: {e}")
+
+    async def invalidate_event(self, event_id: int):
+        """An event changed: drop its own entry and every list"""
+        await self._bump(f"event:{event_id}:v")
+        await self._bump(LISTS_VERSION_KEY)
+
+    async def invalidate_lists(self):
+        """A new event exists: only list responses are affected"""
+        await self._bump(LISTS_VERSION_KEY)
+
+    @staticmethod
+    def respond(request: Request, cached: CachedBody) -> Response:
+        """200 with the cached body, or 304 if the client already has it"""
+        etag, body = cached
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _make_backend():
+    if settings.EVENT_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.EVENT_CACHE_TTL_SECONDS)
+    return MemoryCacheBackend(settings.EVENT_CACHE_SIZE, settings.EVENT_CACHE_TTL_SECONDS)
+
+
+event_cache = EventCache(_make_backend())
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Dict, Tuple
+
+from sqlalchemy import exists, select
+
+from app import models
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+
+class MembershipCache:
+    """
+    Caches whether a user may use an event's chat: its creator or one of
+    its participants. Shared by every WebSocket handshake, so a reconnect
+    storm costs one query per (user, event) rather than one per socket.
+
+    join_event and leave_event invalidate the entry on this process; other
+    workers pick the change up within MEMBERSHIP_CACHE_TTL_SECONDS, or
+    MEMBERSHIP_NEGATIVE_TTL_SECONDS for users who were refused.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float, session_factory=AsyncSessionLocal):
+        self.entries = TTLCache(maxsize, ttl)
+        self.negative_ttl = negative_ttl
+        self.session_factory = session_factory
+        # Bumped by every invalidation; a load that raced one is not cached
+        self._generation = 0
+        # In-flight lookups, shared by concurrent handshakes for the same key
+        self._loading: Dict[Tuple[int, int], asyncio.Task] = {}
+
+    async def is_member(self, user_id: int, event_id: int) -> bool:
+        key = (user_id, event_id)
+        allowed = self.entries.get(key)
+        if allowed is not None:
+            return allowed
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.create_task(self._load(key))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Tuple[int, int]) -> bool:
+        user_id, event_id = key
+        generation = self._generation
+        try:
+            async with self.session_factory() as db:
+                row = (await db.execute(
+                    select(
+                        models.Event.creator_id == user_id,
+                        exists().where(
+                            models.EventParticipant.event_id == event_id,
+                            models.EventParticipant.user_id == user_id,
+                        ),
+                    ).where(models.Event.id == event_id)
+                )).first()
+            allowed = row is not None and any(row)
+            if generation == self._generation:
+                self.entries.set(key, allowed, ttl=None if allowed else self.negative_ttl)
+            return allowed
+        finally:
+            if self._loading.get(key) is asyncio.current_task():
+                del self._loading[key]
+
+    def invalidate(self, user_id: int, event_id: int):
+        self._generation += 1
+        self.entries.pop((user_id, event_id))
+        # Later handshakes must not join a lookup that started before the change
+        self._loading.pop((user_id, event_id), None)
+
+    def clear(self):
+        """Drop everything, e.g. when an event and all its participants are deleted"""
+        self._generation += 1
+        self.entries.clear()
+        self._loading.clear()
+
+    def stats(self) -> Dict[str, int]:
+        entries = self.entries.stats()
+        return {
+            "size": entries["size"],
+            "hits": entries["hits"],
+            "misses": entries["misses"],
+            "loading": len(self._loading),
+        }
+
+
+membership_cache = MembershipCache(
+    settings.MEMBERSHIP_CACHE_SIZE,
+    settings.MEMBERSHIP_CACHE_TTL_SECONDS,
+    settings.MEMBERSHIP_NEGATIVE_TTL_SECONDS,
+)
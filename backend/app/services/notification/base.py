@@ -1,5 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional
+
+class Notification(NamedTuple):
+    user_id: int
+    title: str
+    body: str
+    data: Optional[Dict[str, Any]] = None
 
 class BaseNotificationProvider(ABC):
     @abstractmethod
@@ -8,3 +14,16 @@ class BaseNotificationProvider(ABC):
         Send a notification to a specific user.
         """
         pass
+
+    async def send_batch(self, notifications: List[Notification]) -> List[bool]:
+        """
+        Send many notifications in one call; returns a success flag per item.
+        Providers with a bulk API should override this; the default sends one by one.
+        """
+        results = []
+        for n in notifications:
+            try:
+                results.append(await self.send_notification(n.user_id, n.title, n.body, n.data))
+            except Exception:
+                results.append(False)
+        return results
@@ -1,10 +1,42 @@
+import asyncio
 import logging
-from typing import Dict, Any
-from .base import BaseNotificationProvider
+import random
+from typing import Dict, Any, List
+from .base import BaseNotificationProvider, Notification
 
 logger = logging.getLogger(__name__)
 
 class MockNotificationProvider(BaseNotificationProvider):
+    """
+    Logs notifications instead of sending them. latency (seconds per call)
+    and failure_rate (0..1 per notification) simulate a real push service
+    for benchmarking the delivery pipeline.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def _fails(self) -> bool:
+        return self.failure_rate > 0 and random.random() < self.failure_rate
+
     async def send_notification(self, user_id: int, title: str, body: str, data: Dict[str, Any] = None) -> bool:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._fails():
+            return False
         logger.info(f"PUSH NOTIFICATION [Mock] -> User {user_id}: {title} - {body} | Data: {data}")
         return True
+
+    async def send_batch(self, notifications: List[Notification]) -> List[bool]:
+        # One simulated round trip for the whole batch, like a bulk push API
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        results = []
+        for n in notifications:
+            if self._fails():
+                results.append(False)
+                continue
+            logger.info(f"PUSH NOTIFICATION [Mock] -> User {n.user_id}: {n.title} - {n.body} | Data: {n.data}")
+            results.append(True)
+        return results
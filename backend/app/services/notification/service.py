@@ -1,17 +1,131 @@
 import asyncio
-from typing import Dict, Any, List
-from .base import BaseNotificationProvider
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.cache import TTLCache
+from app.core.config import settings
+from .base import BaseNotificationProvider, Notification
 from .mock_provider import MockNotificationProvider
 
+logger = logging.getLogger(__name__)
+
 # Facade service to handle notifications
 class NotificationService:
-    def __init__(self):
-        self.provider: BaseNotificationProvider = MockNotificationProvider()
+    """
+    Queued, batched delivery in front of a BaseNotificationProvider.
+
+    send_to_user only enqueues onto a bounded queue and never blocks the
+    caller; when the queue is full the notification is dropped and counted.
+    A pool of workers drains the queue in batches via provider.send_batch,
+    retrying failures with exponential backoff. Identical notifications for
+    the same user within NOTIFICATION_COALESCE_SECONDS are sent once.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[BaseNotificationProvider] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.provider: BaseNotificationProvider = provider or MockNotificationProvider(
+            latency=settings.NOTIFICATION_MOCK_LATENCY_MS / 1000,
+            failure_rate=settings.NOTIFICATION_MOCK_FAILURE_RATE,
+        )
+        self.workers = workers or settings.NOTIFICATION_WORKERS
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.queue_size = queue_size or settings.NOTIFICATION_QUEUE_SIZE
+        self.max_retries = settings.NOTIFICATION_MAX_RETRIES
+        self.retry_backoff = settings.NOTIFICATION_RETRY_BACKOFF_SECONDS
+        self._recent = TTLCache(self.queue_size, settings.NOTIFICATION_COALESCE_SECONDS)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.counters: Dict[str, int] = {
+            "enqueued": 0, "sent": 0, "failed": 0, "retried": 0, "coalesced": 0, "dropped": 0,
+        }
+
+    def _ensure_started(self):
+        """Start the worker pool on the running event loop if not already done"""
+        if not self._tasks or all(t.done() for t in self._tasks):
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _offer(self, item: Tuple[Notification, int]) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            logger.warning(f"Notification queue full, dropping notification for user {item[0].user_id}")
+            return False
 
     async def send_to_user(self, user_id: int, title: str, body: str, data: Dict[str, Any] = None):
-        # In a real app, this would push to a queue (Celery/BullMQ)
-        # For this demo, we run it as an asyncio task
-        asyncio.create_task(self.provider.send_notification(user_id, title, body, data))
+        self._ensure_started()
+        key = (user_id, title, body)
+        if self._recent.get(key) is not None:
+            self.counters["coalesced"] += 1
+            return
+        self._recent.set(key, True)
+        if self._offer((Notification(user_id, title, body, data), 0)):
+            self.counters["enqueued"] += 1
+
+    def _requeue(self, notification: Notification, attempt: int):
+        self._offer((notification, attempt))
+        # Mark the previous attempt done only now, so drain() waits for retries
+        self._queue.task_done()
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                results = await self.provider.send_batch([n for n, _ in batch])
+            except Exception as e:
+                logger.error(f"Notification provider failed for batch of {len(batch)}: {e}")
+                results = [False] * len(batch)
+
+            for (notification, attempt), ok in zip(batch, results):
+                if ok:
+                    self.counters["sent"] += 1
+                elif attempt < self.max_retries:
+                    self.counters["retried"] += 1
+                    delay = self.retry_backoff * (2 ** attempt)
+                    loop.call_later(delay, self._requeue, notification, attempt + 1)
+                    continue
+                else:
+                    self.counters["failed"] += 1
+                    logger.warning(f"Giving up on notification for user {notification.user_id}")
+                self._queue.task_done()
+
+    async def drain(self):
+        """Wait until every queued notification, including retries, is settled"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self, timeout: float = 5.0):
+        """Give queued notifications a chance to go out, then stop the workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping with {self._queue.qsize()} notifications undelivered")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.counters,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "workers": self.workers,
+        }
 
     async def send_event_joined(self, user_id: int, event_title: str):
         await self.send_to_user(
@@ -22,7 +136,6 @@ class NotificationService:
         )
 
     async def send_new_message(self, user_id: int, sender_name: str, event_title: str, message_preview: str):
-        # Logic to not notify if user is active in chat would go here
         await self.send_to_user(
             user_id,
             f"New message in {event_title}",
@@ -30,4 +143,12 @@ class NotificationService:
             {"type": "chat_message"}
         )
 
+    async def send_message_digest(self, user_id: int, event_title: str, message_count: int):
+        await self.send_to_user(
+            user_id,
+            f"New messages in {event_title}",
+            f"{message_count} new messages in {event_title}",
+            {"type": "chat_digest", "count": message_count}
+        )
+
 notification_service = NotificationService()
@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple, Type, Union
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last row on a page into an opaque cursor.
+    Datetimes are stored as ISO strings and restored by decode_cursor.
+    """
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(
+    cursor: str, size: int, types: Optional[Sequence[Union[Type, Tuple[Type, ...]]]] = None,
+) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed, has the wrong arity or,
+    when types is given, a value that is not an instance of its type.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError("Invalid cursor")
+        values = [
+            datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v
+            for v in payload
+        ]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    if types is not None:
+        for value, expected in zip(values, types):
+            # JSON true/false decode to bool, which isinstance treats as int
+            if isinstance(value, bool) or not isinstance(value, expected):
+                raise ValueError("Invalid cursor")
+    return values
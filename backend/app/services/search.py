@@ -0,0 +1,58 @@
+import re
+from typing import List
+
+from sqlalchemy import Select, column, func, literal_column, or_, table
+
+from app import models
+from app.services.serialization import select_event_rows
+
+# Longer queries are truncated; each term is a prefix match
+MAX_SEARCH_TERMS = 8
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# SQLite FTS5 index maintained by triggers declared with the Event model
+_event_fts = table("event_fts", column("rowid"))
+# bm25 column weights in FTS5 column order: title, location, description
+_FTS_RANK = literal_column("bm25(event_fts, 10.0, 4.0, 1.0)")
+
+
+def search_terms(q: str) -> List[str]:
+    """Split a user query into lowercase word terms, dropping punctuation and operators"""
+    return _TERM.findall(q.lower())[:MAX_SEARCH_TERMS]
+
+
+def event_search_query(terms: List[str], dialect: str) -> Select:
+    """
+    Select schemas.Event rows matching every term as a word prefix, most
+    relevant first (title matches outrank location, then description).
+    Ties are broken by (start_time, id) so pagination is stable.
+    """
+    query = select_event_rows()
+    tiebreak = (models.Event.start_time, models.Event.id)
+
+    if dialect == "postgresql":
+        # Terms are \\w+ only, so they cannot inject tsquery operators
+        tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        vector = literal_column("event.search_vector")
+        return query.where(vector.op("@@")(tsquery)).order_by(
+            func.ts_rank_cd(vector, tsquery).desc(), *tiebreak
+        )
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (
+            query.join(_event_fts, _event_fts.c.rowid == models.Event.id)
+            .where(literal_column("event_fts").op("MATCH")(match))
+            .order_by(_FTS_RANK, *tiebreak)
+        )
+
+    # Other backends: unindexed substring match, no ranking
+    for term in terms:
+        pattern = f"%{term}%"
+        query = query.where(or_(
+            models.Event.title.ilike(pattern),
+            models.Event.location.ilike(pattern),
+            models.Event.description.ilike(pattern),
+        ))
+    return query.order_by(*tiebreak)
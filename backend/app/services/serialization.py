@@ -0,0 +1,55 @@
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import orjson
+from sqlalchemy import Select, func, select
+
+from app import models, schemas
+
+# Response fields in schema order, so the JSON matches what
+# schemas.Event would produce byte for byte
+EVENT_FIELDS: Tuple[str, ...] = tuple(schemas.Event.model_fields)
+# Matching Core columns; every schemas.Event field is a column on Event
+EVENT_COLUMNS = tuple(getattr(models.Event, field) for field in EVENT_FIELDS)
+
+
+def select_event_rows() -> Select:
+    """
+    Core select of exactly the columns schemas.Event exposes. Rows come back
+    as plain tuples: no ORM identity map, no instance state.
+    """
+    return select(*EVENT_COLUMNS)
+
+
+def event_rows_to_dicts(rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    return [dict(zip(EVENT_FIELDS, row)) for row in rows]
+
+
+# Same for chat history: message columns plus the sender's display name
+MESSAGE_FIELDS: Tuple[str, ...] = tuple(schemas.ChatHistoryMessage.model_fields)
+# Shown for senders without a full name; emails are never exposed to other users
+UNNAMED_SENDER = "Someone"
+
+
+def select_message_rows() -> Select:
+    """
+    Core select of schemas.ChatHistoryMessage rows, joining the sender so
+    names load in the same query instead of one lazy load per message.
+    """
+    columns = [
+        func.coalesce(models.User.full_name, UNNAMED_SENDER) if field == "sender_name"
+        else getattr(models.ChatMessage, field)
+        for field in MESSAGE_FIELDS
+    ]
+    return select(*columns).join(models.User, models.User.id == models.ChatMessage.sender_id)
+
+
+def message_rows_to_dicts(rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    return [dict(zip(MESSAGE_FIELDS, row)) for row in rows]
+
+
+def dumps(value: Any) -> bytes:
+    """
+    JSON-encode plain Python data with orjson. Datetimes come out the same
+    as with pydantic (ISO 8601, UTC as Z).
+    """
+    return orjson.dumps(value, option=orjson.OPT_UTC_Z)
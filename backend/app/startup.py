@@ -0,0 +1,141 @@
+"""
+Worker readiness.
+
+A worker answers /api/v1/status as soon as it is up (liveness), but only
+reports ready on /api/v1/ready once warm_up has opened its database pools,
+connected to Redis and imported the modules that are loaded lazily, so the
+first requests it gets from the load balancer do not pay for any of that.
+It stops being ready when shutdown begins, so traffic drains before the
+process exits.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core import security
+from app.core.config import settings
+from app.core.rate_limit import rate_limiter
+from app.db.replicas import read_router
+from app.db.session import async_engine
+from app.services.event_cache import event_cache
+from app.websocket.manager import manager
+
+logger = logging.getLogger(__name__)
+
+# Imported on first use by the request path; loaded here instead
+LAZY_MODULES = ("jose.jwt", "argon2", "redis.asyncio")
+
+# Seconds between attempts at a required step that failed
+RETRY_SECONDS = 1.0
+
+
+async def open_pool(engine: AsyncEngine, connections: int):
+    """Open this many pool connections at once and check each one"""
+    opened = await asyncio.gather(*(engine.connect() for _ in range(connections)), return_exceptions=True)
+    conns = [c for c in opened if not isinstance(c, BaseException)]
+    try:
+        for result in opened:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(c.execute(text("SELECT 1")) for c in conns))
+    finally:
+        # Closing returns them to the pool, where they stay open
+        await asyncio.gather(*(c.close() for c in conns), return_exceptions=True)
+
+
+def _import_lazy_modules():
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+    security.get_password_hasher()
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        # Step name -> {"ok": bool, "ms": float, "error": str}
+        self.steps: Dict[str, Dict] = {}
+        self.started_at: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Run warm_up in the background; call from the startup handler"""
+        self.started_at = time.monotonic()
+        self._task = asyncio.create_task(self.warm_up())
+
+    async def stop(self):
+        """Report not ready from now on; call first thing on shutdown"""
+        self.ready = False
+        self.draining = True
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _step(self, name: str, run: Callable[[], Awaitable], required: bool):
+        """
+        Run one warm-up step with a timeout. Required steps are retried
+        until they pass; optional ones are recorded and skipped, since the
+        components they warm degrade on their own (see rate_limit, event_cache).
+        """
+        while True:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(run(), settings.STARTUP_WARMUP_TIMEOUT)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                self.steps[name] = {"ok": False, "ms": round((time.perf_counter() - start) * 1000, 1), "error": error}
+                logger.warning(f"Startup step {name} failed: {error}")
+                if not required:
+                    return
+                await asyncio.sleep(RETRY_SECONDS)
+                continue
+            self.steps[name] = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 1)}
+            return
+
+    def _steps(self) -> List[Awaitable]:
+        loop = asyncio.get_running_loop()
+        connections = max(1, min(settings.STARTUP_DB_CONNECTIONS, settings.DB_POOL_SIZE))
+
+        async def replica_pool(replica):
+            try:
+                await open_pool(replica.engine, connections)
+            except Exception as e:
+                read_router.mark_down(replica, e)
+                raise
+
+        steps = [
+            self._step("imports", lambda: loop.run_in_executor(None, _import_lazy_modules), required=True),
+            self._step("database", lambda: open_pool(async_engine, connections), required=True),
+            self._step("redis", manager.warm_up, required=False),
+            self._step("rate_limit", rate_limiter.warm_up, required=False),
+            self._step("event_cache", event_cache.warm_up, required=False),
+        ]
+        steps += [
+            self._step(f"replica:{replica.name}", lambda replica=replica: replica_pool(replica), required=False)
+            for replica in read_router.replicas
+        ]
+        return steps
+
+    async def warm_up(self):
+        await asyncio.gather(*self._steps())
+        if not self.draining:
+            self.ready = True
+            self.ready_after = time.monotonic() - self.started_at
+            logger.info(f"Worker ready after {self.ready_after * 1000:.0f} ms")
+
+    def state(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "warmup_ms": None if self.ready_after is None else round(self.ready_after * 1000, 1),
+            "steps": self.steps,
+        }
+
+
+readiness = Readiness()
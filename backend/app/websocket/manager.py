@@ -1,98 +1,400 @@
 import asyncio
 import json
 import logging
-from typing import List, Dict
-import redis.asyncio as redis
+import time
+from typing import Callable, List, Dict, Optional, Sequence, Set
 from fastapi import WebSocket
 
 from app.core.config import settings
+from app.core.metrics import chat_messages_sent_total, chat_replays_total
+from app.core.redis_client import RedisPublisher, get_redis
+from app.services.chat import load_message_frames
+from app.websocket.registry import Connection, ConnectionRegistry
+from app.websocket.replay import ReplayBuffer
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
+CHANNEL_PREFIX = "chat:"
+# Close code sent to clients that cannot keep up with their room
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+class ConnectionWriter:
+    """
+    Bounded outbound queue for one socket, drained by its own task so a slow
+    client only ever delays itself.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int, backlog: Sequence[str] = ()):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        # Replayed frames are sent first and do not count against max_queue
+        self.backlog = list(backlog)
+        self.task = asyncio.create_task(self._drain())
+
+    def enqueue(self, frame: str) -> bool:
+        """Queue an already-serialized frame; False if the queue is full"""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _drain(self):
+        for frame in self.backlog:
+            try:
+                await self.websocket.send_text(frame)
+            except Exception as e:
+                logger.error(f"Error sending message to client: {e}")
+                return
+        self.backlog = []
+        while True:
+            frame = await self.queue.get()
+            try:
+                await self.websocket.send_text(frame)
+            except Exception as e:
+                logger.error(f"Error sending message to client: {e}")
+                return
+
+    async def close(self, code: Optional[int] = None):
+        """Stop the writer and, if a code is given, close the socket with it"""
+        self.task.cancel()
+        if code is not None:
+            try:
+                await asyncio.wait_for(self.websocket.close(code=code), settings.WS_CLOSE_TIMEOUT)
+            except Exception:
+                pass
+
 class ConnectionManager:
     def __init__(self):
-        # Map event_id -> List[WebSocket]
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-        # Redis connection - will be initialized on first use
+        # Open sockets on this process, indexed by socket, room and user
+        self.connections = ConnectionRegistry()
+        # Shared Redis client (see core.redis_client) - looked up on first use
         self.redis = None
+        # Chat publishes, pipelined when many arrive together
+        self.publisher = RedisPublisher()
         self.pubsub = None
         self._redis_initialized = False
+        # Channels this process is subscribed to on the shared pubsub connection
+        self._subscribed: Set[str] = set()
+        # asyncio primitives are created on first use, inside the running loop
+        self._subscription_lock: Optional[asyncio.Lock] = None
+        self._has_subscriptions: Optional[asyncio.Event] = None
+        # Single dispatcher task reading the shared pubsub for this process
+        self._dispatcher_task: Optional[asyncio.Task] = None
+        # Recent frames per room for replay to reconnecting clients
+        self.replay = ReplayBuffer(settings.WS_REPLAY_BUFFER_SIZE, settings.WS_REPLAY_MAX_BYTES)
+        self.replay_loader = load_message_frames
+        # Rooms kept subscribed without local sockets -> monotonic expiry, so
+        # their replay buffer stays gap-free while clients reconnect
+        self._retained: Dict[str, float] = {}
+        self._next_sweep = 0.0
+        # In-flight database loads of a room's tail, shared by concurrent reconnects
+        self._seeding: Dict[str, asyncio.Task] = {}
+        # Rooms with sockets still replaying in connect() -> how many; they are
+        # kept subscribed and buffered although no socket is registered yet
+        self._connecting: Dict[str, int] = {}
+        # Slow-consumer drops in progress; held here so they are not
+        # garbage-collected before they finish
+        self._dropping: Set[asyncio.Task] = set()
+        # Called with (event_id, user_id, online) when a user's first socket in
+        # a room opens on this process or their last one closes; must not block
+        self._presence_listeners: List[Callable[[int, int, bool], None]] = []
 
     async def _ensure_redis(self):
         """Initialize Redis connection if not already done"""
         if not self._redis_initialized:
-            self.redis = await redis.from_url(settings.REDIS_URL, decode_responses=True)
+            self.redis = get_redis()
             self.pubsub = self.redis.pubsub()
+            self._subscription_lock = asyncio.Lock()
+            self._has_subscriptions = asyncio.Event()
             self._redis_initialized = True
 
-    async def connect(self, websocket: WebSocket, event_id: int):
+    def add_presence_listener(self, listener: Callable[[int, int, bool], None]):
+        """Register a callback for users coming online or going offline in a room"""
+        self._presence_listeners.append(listener)
+
+    def _presence_changed(self, event_key: str, user_id: Optional[int], online: bool):
+        if user_id is None:
+            return
+        for listener in self._presence_listeners:
+            try:
+                listener(int(event_key), user_id, online)
+            except Exception as e:
+                logger.error(f"Presence listener failed: {e}")
+
+    async def warm_up(self):
+        """Connect to Redis before the first socket needs it"""
+        await self._ensure_redis()
+        await self.redis.ping()
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        event_id: int,
+        user_id: Optional[int] = None,
+        last_seen_id: Optional[int] = None,
+    ):
+        """
+        Accept a socket and join it to the event's room. With last_seen_id,
+        every newer message is queued to the socket before it starts
+        receiving live broadcasts, with no gap or duplicate in between. If
+        more messages were missed than WS_REPLAY_MAX_MESSAGES, only the
+        newest are replayed, after a {"type": "replay_truncated",
+        "before_id": ...} frame telling the client to page the rest from
+        the history endpoint.
+        """
         await self._ensure_redis()
         await websocket.accept()
         event_key = str(event_id)
-        if event_key not in self.active_connections:
-            self.active_connections[event_key] = []
-            # Start subscribing to Redis channel for this event if first connection
+        # Until the socket is registered, neither the idle sweep nor another
+        # socket leaving may unsubscribe the room or drop its buffer
+        self._connecting[event_key] = self._connecting.get(event_key, 0) + 1
+        try:
+            # Subscribe before reading the backlog so nothing published meanwhile is lost
+            self._retained.setdefault(event_key, time.monotonic() + settings.WS_REPLAY_IDLE_SECONDS)
             await self.subscribe_to_channel(event_key)
-            
-        self.active_connections[event_key].append(websocket)
-        logger.info(f"WebSocket connected to event {event_id}. Total connections: {len(self.active_connections[event_key])}")
+            frames: List[str] = []
+            if last_seen_id is not None:
+                try:
+                    frames = await self._replay_frames(event_key, event_id, last_seen_id)
+                except Exception as e:
+                    logger.error(f"Replay for event {event_id} failed: {e}")
+        finally:
+            self._connecting[event_key] -= 1
+            if not self._connecting[event_key]:
+                del self._connecting[event_key]
+        # No awaits from the replay above to here: the socket sees live frames from now on
+        self._retained.pop(event_key, None)
+        writer = ConnectionWriter(websocket, settings.WS_SEND_QUEUE_SIZE, frames)
+        first = user_id is not None and not self.connections.is_user_in_room(event_key, user_id)
+        self.connections.add(Connection(websocket, event_key, user_id, writer))
+        if first:
+            self._presence_changed(event_key, user_id, True)
+        logger.info(f"WebSocket connected to event {event_id}. Total connections: {self.connections.room_count(event_key)}")
 
-    def disconnect(self, websocket: WebSocket, event_id: int):
-        event_key = str(event_id)
-        if event_key in self.active_connections:
-            if websocket in self.active_connections[event_key]:
-                self.active_connections[event_key].remove(websocket)
-            
-            if not self.active_connections[event_key]:
-                del self.active_connections[event_key]
-                # In a real app, we might unsubscribe from Redis here if no one is listening locally
+    async def disconnect(self, websocket: WebSocket, event_id: int):
+        connection = self.connections.remove(websocket)
+        if connection is None:
+            return
+        await connection.writer.close()
+        event_key = connection.room
+        if connection.user_id is not None and not self.connections.is_user_in_room(event_key, connection.user_id):
+            self._presence_changed(event_key, connection.user_id, False)
+        if not self.connections.has_room(event_key) and event_key not in self._connecting:
+            if settings.WS_REPLAY_IDLE_SECONDS > 0:
+                # Keep buffering for a while in case clients come straight back
+                self._retained[event_key] = time.monotonic() + settings.WS_REPLAY_IDLE_SECONDS
+            else:
+                self.replay.drop(event_key)
+                await self.unsubscribe_from_channel(event_key)
         logger.info(f"WebSocket disconnected from event {event_id}")
 
+    async def _replay_frames(self, event_key: str, event_id: int, last_seen_id: int) -> List[str]:
+        frames = self.replay.frames_after(event_key, last_seen_id)
+        if frames is not None:
+            chat_replays_total.inc("memory")
+            return frames
+        if not self.replay.is_seeded(event_key):
+            # Cold room: load its tail once, however many clients reconnect at the same time
+            task = self._seeding.get(event_key)
+            if task is None:
+                task = self._seeding[event_key] = asyncio.create_task(self._seed_room(event_key, event_id))
+            await asyncio.shield(task)
+            frames = self.replay.frames_after(event_key, last_seen_id)
+            if frames is not None:
+                chat_replays_total.inc("seeded")
+                return frames
+        # Away for longer than the buffer covers
+        chat_replays_total.inc("database")
+        limit = settings.WS_REPLAY_MAX_MESSAGES
+        # One extra row tells whether anything older than the replay was missed
+        rows = await self.replay_loader(event_id, last_seen_id, limit + 1)
+        frames = []
+        if len(rows) > limit:
+            rows = rows[1:]
+            frames.append(json.dumps({"type": "replay_truncated", "before_id": rows[0][0]}))
+        newest = rows[-1][0] if rows else last_seen_id
+        return frames + [frame for _, frame in rows] + self.replay.entries_after(event_key, newest)
+
+    async def _seed_room(self, event_key: str, event_id: int):
+        try:
+            limit = settings.WS_REPLAY_BUFFER_SIZE
+            rows = await self.replay_loader(event_id, None, limit)
+            self.replay.seed(event_key, rows, complete=len(rows) < limit)
+        finally:
+            self._seeding.pop(event_key, None)
+
+    async def _expire_idle_rooms(self):
+        """Unsubscribe rooms whose retention ran out and drop their buffers"""
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 1.0
+        expired = [
+            k for k, expires in self._retained.items()
+            if expires <= now and not self.connections.has_room(k) and k not in self._connecting
+        ]
+        for event_key in expired:
+            del self._retained[event_key]
+            self.replay.drop(event_key)
+            await self.unsubscribe_from_channel(event_key)
+
+    def online_users(self, event_id: int) -> Set[int]:
+        """Users with at least one socket open to this event on this process"""
+        return self.connections.room_users(str(event_id))
+
+    def is_online(self, event_id: int, user_id: int) -> bool:
+        return self.connections.is_user_in_room(str(event_id), user_id)
+
+    def send_personal(self, websocket: WebSocket, frame: str) -> bool:
+        """Queue a frame for one socket only; False if it is gone or its queue is full"""
+        connection = self.connections.get(websocket)
+        return connection is not None and connection.writer.enqueue(frame)
+
     async def broadcast_to_local(self, event_id: int, message: str):
         """
         Send a message to all locally connected clients for this event.
+        Only enqueues the frame on each socket's writer; clients whose queue
+        is full are disconnected with SLOW_CONSUMER_CLOSE_CODE.
         """
         event_key = str(event_id)
-        if event_key in self.active_connections:
-            for connection in self.active_connections[event_key]:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error sending message to client: {e}")
+        overflowed = []
+        sent = 0
+        for connection in self.connections.room(event_key):
+            if connection.writer.enqueue(message):
+                sent += 1
+            else:
+                overflowed.append(connection.websocket)
+        if sent:
+            chat_messages_sent_total.inc(amount=sent)
+        for connection in overflowed:
+            logger.warning(f"Disconnecting slow client from event {event_id}: send queue full")
+            task = asyncio.create_task(self._drop_slow_consumer(connection, event_id))
+            self._dropping.add(task)
+            task.add_done_callback(self._dropped)
+
+    def _dropped(self, task: asyncio.Task):
+        self._dropping.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to disconnect slow client: {task.exception()}")
+
+    async def _drop_slow_consumer(self, websocket: WebSocket, event_id: int):
+        connection = self.connections.get(websocket)
+        await self.disconnect(websocket, event_id)
+        if connection is not None:
+            await connection.writer.close(code=SLOW_CONSUMER_CLOSE_CODE)
 
     async def publish_message(self, event_id: int, message: dict):
         """
         Publish message to Redis so other instances can pick it up.
+        Messages sent together share one pipeline round trip.
+        """
+        await self.publisher.publish(f"{CHANNEL_PREFIX}{event_id}", json.dumps(message))
+
+    async def _sync_subscription(self, event_key: str):
+        """
+        Bring the Redis subscription for a room in line with its local sockets.
+        Serialized so that a quick leave/join cannot leave a room unsubscribed.
         """
         await self._ensure_redis()
-        channel = f"chat:{event_id}"
-        await self.redis.publish(channel, json.dumps(message))
+        channel = f"{CHANNEL_PREFIX}{event_key}"
+        async with self._subscription_lock:
+            wanted = (
+                self.connections.has_room(event_key)
+                or event_key in self._retained
+                or event_key in self._connecting
+            )
+            if wanted and channel not in self._subscribed:
+                await self.pubsub.subscribe(channel)
+                self._subscribed.add(channel)
+            elif not wanted and channel in self._subscribed:
+                self._subscribed.discard(channel)
+                await self.pubsub.unsubscribe(channel)
+            if self._subscribed:
+                self._has_subscriptions.set()
+            else:
+                self._has_subscriptions.clear()
 
     async def subscribe_to_channel(self, event_id: str):
         """
-        Subscribe to Redis channel and listen for messages in background.
+        Subscribe to the Redis channel for an event and make sure the
+        process-wide dispatcher is running.
         """
-        await self._ensure_redis()
-        channel = f"chat:{event_id}"
-        await self.pubsub.subscribe(channel)
-        
-        # We need a background task to listen to this channel
-        asyncio.create_task(self.redis_listener(channel, event_id))
+        await self._sync_subscription(event_id)
+        if self._dispatcher_task is None or self._dispatcher_task.done():
+            self._dispatcher_task = asyncio.create_task(self.redis_dispatcher())
 
-    async def redis_listener(self, channel: str, event_id: str):
+    async def unsubscribe_from_channel(self, event_id: str):
         """
-        Listen to Redis channel and broadcast to local clients.
+        Drop the Redis subscription for an event with no local sockets left.
         """
-        await self._ensure_redis()
-        logger.info(f"Started Redis listener for {channel}")
-        try:
-            async for message in self.pubsub.listen():
-                if message["type"] == "message":
-                    content = message["data"]
-                    # Broadcast to local websocket connections
-                    await self.broadcast_to_local(int(event_id), content)
-        except Exception as e:
-            logger.error(f"Error in Redis listener for {channel}: {e}")
+        await self._sync_subscription(event_id)
+
+    async def _resubscribe(self):
+        """Replace the pubsub connection and restore every subscription"""
+        async with self._subscription_lock:
+            # Messages published while disconnected never reached the buffers
+            self.replay.clear()
+            try:
+                await self.pubsub.aclose()
+            except Exception:
+                pass
+            self.pubsub = self.redis.pubsub()
+            if self._subscribed:
+                await self.pubsub.subscribe(*self._subscribed)
+
+    async def redis_dispatcher(self):
+        """
+        Read the shared pubsub connection and route each message by channel
+        name to the matching local sockets. Reconnects with exponential
+        backoff if Redis drops.
+        """
+        logger.info("Started Redis dispatcher")
+        backoff = settings.REDIS_RECONNECT_MIN_DELAY
+        while True:
+            try:
+                await self._has_subscriptions.wait()
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                backoff = settings.REDIS_RECONNECT_MIN_DELAY
+                await self._expire_idle_rooms()
+                if message is None or message["type"] != "message":
+                    continue
+                # The shared client returns bytes
+                channel = message["channel"].decode()
+                if not channel.startswith(CHANNEL_PREFIX):
+                    continue
+                event_key = channel[len(CHANNEL_PREFIX):]
+                data = message["data"].decode()
+                try:
+                    self.replay.append(event_key, json.loads(data)["id"], data)
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Unbuffered message on {channel}: no message id")
+                await self.broadcast_to_local(int(event_key), data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis dispatcher error, reconnecting in {backoff:.1f}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, settings.REDIS_RECONNECT_MAX_DELAY)
+                try:
+                    await self._resubscribe()
+                except Exception as e:
+                    logger.error(f"Redis resubscribe failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Gauges describing the dispatcher's current cost.
+        """
+        registry = self.connections.stats()
+        return {
+            "subscribed_channels": len(self._subscribed),
+            "local_rooms": registry["rooms"],
+            "local_connections": registry["connections"],
+            "local_users": registry["users"],
+            "queued_messages": sum(c.writer.queue.qsize() for c in self.connections),
+            "retained_rooms": sum(1 for k in self._retained if not self.connections.has_room(k)),
+            **self.replay.stats(),
+        }
 
 manager = ConnectionManager()
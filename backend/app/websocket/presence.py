@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.websocket.manager import ConnectionManager, manager
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "presence:"
+
+
+class Presence:
+    """
+    Which users have a chat socket open to an event on any node.
+
+    Each node keeps its own (event, user) pairs in Redis sorted sets named
+    presence:<event_id>, as members "<node>:<user_id>" scored with the time
+    they expire. Joins and leaves reported by the ConnectionManager are
+    written straight away by a background task, and another refreshes every
+    pair this node holds each ttl / 3 seconds, so the entries of a node that
+    died disappear after ttl. Lookups always include this node's own
+    sockets and fall back to them alone while Redis is unreachable.
+    """
+
+    def __init__(
+        self,
+        connections: ConnectionManager = manager,
+        client_factory: Callable = get_redis,
+        ttl: Optional[float] = None,
+    ):
+        self.connections = connections
+        self.client_factory = client_factory
+        self.ttl = ttl or settings.PRESENCE_TTL_SECONDS
+        self.node = uuid.uuid4().hex[:12]
+        # (event_id, user_id) -> online, waiting to be written
+        self._changes: Dict[Tuple[int, int], bool] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        connections.add_presence_listener(self._changed)
+
+    def _changed(self, event_id: int, user_id: int, online: bool):
+        self._changes[(event_id, user_id)] = online
+        self._ensure_started()
+        self._wake.set()
+
+    def _ensure_started(self):
+        if not self._tasks or all(t.done() for t in self._tasks):
+            self._wake = asyncio.Event()
+            self._tasks = [
+                asyncio.create_task(self._write_loop()),
+                asyncio.create_task(self._refresh_loop()),
+            ]
+
+    async def _write_loop(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            changes, self._changes = self._changes, {}
+            try:
+                await self._write(changes)
+            except Exception as e:
+                logger.warning(f"Presence update failed: {e}")
+                # Newer changes win; retry the rest after a pause
+                for key, online in changes.items():
+                    self._changes.setdefault(key, online)
+                self._wake.set()
+                await asyncio.sleep(1.0)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                await self._refresh()
+            except Exception as e:
+                logger.warning(f"Presence refresh failed: {e}")
+
+    def _member(self, user_id: int) -> str:
+        return f"{self.node}:{user_id}"
+
+    async def _write(self, changes: Dict[Tuple[int, int], bool]):
+        expires = time.time() + self.ttl
+        async with self.client_factory().pipeline(transaction=False) as pipe:
+            for (event_id, user_id), online in changes.items():
+                key = f"{KEY_PREFIX}{event_id}"
+                if online:
+                    pipe.zadd(key, {self._member(user_id): expires})
+                    pipe.expire(key, int(self.ttl) + 1)
+                else:
+                    pipe.zrem(key, self._member(user_id))
+            await pipe.execute()
+
+    async def _refresh(self):
+        """Extend every pair this node holds and prune expired ones"""
+        now = time.time()
+        async with self.client_factory().pipeline(transaction=False) as pipe:
+            for room in list(self.connections.connections.rooms()):
+                key = f"{KEY_PREFIX}{room}"
+                users = self.connections.connections.room_users(room)
+                if users:
+                    pipe.zadd(key, {self._member(user_id): now + self.ttl for user_id in users})
+                    pipe.expire(key, int(self.ttl) + 1)
+                pipe.zremrangebyscore(key, "-inf", now)
+            await pipe.execute()
+
+    async def online_users(self, event_ids: Iterable[int]) -> Dict[int, Set[int]]:
+        """Users online in each event on any node; one round trip for all events"""
+        event_ids = list(event_ids)
+        online = {event_id: set(self.connections.online_users(event_id)) for event_id in event_ids}
+        if not event_ids:
+            return online
+        try:
+            now = time.time()
+            async with self.client_factory().pipeline(transaction=False) as pipe:
+                for event_id in event_ids:
+                    pipe.zrangebyscore(f"{KEY_PREFIX}{event_id}", now, "+inf")
+                results = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Presence unavailable, using this node's sockets only: {e}")
+            return online
+        for event_id, members in zip(event_ids, results):
+            for member in members:
+                if isinstance(member, bytes):
+                    member = member.decode()
+                online[event_id].add(int(member.rsplit(":", 1)[1]))
+        return online
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+presence = Presence()
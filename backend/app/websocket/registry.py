@@ -0,0 +1,124 @@
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+
+class Connection:
+    """One open socket: which room it is in, who it belongs to, and its writer"""
+
+    __slots__ = ("websocket", "room", "user_id", "writer", "connected_at")
+
+    def __init__(self, websocket: Any, room: str, user_id: Optional[int] = None, writer: Any = None):
+        self.websocket = websocket
+        self.room = room
+        self.user_id = user_id
+        self.writer = writer
+        self.connected_at = time.monotonic()
+
+
+class ConnectionRegistry:
+    """
+    Open sockets indexed by socket, by room and by user. Adding and removing
+    a connection is O(1) however large its room is, and per-room and
+    per-user counts are a len() on an index. A user only has a handful of
+    sockets, so the per-user index is a list: much smaller than a set and
+    just as fast to update at that size. Not thread-safe; intended for use
+    from the event loop.
+    """
+
+    def __init__(self):
+        self._by_socket: Dict[Any, Connection] = {}
+        self._rooms: Dict[str, Set[Connection]] = {}
+        self._users: Dict[int, List[Connection]] = {}
+        # Sockets per user per room, so presence checks do not scan the room
+        self._room_users: Dict[str, Dict[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_socket)
+
+    def __contains__(self, websocket: Any) -> bool:
+        return websocket in self._by_socket
+
+    def add(self, connection: Connection):
+        self._by_socket[connection.websocket] = connection
+        self._rooms.setdefault(connection.room, set()).add(connection)
+        user_id = connection.user_id
+        if user_id is not None:
+            self._users.setdefault(user_id, []).append(connection)
+            room_users = self._room_users.setdefault(connection.room, {})
+            room_users[user_id] = room_users.get(user_id, 0) + 1
+
+    def remove(self, websocket: Any) -> Optional[Connection]:
+        """Unregister a socket; returns its record, or None if it was not registered"""
+        connection = self._by_socket.pop(websocket, None)
+        if connection is None:
+            return None
+        room = self._rooms[connection.room]
+        room.discard(connection)
+        if not room:
+            del self._rooms[connection.room]
+        user_id = connection.user_id
+        if user_id is not None:
+            user = self._users[user_id]
+            user.remove(connection)
+            if not user:
+                del self._users[user_id]
+            room_users = self._room_users[connection.room]
+            room_users[user_id] -= 1
+            if room_users[user_id] <= 0:
+                del room_users[user_id]
+                if not room_users:
+                    del self._room_users[connection.room]
+        return connection
+
+    def get(self, websocket: Any) -> Optional[Connection]:
+        return self._by_socket.get(websocket)
+
+    def room(self, room: str) -> Iterable[Connection]:
+        return self._rooms.get(room, ())
+
+    def user(self, user_id: int) -> Iterable[Connection]:
+        return self._users.get(user_id, ())
+
+    def rooms(self) -> Iterator[str]:
+        return iter(self._rooms)
+
+    def has_room(self, room: str) -> bool:
+        return room in self._rooms
+
+    def room_count(self, room: str) -> int:
+        return len(self._rooms.get(room, ()))
+
+    def user_count(self, user_id: int) -> int:
+        return len(self._users.get(user_id, ()))
+
+    def room_users(self, room: str) -> Set[int]:
+        """Users with at least one socket in the room"""
+        return set(self._room_users.get(room, ()))
+
+    def is_user_in_room(self, room: str, user_id: int) -> bool:
+        return user_id in self._room_users.get(room, ())
+
+    def __iter__(self) -> Iterator[Connection]:
+        return iter(self._by_socket.values())
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate bytes held by the registry itself: the records and the
+        index containers, not the sockets or writers they point to.
+        """
+        size = sys.getsizeof(self._by_socket) + sys.getsizeof(self._rooms)
+        size += sys.getsizeof(self._users) + sys.getsizeof(self._room_users)
+        if self._by_socket:
+            size += len(self._by_socket) * sys.getsizeof(next(iter(self._by_socket.values())))
+        size += sum(sys.getsizeof(s) for s in self._rooms.values())
+        size += sum(sys.getsizeof(s) for s in self._users.values())
+        size += sum(sys.getsizeof(d) for d in self._room_users.values())
+        return size
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": len(self._by_socket),
+            "rooms": len(self._rooms),
+            "users": len(self._users),
+        }
@@ -0,0 +1,122 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+# (message id, serialized frame)
+Entry = Tuple[int, str]
+
+
+class _Room:
+    __slots__ = ("entries", "nbytes", "complete", "seeded")
+
+    def __init__(self):
+        self.entries: Deque[Entry] = deque()
+        self.nbytes = 0
+        # True when entries hold the room's entire history
+        self.complete = False
+        # True once the room's tail was loaded from the database
+        self.seeded = False
+
+
+class ReplayBuffer:
+    """
+    Recent chat frames per event, for replaying the gap to reconnecting
+    clients without a database round trip.
+
+    A room only receives frames while this process is subscribed to its
+    channel, so its entries are gap-free from the oldest one onward: a
+    client whose last_seen_id is at least that id can be served from
+    memory. Each room keeps at most per_room frames; when the total frame
+    size exceeds max_bytes, the least recently active rooms are dropped.
+    Not thread-safe; intended for use from the event loop.
+    """
+
+    def __init__(self, per_room: int, max_bytes: int):
+        self.per_room = per_room
+        self.max_bytes = max_bytes
+        self.rooms: "OrderedDict[str, _Room]" = OrderedDict()
+        self.nbytes = 0
+
+    def _room(self, key: str) -> _Room:
+        room = self.rooms.get(key)
+        if room is None:
+            room = self.rooms[key] = _Room()
+        else:
+            self.rooms.move_to_end(key)
+        return room
+
+    def append(self, key: str, message_id: int, frame: str):
+        room = self._room(key)
+        entries = room.entries
+        # Frames from other processes can arrive slightly out of id order
+        i = len(entries)
+        while i > 0 and entries[i - 1][0] > message_id:
+            i -= 1
+        if i > 0 and entries[i - 1][0] == message_id:
+            return
+        entries.insert(i, (message_id, frame))
+        room.nbytes += len(frame)
+        self.nbytes += len(frame)
+        self._trim(room)
+        self._enforce_cap()
+
+    def seed(self, key: str, entries: Iterable[Entry], complete: bool):
+        """Merge the room's tail loaded from the database with live entries"""
+        room = self._room(key)
+        merged = dict(entries)
+        merged.update(room.entries)
+        self.nbytes -= room.nbytes
+        room.entries = deque(sorted(merged.items()))
+        room.nbytes = sum(len(frame) for _, frame in room.entries)
+        self.nbytes += room.nbytes
+        room.complete = complete
+        room.seeded = True
+        self._trim(room)
+        self._enforce_cap()
+
+    def _trim(self, room: _Room):
+        while len(room.entries) > self.per_room:
+            _, frame = room.entries.popleft()
+            room.nbytes -= len(frame)
+            self.nbytes -= len(frame)
+            room.complete = False
+
+    def _enforce_cap(self):
+        while self.nbytes > self.max_bytes and self.rooms:
+            _, room = self.rooms.popitem(last=False)
+            self.nbytes -= room.nbytes
+
+    def is_seeded(self, key: str) -> bool:
+        room = self.rooms.get(key)
+        return room is not None and room.seeded
+
+    def frames_after(self, key: str, last_seen_id: int) -> Optional[List[str]]:
+        """Frames newer than last_seen_id, or None if the buffer cannot prove it has them all"""
+        room = self.rooms.get(key)
+        if room is None:
+            return None
+        if not room.complete and (not room.entries or last_seen_id < room.entries[0][0]):
+            return None
+        return [frame for message_id, frame in room.entries if message_id > last_seen_id]
+
+    def entries_after(self, key: str, after_id: int) -> List[str]:
+        """Whatever buffered frames are newer than after_id, without a coverage check"""
+        room = self.rooms.get(key)
+        if room is None:
+            return []
+        return [frame for message_id, frame in room.entries if message_id > after_id]
+
+    def drop(self, key: str):
+        room = self.rooms.pop(key, None)
+        if room is not None:
+            self.nbytes -= room.nbytes
+
+    def clear(self):
+        self.rooms.clear()
+        self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "replay_rooms": len(self.rooms),
+            "replay_messages": sum(len(r.entries) for r in self.rooms.values()),
+            "replay_bytes": self.nbytes,
+        }
@@ -0,0 +1,108 @@
+"""
+Backward scroll through a large chat room via GET /events/{id}/messages.
+
+Seeds one event with --messages chat messages from a handful of senders,
+then follows next_before_id from the newest page to the oldest and reports
+latency for the first, middle and last tenth of the pages. With the
+(event_id, id) index every page is one short range scan, so the three
+should be about equal.
+
+Usage (from backend/):
+    python -m benchmarks.chat_history --messages 100000 --limit 50
+
+Uses a throwaway SQLite file unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_history.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+import httpx
+from sqlalchemy import insert
+
+from app import models
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.base_class import Base
+from app.db.session import AsyncSessionLocal, async_engine
+from app.main import app
+
+
+async def _setup(messages: int, senders: int):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        users = [models.User(email=f"user{i}@example.com", full_name=f"User {i}", hashed_password="x") for i in range(senders)]
+        db.add_all(users)
+        await db.flush()
+        now = datetime.utcnow()
+        rooms = [
+            models.Event(
+                title=f"Room {i}", location="Online", creator_id=users[0].id,
+                start_time=now, end_time=now + timedelta(hours=1),
+            )
+            for i in range(2)
+        ]
+        db.add_all(rooms)
+        await db.flush()
+        start = now - timedelta(seconds=messages)
+        # Interleave a second room so the target room's rows are not contiguous
+        for offset in range(0, messages, 10000):
+            await db.execute(insert(models.ChatMessage), [
+                {
+                    "content": f"message {i}", "sender_id": users[i % senders].id,
+                    "event_id": rooms[i % 2].id,
+                    "created_at": start + timedelta(seconds=i), "updated_at": start + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + 10000, messages))
+            ])
+        await db.commit()
+        return users[0].id, rooms[0].id
+
+
+async def main(messages: int, limit: int, senders: int):
+    print(f"seeding {messages} messages...")
+    user_id, event_id = await _setup(messages, senders)
+    url = f"{settings.API_V1_STR}/events/{event_id}/messages"
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    latencies = []
+    received = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        before_id = None
+        while True:
+            params = {"limit": limit, **({"before_id": before_id} if before_id else {})}
+            start = time.perf_counter()
+            response = await client.get(url, params=params, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            page = response.json()
+            received += len(page["items"])
+            before_id = page["next_before_id"]
+            if before_id is None:
+                break
+    await async_engine.dispose()
+
+    tenth = max(1, len(latencies) // 10)
+    print(f"{received} messages in {len(latencies)} pages of {limit}")
+    for name, chunk in (
+        ("newest pages", latencies[:tenth]),
+        ("middle pages", latencies[len(latencies) // 2 - tenth // 2:][:tenth]),
+        ("oldest pages", latencies[-tenth:]),
+    ):
+        print(f"{name:<13} p50 {statistics.median(chunk):6.2f} ms   max {max(chunk):6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--senders", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.limit, args.senders))
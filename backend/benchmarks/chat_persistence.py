@@ -0,0 +1,84 @@
+"""
+Chat persistence throughput: per-message commit vs. write-behind batching.
+
+Simulates N concurrent sockets, each sending M messages back to back, and
+reports messages/sec for both paths.
+
+Usage (from backend/):
+    python -m benchmarks.chat_persistence --senders 50 --messages 100
+
+Uses a throwaway SQLite file unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Tuple
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_chat.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from app import models
+from app.db.base_class import Base
+from app.db.session import AsyncSessionLocal, async_engine
+from app.services.chat import ChatMessageBatcher, save_message
+
+
+async def _setup() -> Tuple[int, int]:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        user = models.User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        event = models.Event(
+            title="Bench", location="Hall", creator_id=user.id,
+            start_time=datetime.utcnow(), end_time=datetime.utcnow() + timedelta(hours=1),
+        )
+        db.add(event)
+        await db.commit()
+        return user.id, event.id
+
+
+async def _run_senders(send, senders: int, messages: int) -> float:
+    async def sender(n: int):
+        for i in range(messages):
+            await send(f"sender {n} message {i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender(n) for n in range(senders)))
+    return time.perf_counter() - start
+
+
+async def main(senders: int, messages: int, batch_size: int, delay_ms: float):
+    user_id, event_id = await _setup()
+    total = senders * messages
+
+    async def per_message(content: str):
+        async with AsyncSessionLocal() as db:
+            await save_message(db, user_id, event_id, content)
+
+    batcher = ChatMessageBatcher(max_batch_size=batch_size, max_delay=delay_ms / 1000)
+
+    async def batched(content: str):
+        await batcher.submit(user_id, event_id, content)
+
+    elapsed = await _run_senders(per_message, senders, messages)
+    print(f"per-message commit: {total / elapsed:10.0f} msg/s ({elapsed:.2f}s)")
+    elapsed = await _run_senders(batched, senders, messages)
+    await batcher.stop()
+    print(f"write-behind batch: {total / elapsed:10.0f} msg/s ({elapsed:.2f}s)")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--senders", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.senders, args.messages, args.batch_size, args.delay_ms))
@@ -0,0 +1,56 @@
+"""
+Compare two benchmark result files written by benchmarks.suite --json.
+
+Usage (from backend/):
+    python -m benchmarks.compare before.json after.json [--threshold 10]
+
+Prints throughput and p95/p99 changes per benchmark and flags any that got
+worse by more than --threshold percent. Exits 1 if something regressed.
+"""
+import argparse
+import json
+from typing import Optional
+
+
+def _change(old: float, new: float) -> Optional[float]:
+    if not old:
+        return None
+    return (new - old) / old * 100
+
+
+def _fmt(change: Optional[float]) -> str:
+    return "     n/a" if change is None else f"{change:+7.1f}%"
+
+
+def main(before: str, after: str, threshold: float) -> int:
+    with open(before) as f:
+        old = json.load(f)
+    with open(after) as f:
+        new = json.load(f)
+    print(f"before: {old['meta'].get('commit')}  after: {new['meta'].get('commit')}")
+    print(f"{'benchmark':<30} {'ops/s':>9} {'p95':>9} {'p99':>9}")
+    regressed = []
+    for name, result in new["results"].items():
+        base = old["results"].get(name)
+        if base is None:
+            print(f"{name:<30} (new)")
+            continue
+        throughput = _change(base["throughput"], result["throughput"])
+        p95 = _change(base["p95_ms"], result["p95_ms"])
+        p99 = _change(base["p99_ms"], result["p99_ms"])
+        worse = (throughput is not None and throughput < -threshold) or (p95 is not None and p95 > threshold)
+        if worse:
+            regressed.append(name)
+        print(f"{name:<30} {_fmt(throughput)} {_fmt(p95)} {_fmt(p99)}{'  REGRESSION' if worse else ''}")
+    for name in old["results"].keys() - new["results"].keys():
+        print(f"{name:<30} (missing)")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change treated as a regression")
+    args = parser.parse_args()
+    raise SystemExit(main(args.before, args.after, args.threshold))
@@ -0,0 +1,136 @@
+"""
+WebSocket connection registry: connect/disconnect churn and resident memory.
+
+Compares the previous bookkeeping (a list of sockets per room plus side
+dicts for writers and users) with ConnectionRegistry at --connections
+simulated sockets. Half of them sit in one large room, the rest are
+spread over --rooms small rooms. Churn disconnects a random socket and
+connects it again; memory is what tracemalloc sees allocated while the
+registry is filled, excluding the socket and writer objects themselves.
+
+Usage (from backend/):
+    python -m benchmarks.connection_registry --connections 100000 --churn 20000
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.websocket.registry import Connection, ConnectionRegistry
+
+
+class FakeWebSocket:
+    __slots__ = ("id",)
+
+    def __init__(self, id: int):
+        self.id = id
+
+
+class ListRegistry:
+    """The bookkeeping ConnectionManager used before ConnectionRegistry"""
+
+    def __init__(self):
+        self.active_connections: Dict[str, List[FakeWebSocket]] = {}
+        self.writers: Dict[FakeWebSocket, object] = {}
+        self.socket_users: Dict[FakeWebSocket, int] = {}
+        self.room_users: Dict[str, Dict[int, int]] = {}
+
+    def connect(self, websocket, room: str, user_id: int, writer):
+        self.active_connections.setdefault(room, []).append(websocket)
+        self.writers[websocket] = writer
+        self.socket_users[websocket] = user_id
+        room_users = self.room_users.setdefault(room, {})
+        room_users[user_id] = room_users.get(user_id, 0) + 1
+
+    def disconnect(self, websocket, room: str):
+        self.writers.pop(websocket, None)
+        user_id = self.socket_users.pop(websocket, None)
+        room_users = self.room_users.get(room)
+        if user_id is not None and room_users and user_id in room_users:
+            room_users[user_id] -= 1
+            if room_users[user_id] <= 0:
+                del room_users[user_id]
+            if not room_users:
+                del self.room_users[room]
+        if room in self.active_connections:
+            if websocket in self.active_connections[room]:
+                self.active_connections[room].remove(websocket)
+            if not self.active_connections[room]:
+                del self.active_connections[room]
+
+
+class IndexedRegistry:
+    """Same interface over ConnectionRegistry"""
+
+    def __init__(self):
+        self.registry = ConnectionRegistry()
+
+    def connect(self, websocket, room: str, user_id: int, writer):
+        self.registry.add(Connection(websocket, room, user_id, writer))
+
+    def disconnect(self, websocket, room: str):
+        self.registry.remove(websocket)
+
+
+def _population(connections: int, rooms: int, users: int):
+    sockets = [FakeWebSocket(i) for i in range(connections)]
+    placement = [
+        ("big" if i % 2 == 0 else f"room-{i % rooms}", i % users)
+        for i in range(connections)
+    ]
+    return sockets, placement
+
+
+def _run(name: str, factory, sockets, placement, churn: int):
+    writer = object()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    registry = factory()
+    for ws, (room, user_id) in zip(sockets, placement):
+        registry.connect(ws, room, user_id, writer)
+    fill = time.perf_counter() - start
+    resident = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    rng = random.Random(42)
+    latencies = []
+    for _ in range(churn):
+        i = rng.randrange(len(sockets))
+        room, user_id = placement[i]
+        t = time.perf_counter()
+        registry.disconnect(sockets[i], room)
+        registry.connect(sockets[i], room, user_id, writer)
+        latencies.append((time.perf_counter() - t) * 1e6)
+
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{name:<20} fill {len(sockets) / fill:10.0f} conn/s   churn p50 {statistics.median(ordered):8.1f} us   "
+        f"p99 {p99:8.1f} us   resident {resident / 2**20:6.1f} MiB ({resident / len(sockets):5.0f} B/conn)"
+    )
+    return registry
+
+
+def main(connections: int, rooms: int, users: int, churn: int):
+    sockets, placement = _population(connections, rooms, users)
+    print(f"{connections} connections, {users} users, one room with {connections // 2}, {rooms} small rooms")
+    _run("list per room", ListRegistry, sockets, placement, churn)
+    indexed = _run("ConnectionRegistry", IndexedRegistry, sockets, placement, churn)
+    registry = indexed.registry
+    print(
+        f"memory_bytes() estimate {registry.memory_bytes() / 2**20:.1f} MiB, "
+        f"big room {registry.room_count('big')} sockets, user 0 has {registry.user_count(0)} sockets"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=100_000)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=60_000)
+    parser.add_argument("--churn", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.connections, args.rooms, args.users, args.churn)
@@ -0,0 +1,248 @@
+"""
+Shared pieces for the benchmark suite: latency recording, machine-readable
+results, an in-process Redis stand-in and a minimal ASGI WebSocket client.
+"""
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class Recorder:
+    """Latency samples and error count for one named operation."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples: List[float] = []
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def result(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        ordered = sorted(self.samples)
+        return {
+            "ops": len(ordered),
+            "errors": self.errors,
+            "seconds": round(elapsed, 4),
+            "throughput": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment(database_url: str) -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "database": urlsplit(database_url).scheme,
+    }
+
+
+def print_table(results: Dict[str, Dict[str, Any]], out=sys.stdout):
+    header = f"{'benchmark':<30} {'ops':>7} {'err':>5} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    for name, r in results.items():
+        print(
+            f"{name:<30} {r['ops']:>7} {r['errors']:>5} {r['throughput']:>10.1f} "
+            f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}",
+            file=out,
+        )
+
+
+def write_json(path: str, meta: Dict[str, Any], params: Dict[str, Any], results: Dict[str, Dict[str, Any]]):
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "params": params, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+class FakePubSub:
+    def __init__(self, server: "FakeRedis"):
+        self.server = server
+        self.channels: Set[str] = set()
+        self.messages: Deque[Dict[str, Any]] = deque()
+        self.ready = asyncio.Event()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.channels.add(channel)
+            self.server.subscribers.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, *channels: str):
+        for channel in channels or tuple(self.channels):
+            self.channels.discard(channel)
+            self.server.subscribers.get(channel, set()).discard(self)
+
+    def deliver(self, message: Dict[str, Any]):
+        self.messages.append(message)
+        self.ready.set()
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: Optional[float] = None):
+        if not self.messages:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.messages.popleft()
+
+    async def aclose(self):
+        await self.unsubscribe()
+
+
+class FakePipeline:
+    def __init__(self, server: "FakeRedis"):
+        self.server = server
+        self.commands: List[Tuple[str, str]] = []
+
+    def publish(self, channel: str, data: str):
+        self.commands.append((channel, data))
+
+    async def execute(self) -> List[int]:
+        await self.server.round_trip()
+        return [self.server.deliver(channel, data) for channel, data in self.commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.commands = []
+
+
+class FakeRedis:
+    """
+    In-process stand-in for the pubsub subset of redis.asyncio used by
+    ConnectionManager, so chat benchmarks need no Redis server. Like the
+    shared client, it returns bytes. Every command or pipeline can be
+    delayed by latency seconds to stand in for the network round trip.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.subscribers: Dict[str, Set[FakePubSub]] = {}
+        self.latency = latency
+        self.round_trips = 0
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def deliver(self, channel: str, data: str) -> int:
+        subscribers = self.subscribers.get(channel, ())
+        for pubsub in subscribers:
+            pubsub.deliver({"type": "message", "channel": channel.encode(), "data": data.encode()})
+        return len(subscribers)
+
+    async def publish(self, channel: str, data: str) -> int:
+        await self.round_trip()
+        return self.deliver(channel, data)
+
+    async def ping(self) -> bool:
+        await self.round_trip()
+        return True
+
+    async def aclose(self):
+        pass
+
+
+def install_fake_redis(manager, latency: float = 0.0) -> FakeRedis:
+    """Point a ConnectionManager at a FakeRedis; call from inside the running loop"""
+    manager.redis = FakeRedis(latency)
+    manager.pubsub = manager.redis.pubsub()
+    manager.publisher.client_factory = lambda: manager.redis
+    manager._subscription_lock = asyncio.Lock()
+    manager._has_subscriptions = asyncio.Event()
+    manager._redis_initialized = True
+    return manager.redis
+
+
+class AsgiWebSocket:
+    """
+    Minimal in-process WebSocket client speaking the ASGI protocol directly
+    to the app, so thousands of sockets cost no network or threads.
+    """
+
+    def __init__(self, app, url: str, on_text: Callable[[str], None]):
+        parts = urlsplit(url)
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "server": ("bench", 80),
+            "client": ("127.0.0.1", 50000),
+            "root_path": "",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "headers": [(b"host", b"bench")],
+            "subprotocols": [],
+        }
+        self.on_text = on_text
+        self.to_app: asyncio.Queue = asyncio.Queue()
+        self.control: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def _receive(self):
+        return await self.to_app.get()
+
+    async def _send(self, message):
+        if message["type"] == "websocket.send":
+            self.on_text(message["text"])
+        else:
+            self.control.put_nowait(message)
+
+    async def connect(self) -> bool:
+        self.task = asyncio.create_task(self.app(self.scope, self._receive, self._send))
+        self.to_app.put_nowait({"type": "websocket.connect"})
+        message = await self.control.get()
+        return message["type"] == "websocket.accept"
+
+    def send_text(self, text: str):
+        self.to_app.put_nowait({"type": "websocket.receive", "text": text})
+
+    async def close(self):
+        self.to_app.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        if self.task is not None:
+            await asyncio.gather(self.task, return_exceptions=True)
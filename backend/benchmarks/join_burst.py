@@ -0,0 +1,89 @@
+"""
+Concurrent join burst against a small-capacity event.
+
+Fires hundreds of simultaneous POST /events/{id}/join requests through the
+ASGI app and checks that exactly `capacity` of them succeed and that the
+stored participant_count matches the participant rows.
+
+Usage (from backend/):
+    python -m benchmarks.join_burst --users 300 --capacity 10
+
+Uses a throwaway SQLite file unless DATABASE_URL is set. SQLite allows one
+writer at a time, so large bursts may see some 500s from lock timeouts;
+point DATABASE_URL at Postgres for realistic numbers.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_join.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+import httpx
+from sqlalchemy import func, select
+
+from app import models
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.base_class import Base
+from app.db.session import AsyncSessionLocal, async_engine
+from app.main import app
+
+
+async def _setup(users: int, capacity: int):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        members = [models.User(email=f"user{i}@example.com", hashed_password="x") for i in range(users)]
+        db.add_all(members)
+        await db.flush()
+        event = models.Event(
+            title="Popular", location="Hall", capacity=capacity, creator_id=members[0].id,
+            start_time=datetime.utcnow(), end_time=datetime.utcnow() + timedelta(hours=1),
+        )
+        db.add(event)
+        await db.commit()
+        return [m.id for m in members], event.id
+
+
+async def main(users: int, capacity: int):
+    user_ids, event_id = await _setup(users, capacity)
+    url = f"{settings.API_V1_STR}/events/{event_id}/join"
+    # Surface server errors (e.g. SQLite "database is locked") as 500s
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def join(user_id: int) -> int:
+            token = create_access_token(user_id)
+            response = await client.post(url, headers={"Authorization": f"Bearer {token}"})
+            return response.status_code
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(join(u) for u in user_ids))
+        elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        event = await db.get(models.Event, event_id)
+        rows = await db.scalar(
+            select(func.count(models.EventParticipant.id)).where(models.EventParticipant.event_id == event_id)
+        )
+    await async_engine.dispose()
+
+    print(f"{users} joins in {elapsed:.2f}s ({users / elapsed:.0f} joins/s)")
+    print(f"status codes: {dict(sorted(Counter(statuses).items()))}")
+    print(f"capacity {capacity}, participant_count {event.participant_count}, participant rows {rows}")
+    ok = event.participant_count == rows <= capacity and statuses.count(200) == rows
+    print("OK" if ok else "FAILED: capacity overshoot or counter drift")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--capacity", type=int, default=10)
+    args = parser.parse_args()
+    raise SystemExit(0 if asyncio.run(main(args.users, args.capacity)) else 1)
@@ -0,0 +1,110 @@
+"""
+Login throughput vs. latency of general API calls during a login spike.
+
+Runs a closed loop of concurrent logins for a fixed duration while a probe
+repeatedly calls GET /events/{id}, then reports logins/sec, 503s and probe
+p50/p99 latency. --baseline runs Argon2 on the shared threadpool without
+admission control, as before the dedicated hashing pool.
+
+Usage (from backend/):
+    python -m benchmarks.login_load --concurrency 64 --duration 10
+    python -m benchmarks.login_load --concurrency 64 --duration 10 --baseline
+
+Uses a throwaway SQLite file unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.core import security
+from app.core.config import settings
+from app.db.base_class import Base
+from app.db.session import AsyncSessionLocal, async_engine
+from app.main import app
+
+PASSWORD = "correct horse battery staple"
+
+
+async def _setup(users: int) -> int:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    hashed = security.get_password_hash(PASSWORD)
+    async with AsyncSessionLocal() as db:
+        members = [models.User(email=f"user{i}@example.com", hashed_password=hashed) for i in range(users)]
+        db.add_all(members)
+        await db.flush()
+        event = models.Event(
+            title="Probe", location="Hall", creator_id=members[0].id,
+            start_time=datetime.utcnow(), end_time=datetime.utcnow() + timedelta(hours=1),
+        )
+        db.add(event)
+        await db.commit()
+        return event.id
+
+
+async def main(users: int, concurrency: int, duration: float, baseline: bool):
+    if baseline:
+        async def unbounded(plain, hashed):
+            return await run_in_threadpool(security.verify_and_update_password, plain, hashed)
+        security.verify_and_update_password_async = unbounded
+
+    event_id = await _setup(users)
+    api = settings.API_V1_STR
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    statuses = Counter()
+    probe_ms = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + duration
+
+        async def login_loop(n: int):
+            i = n
+            while time.perf_counter() < deadline:
+                response = await client.post(
+                    f"{api}/login/access-token",
+                    data={"username": f"user{i % users}@example.com", "password": PASSWORD},
+                )
+                statuses[response.status_code] += 1
+                i += concurrency
+
+        async def probe_loop():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get(f"{api}/events/{event_id}")
+                probe_ms.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        await asyncio.gather(probe_loop(), *(login_loop(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    await async_engine.dispose()
+
+    ordered = sorted(probe_ms)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    mode = "baseline (shared threadpool)" if baseline else f"hashing pool ({settings.PASSWORD_HASH_WORKERS} workers)"
+    print(mode)
+    print(f"logins/sec: {statuses[200] / elapsed:.1f}   status codes: {dict(sorted(statuses.items()))}")
+    print(f"GET /events/{{id}} p50 {statistics.median(ordered):.2f} ms   p99 {p99:.2f} ms   ({len(ordered)} probes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--baseline", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.concurrency, args.duration, args.baseline))
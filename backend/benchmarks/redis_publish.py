@@ -0,0 +1,78 @@
+"""
+Chat publish throughput: one PUBLISH round trip per message vs pipelines.
+
+--senders tasks each publish --messages chat frames as fast as their
+previous publish is acknowledged, the way chat sockets do. Two strategies
+are compared on the same client:
+
+  per message  await client.publish() for every frame (the old path)
+  pipelined    RedisPublisher: frames queued while a pipeline is in
+               flight go out together in the next one
+
+Reports messages/s, publish latency p50/p99, round trips and the mean
+pipeline size. Runs against an in-process Redis stand-in that delays
+each round trip by --rtt-ms, or against REDIS_URL with --real.
+
+Usage (from backend/):
+    python -m benchmarks.redis_publish --senders 200 --messages 50 --rtt-ms 0.5
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+from app.core import redis_client
+from app.core.redis_client import RedisPublisher
+
+from benchmarks.harness import FakeRedis, percentile
+
+
+async def _run(name: str, publish, senders: int, messages: int, round_trips):
+    latencies: List[float] = []
+
+    async def sender(index: int):
+        for i in range(messages):
+            payload = json.dumps({"id": index * messages + i, "content": "hello"})
+            start = time.perf_counter()
+            await publish(f"chat:{index % 20}", payload)
+            latencies.append(time.perf_counter() - start)
+
+    before = round_trips()
+    start = time.perf_counter()
+    await asyncio.gather(*(sender(i) for i in range(senders)))
+    elapsed = time.perf_counter() - start
+    trips = round_trips() - before
+    ordered = sorted(latencies)
+    print(
+        f"{name:<12} {len(ordered) / elapsed:10.0f} msg/s   p50 {percentile(ordered, 0.50) * 1000:7.2f} ms   "
+        f"p99 {percentile(ordered, 0.99) * 1000:7.2f} ms   round trips {trips:6d}   "
+        f"mean batch {len(ordered) / trips if trips else 0:6.1f}"
+    )
+
+
+async def main(senders: int, messages: int, rtt_ms: float, real: bool) -> int:
+    client = redis_client.get_redis() if real else FakeRedis(rtt_ms / 1000)
+    publisher = RedisPublisher(lambda: client)
+    sent = {"count": 0}
+
+    async def publish_each(channel: str, payload: str):
+        sent["count"] += 1
+        await client.publish(channel, payload)
+
+    print(f"{senders} senders x {messages} messages, {'REDIS_URL' if real else f'{rtt_ms} ms simulated round trip'}")
+    await _run("per message", publish_each, senders, messages, lambda: sent["count"])
+    await _run("pipelined", publisher.publish, senders, messages, lambda: publisher.pipelines)
+    if real:
+        await redis_client.close_redis()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--senders", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--real", action="store_true", help="publish to REDIS_URL instead of the stand-in")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.senders, args.messages, args.rtt_ms, args.real)))
@@ -0,0 +1,142 @@
+"""
+Read-replica routing checked locally with two SQLite files.
+
+Seeds a primary database, copies the file to act as a replica, and adds
+a second replica URL that cannot be opened. The copy never receives later
+writes, so it behaves like a replica with unbounded lag. The script then
+checks that:
+  - the broken replica is taken out of rotation by the health check
+  - anonymous reads go to the replica
+  - a user who just wrote reads the primary and sees the write
+  - other users keep reading the replica, whose stale lists are not cached
+  - reads return to the replica once the sticky window has passed
+It also reports read throughput on each path.
+
+Usage (from backend/):
+    python -m benchmarks.replica_routing
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_dir = tempfile.mkdtemp()
+_primary = os.path.join(_dir, "primary.db")
+_replica = os.path.join(_dir, "replica.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_primary}"
+os.environ["DATABASE_REPLICA_URLS"] = json.dumps([
+    f"sqlite:///{_replica}", f"sqlite:///{os.path.join(_dir, 'missing', 'replica.db')}",
+])
+os.environ.setdefault("DB_REPLICA_STICKY_SECONDS", "1.0")
+os.environ.setdefault("DB_REPLICA_MAX_LAG_SECONDS", "1.0")
+
+import httpx
+
+from app import models
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import db_reads_total
+from app.db.base_class import Base
+from app.db.replicas import read_router
+from app.db.session import AsyncSessionLocal, async_engine
+from app.main import app
+
+API = settings.API_V1_STR
+
+
+async def _seed(events: int):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        users = [models.User(email=f"user{i}@example.com", hashed_password="x") for i in range(2)]
+        db.add_all(users)
+        await db.flush()
+        db.add_all([
+            models.Event(
+                title=f"Event {i}", location="Hall", creator_id=users[0].id,
+                start_time=now + timedelta(hours=i), end_time=now + timedelta(hours=i + 1),
+            )
+            for i in range(events)
+        ])
+        await db.commit()
+        return [u.id for u in users]
+
+
+def _reads():
+    return {target: int(db_reads_total._values.get((target,), 0)) for target in ("primary", "replica")}
+
+
+def _check(label: str, ok: bool) -> bool:
+    print(f"{'ok  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+async def _throughput(client, headers, requests: int, first: int) -> float:
+    start = time.perf_counter()
+    for i in range(first, first + requests):
+        # Distinct params so every request misses the response cache
+        await client.get(f"{API}/events/page?limit=20&location=Hall&creator_id={i}", headers=headers)
+    return requests / (time.perf_counter() - start)
+
+
+async def main(events: int, requests: int) -> int:
+    writer_id, reader_id = await _seed(events)
+    await async_engine.dispose()
+    shutil.copyfile(_primary, _replica)
+    writer = {"Authorization": f"Bearer {security.create_access_token(writer_id)}"}
+    reader = {"Authorization": f"Bearer {security.create_access_token(reader_id)}"}
+    results = []
+
+    await read_router.check_all(settings.DB_REPLICA_HEALTH_TIMEOUT)
+    stats = read_router.stats()
+    results.append(_check(f"health check: {stats['healthy_replicas']} of {stats['replicas']} replicas in rotation",
+                          stats["healthy_replicas"] == 1))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        before = _reads()
+        response = await client.get(f"{API}/events/page?limit=5")
+        after = _reads()
+        results.append(_check("anonymous read served by the replica",
+                              response.status_code == 200 and after["replica"] == before["replica"] + 1))
+
+        created = await client.post(f"{API}/events/", headers=writer, json={
+            "title": "Fresh event", "location": "Lab",
+            "start_time": datetime.utcnow().isoformat(), "end_time": (datetime.utcnow() + timedelta(hours=1)).isoformat(),
+        })
+        event_id = created.json()["id"]
+        response = await client.get(f"{API}/events/{event_id}", headers=reader)
+        results.append(_check("other user reads the lagging replica (404 for the new event)", response.status_code == 404))
+        response = await client.get(f"{API}/events/?location=Lab", headers=reader)
+        results.append(_check("other user's stale list from the replica", response.json() == []))
+        response = await client.get(f"{API}/events/{event_id}", headers=writer)
+        results.append(_check("writer reads own write from the primary", response.status_code == 200))
+        response = await client.get(f"{API}/events/?location=Lab", headers=writer)
+        results.append(_check("writer's list is not the cached stale one", len(response.json()) == 1))
+
+        await asyncio.sleep(settings.DB_REPLICA_STICKY_SECONDS + 0.1)
+        before = _reads()
+        await client.get(f"{API}/events/page?limit=7", headers=writer)
+        results.append(_check("writer back on the replica after the sticky window", _reads()["replica"] == before["replica"] + 1))
+
+        replica_rps = await _throughput(client, reader, requests, 1)
+        read_router.replicas[0].healthy = False
+        primary_rps = await _throughput(client, reader, requests, requests + 1)
+        print(f"uncached /events/page: {replica_rps:.0f} req/s via router to replica, {primary_rps:.0f} req/s on primary")
+
+    await read_router.stop()
+    await async_engine.dispose()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.events, args.requests)))
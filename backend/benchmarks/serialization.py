@@ -0,0 +1,118 @@
+"""
+Event list serialization: ORM + pydantic vs. Core rows + orjson.
+
+Builds the same 100-row page both ways: the ORM path hydrates Event
+instances and dumps them through a TypeAdapter(List[schemas.Event]); the
+fast path selects the schema columns as row tuples and dumps them with
+orjson. Checks that both produce identical bytes, then reports pages/sec,
+latency and peak memory allocated per page (tracemalloc).
+
+Usage (from backend/):
+    python -m benchmarks.serialization --rows 100 --pages 500
+
+Uses a throwaway SQLite file unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_serialization.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app import models, schemas
+from app.db.base_class import Base
+from app.db.session import AsyncSessionLocal, async_engine
+from app.services.serialization import dumps, event_rows_to_dicts, select_event_rows
+
+_adapter = TypeAdapter(List[schemas.Event])
+
+
+async def _setup(rows: int):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        user = models.User(email="creator@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        now = datetime.utcnow()
+        db.add_all([
+            models.Event(
+                title=f"Event {i}", description="A fairly ordinary event description " * 3,
+                location=f"Hall {i % 10}", capacity=50 if i % 2 else None, creator_id=user.id,
+                start_time=now + timedelta(hours=i), end_time=now + timedelta(hours=i + 1),
+            )
+            for i in range(rows)
+        ])
+        await db.commit()
+
+
+async def orm_page(limit: int) -> bytes:
+    async with AsyncSessionLocal() as db:
+        query = select(models.Event).order_by(models.Event.start_time, models.Event.id)
+        events = (await db.scalars(query.limit(limit))).all()
+        return _adapter.dump_json(_adapter.validate_python(events, from_attributes=True))
+
+
+async def core_page(limit: int) -> bytes:
+    async with AsyncSessionLocal() as db:
+        query = select_event_rows().order_by(models.Event.start_time, models.Event.id)
+        rows = (await db.execute(query.limit(limit))).all()
+        return dumps(event_rows_to_dicts(rows))
+
+
+async def _measure(name: str, build, limit: int, pages: int):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(pages):
+        t = time.perf_counter()
+        await build(limit)
+        latencies.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(20):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await build(limit)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{name:<18} {pages / elapsed:8.1f} pages/s   p50 {statistics.median(ordered):6.2f} ms   "
+        f"p99 {p99:6.2f} ms   peak {statistics.median(peaks) / 1024:7.1f} KiB/page"
+    )
+
+
+async def main(rows: int, limit: int, pages: int) -> int:
+    await _setup(rows)
+    orm_body, core_body = await orm_page(limit), await core_page(limit)
+    if orm_body != core_body:
+        print("FAILED: fast path output differs from schemas.Event")
+        return 1
+    print(f"{limit}-row page, {len(core_body)} bytes, outputs identical")
+    await _measure("ORM + pydantic", orm_page, limit, pages)
+    await _measure("Core + orjson", core_page, limit, pages)
+    await async_engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=500)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.rows, args.limit, args.pages)))
@@ -0,0 +1,108 @@
+"""
+Worker startup time against a budget.
+
+Starts fresh interpreters one after another and times, in each:
+  import   importing app.main
+  startup  the startup handlers (schema step, background tasks)
+  ready    from the first line of the process until /api/v1/ready would
+           answer 200, i.e. import + startup + warm-up
+Both schema modes are measured: 'create' (create_all, as development
+workers do) and 'verify' (the inspection production workers do).
+Exits 1 if the p50 time to ready in verify mode exceeds --budget-ms.
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 5 --budget-ms 2500
+
+Uses a throwaway SQLite file unless DATABASE_URL is set. Redis steps of
+the warm-up fail fast without a local Redis; they do not block readiness.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_startup.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from benchmarks.harness import Recorder, print_table
+
+# Runs in the child; times are seconds since the child's first line
+_CHILD = """
+import time
+started = time.perf_counter()
+import asyncio, json, logging
+logging.disable(logging.WARNING)
+from app.main import app
+from app.startup import readiness
+imported = time.perf_counter()
+
+async def main():
+    await app.router.startup()
+    handlers = time.perf_counter()
+    while not readiness.ready:
+        await asyncio.sleep(0.001)
+    ready = time.perf_counter()
+    await app.router.shutdown()
+    print(json.dumps({
+        "import": imported - started, "startup": handlers - imported, "ready": ready - started,
+        "steps": readiness.steps,
+    }))
+
+asyncio.run(main())
+"""
+
+
+def _run_child(mode: str) -> Dict[str, Any]:
+    env = dict(os.environ, DB_SCHEMA_MODE=mode)
+    child = subprocess.run([sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True)
+    if child.returncode != 0:
+        raise RuntimeError(f"worker failed to start in {mode} mode:\n{child.stderr}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def _create_schema():
+    subprocess.run([sys.executable, "-m", "app.db.schema"], check=True, capture_output=True)
+
+
+def measure(runs: int, mode: str, budget_ms: float = float("inf")) -> Dict[str, Dict[str, Any]]:
+    """Recorder results for each phase; ready runs over budget count as errors"""
+    recorders = {phase: Recorder(f"startup.{mode}.{phase}") for phase in ("import", "startup", "ready")}
+    steps: List[Dict[str, Any]] = []
+    for _ in range(runs):
+        timings = _run_child(mode)
+        for phase, rec in recorders.items():
+            rec.observe(timings[phase])
+        if timings["ready"] * 1000 > budget_ms:
+            recorders["ready"].errors += 1
+        steps.append(timings["steps"])
+    for rec in recorders.values():
+        rec.stop()
+    return {rec.name: rec.result() for rec in recorders.values()}
+
+
+def main(runs: int, budget_ms: float) -> int:
+    # Verify mode refuses to start on a database without the tables
+    _create_schema()
+    results = {}
+    for mode in ("create", "verify"):
+        results.update(measure(runs, mode, budget_ms if mode == "verify" else float("inf")))
+    print_table(results)
+    slowest = _run_child("verify")["steps"]
+    print("\nwarm-up steps (ms): " + ", ".join(
+        f"{name} {step['ms']:.1f}{'' if step['ok'] else ' (failed)'}" for name, step in slowest.items()
+    ))
+    p50 = results["startup.verify.ready"]["p50_ms"]
+    print(f"\ntime to ready p50 {p50:.0f} ms, budget {budget_ms:.0f} ms: {'ok' if p50 <= budget_ms else 'OVER BUDGET'}")
+    return 0 if p50 <= budget_ms else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2500.0, help="p50 time to ready allowed in verify mode")
+    args = parser.parse_args()
+    raise SystemExit(main(args.runs, args.budget_ms))
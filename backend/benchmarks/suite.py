@@ -0,0 +1,341 @@
+"""
+Offline benchmark suite for the API and chat path.
+
+Runs every workload in one process against the ASGI app: event listing,
+join/leave bursts on capacity-limited events, logins, many WebSocket clients
+chatting in shared rooms, plus microbenchmarks for schema serialization and
+token decoding, and worker startup time (see benchmarks.startup). Reports throughput and p50/p95/p99 per operation and can
+write the results as JSON for benchmarks.compare.
+
+Usage (from backend/):
+    python -m benchmarks.suite
+    python -m benchmarks.suite --only events,chat --json before.json
+    python -m benchmarks.compare before.json after.json
+
+Uses a throwaway SQLite file unless DATABASE_URL is set, and an in-process
+Redis stand-in for ConnectionManager. SQLite serializes writers, so the
+join/leave numbers are only comparable with each other; point DATABASE_URL
+at a local Postgres for realistic write concurrency.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_suite.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+import httpx
+from jose import jwt
+from sqlalchemy import select
+
+from app import models, schemas
+from app.core import security
+from app.core.config import settings
+from app.core.principals import principal_cache
+from app.db.base_class import Base
+from app.db.session import AsyncSessionLocal, async_engine
+from app.main import app
+from app.websocket.manager import manager
+
+from benchmarks import startup as startup_bench
+from benchmarks.harness import (
+    AsgiWebSocket, Recorder, environment, install_fake_redis, print_table, write_json,
+)
+
+WORKLOADS = ("events", "join", "login", "chat", "micro", "startup")
+PASSWORD = "correct horse battery staple"
+API = settings.API_V1_STR
+
+
+async def _seed(params):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    hashed = security.get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        users = [
+            models.User(email=f"user{i}@example.com", full_name=f"User {i}", hashed_password=hashed)
+            for i in range(params.users)
+        ]
+        db.add_all(users)
+        await db.flush()
+        events = [
+            models.Event(
+                title=f"Event {i}", description="Benchmark event", location=f"Hall {i % 10}",
+                capacity=params.capacity if i < params.join_events else None,
+                creator_id=users[i % len(users)].id,
+                start_time=now + timedelta(hours=i), end_time=now + timedelta(hours=i + 1),
+            )
+            for i in range(params.events)
+        ]
+        db.add_all(events)
+        await db.commit()
+        return [u.id for u in users], [e.id for e in events]
+
+
+async def _closed_loop(concurrency: int, total: int, operation):
+    """Run total operations with at most concurrency in flight"""
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            await operation(i)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _timed_request(recorder: Recorder, request, ok=(200,)):
+    start = time.perf_counter()
+    response = await request()
+    recorder.observe(time.perf_counter() - start)
+    if response.status_code not in ok:
+        recorder.errors += 1
+    return response
+
+
+async def bench_events(client, params, user_ids, event_ids, results):
+    headers = {"Authorization": f"Bearer {security.create_access_token(user_ids[0])}"}
+    page_size = 20
+
+    list_rec = Recorder("events.list")
+    await _closed_loop(params.concurrency, params.requests, lambda i: _timed_request(
+        list_rec, lambda: client.get(
+            f"{API}/events/", params={"skip": (i % 10) * page_size, "limit": page_size}, headers=headers,
+        ),
+    ))
+    list_rec.stop()
+
+    page_rec = Recorder("events.page")
+    cursors = [None]
+
+    async def page(i):
+        cursor = cursors[i % len(cursors)]
+        query = {"limit": page_size, **({"cursor": cursor} if cursor else {})}
+        response = await _timed_request(
+            page_rec, lambda: client.get(f"{API}/events/page", params=query, headers=headers)
+        )
+        next_cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+        if next_cursor and next_cursor not in cursors and len(cursors) < 50:
+            cursors.append(next_cursor)
+
+    await _closed_loop(params.concurrency, params.requests, page)
+    page_rec.stop()
+
+    detail_rec = Recorder("events.detail")
+    await _closed_loop(params.concurrency, params.requests, lambda i: _timed_request(
+        detail_rec, lambda: client.get(f"{API}/events/{event_ids[i % len(event_ids)]}", headers=headers),
+    ))
+    detail_rec.stop()
+
+    for rec in (list_rec, page_rec, detail_rec):
+        results[rec.name] = rec.result()
+
+
+async def bench_join(client, params, user_ids, event_ids, results):
+    """Every user joins a random capacity-limited event and leaves it again"""
+    targets = event_ids[:params.join_events]
+    rng = random.Random(1)
+    join_rec, leave_rec = Recorder("events.join"), Recorder("events.leave")
+
+    async def join_leave(i):
+        user_id = user_ids[i % len(user_ids)]
+        event_id = rng.choice(targets)
+        headers = {"Authorization": f"Bearer {security.create_access_token(user_id)}"}
+        # 409 (full or already joined) is an expected outcome under contention
+        response = await _timed_request(
+            join_rec, lambda: client.post(f"{API}/events/{event_id}/join", headers=headers), ok=(200, 409),
+        )
+        if response.status_code == 200:
+            await _timed_request(
+                leave_rec, lambda: client.post(f"{API}/events/{event_id}/leave", headers=headers),
+            )
+
+    await _closed_loop(params.concurrency, min(params.requests, len(user_ids) * 4), join_leave)
+    join_rec.stop()
+    leave_rec.stop()
+    results[join_rec.name] = join_rec.result()
+    results[leave_rec.name] = leave_rec.result()
+
+
+async def bench_login(client, params, user_ids, event_ids, results):
+    rec = Recorder("login")
+    await _closed_loop(params.login_concurrency, params.logins, lambda i: _timed_request(
+        rec, lambda: client.post(
+            f"{API}/login/access-token",
+            data={"username": f"user{i % len(user_ids)}@example.com", "password": PASSWORD},
+        ),
+    ))
+    rec.stop()
+    results[rec.name] = rec.result()
+
+
+async def bench_chat(client, params, user_ids, event_ids, results):
+    """
+    rooms x clients_per_room sockets; each client sends messages in a closed
+    loop, waiting for its own echo before the next one. Latency is measured
+    from send until each room member receives the frame.
+    """
+    install_fake_redis(manager)
+    delivery = Recorder("chat.delivery")
+    roundtrip = Recorder("chat.roundtrip")
+    sent_at = {}
+    echoes = {}
+
+    def receiver(client_key):
+        def on_text(frame: str):
+            now = time.perf_counter()
+            content = json.loads(frame)["content"]
+            sent = sent_at.get(content)
+            if sent is not None:
+                delivery.observe(now - sent)
+            echo = echoes.get(content)
+            if echo is not None and content.startswith(client_key + ":"):
+                echo.set()
+        return on_text
+
+    members = [
+        (event_ids[room], user_ids[(room * params.clients_per_room + n) % len(user_ids)])
+        for room in range(params.rooms)
+        for n in range(params.clients_per_room)
+    ]
+    # Only participants may open an event's chat
+    async with AsyncSessionLocal() as db:
+        joined = {tuple(row) for row in await db.execute(
+            select(models.EventParticipant.event_id, models.EventParticipant.user_id)
+        )}
+        db.add_all([
+            models.EventParticipant(event_id=event_id, user_id=user_id)
+            for event_id, user_id in set(members) - joined
+        ])
+        await db.commit()
+
+    sockets = []
+    for i, (event_id, user_id) in enumerate(members):
+        room, n = divmod(i, params.clients_per_room)
+        token = security.create_access_token(user_id)
+        key = f"r{room}c{n}"
+        ws = AsgiWebSocket(app, f"{API}/ws/chat/{event_id}?token={token}", receiver(key))
+        if not await ws.connect():
+            raise RuntimeError("WebSocket handshake was rejected")
+        sockets.append((key, ws))
+
+    async def chat(key, ws):
+        for seq in range(params.messages):
+            content = f"{key}:{seq}"
+            echoes[content] = asyncio.Event()
+            start = time.perf_counter()
+            sent_at[content] = start
+            ws.send_text(content)
+            try:
+                await asyncio.wait_for(echoes[content].wait(), 10)
+                roundtrip.observe(time.perf_counter() - start)
+            except asyncio.TimeoutError:
+                roundtrip.errors += 1
+            del echoes[content]
+
+    await asyncio.gather(*(chat(key, ws) for key, ws in sockets))
+    # Let the last frames reach every room member
+    await asyncio.sleep(0.2)
+    roundtrip.stop()
+    delivery.stop()
+    for _, ws in sockets:
+        await ws.close()
+    results[roundtrip.name] = roundtrip.result()
+    results[delivery.name] = delivery.result()
+
+
+def _micro(name: str, iterations: int, func, results):
+    rec = Recorder(name)
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        rec.observe(time.perf_counter() - start)
+    rec.stop()
+    results[name] = rec.result()
+
+
+async def bench_micro(client, params, user_ids, event_ids, results):
+    async with AsyncSessionLocal() as db:
+        events = (await db.scalars(select(models.Event).limit(100))).all()
+    _micro(
+        "micro.serialize_100_events", params.micro_iterations,
+        lambda: schemas.EventPage(
+            items=[schemas.Event.model_validate(e) for e in events], next_cursor=None
+        ).model_dump_json(),
+        results,
+    )
+    token = security.create_access_token(user_ids[0])
+    _micro(
+        "micro.token_decode_jwt", params.micro_iterations,
+        lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]),
+        results,
+    )
+    principal_cache.decode_token(token)
+    _micro("micro.token_decode_cached", params.micro_iterations, lambda: principal_cache.decode_token(token), results)
+
+
+async def bench_startup(client, params, user_ids, event_ids, results):
+    # Fresh worker processes on the same database; the create runs make the
+    # tables the verify runs inspect. Verify runs to ready over the budget
+    # are counted as errors.
+    results.update(startup_bench.measure(params.startup_runs, "create"))
+    results.update(startup_bench.measure(params.startup_runs, "verify", params.startup_budget_ms))
+
+
+BENCHES = {
+    "events": bench_events,
+    "join": bench_join,
+    "login": bench_login,
+    "chat": bench_chat,
+    "micro": bench_micro,
+    "startup": bench_startup,
+}
+
+
+async def main(params) -> int:
+    only = params.only.split(",") if params.only else list(WORKLOADS)
+    unknown = set(only) - set(WORKLOADS)
+    if unknown:
+        raise SystemExit(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    user_ids, event_ids = await _seed(params)
+    results = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in WORKLOADS:
+            if name in only:
+                await BENCHES[name](client, params, user_ids, event_ids, results)
+    await async_engine.dispose()
+
+    print_table(results)
+    if params.json:
+        write_json(params.json, environment(settings.DATABASE_URL), vars(params), results)
+        print(f"\nwrote {params.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", help=f"comma-separated subset of {','.join(WORKLOADS)}")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per HTTP operation")
+    parser.add_argument("--join-events", type=int, default=10, help="capacity-limited events for join/leave")
+    parser.add_argument("--capacity", type=int, default=5)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--login-concurrency", type=int, default=8)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--clients-per-room", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=10, help="messages sent per chat client")
+    parser.add_argument("--micro-iterations", type=int, default=2000)
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--startup-budget-ms", type=float, default=2500.0, help="time to ready allowed per worker")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
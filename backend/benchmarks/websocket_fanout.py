@@ -0,0 +1,101 @@
+"""
+WebSocket fan-out latency for one large room with a few stalled clients.
+
+Compares the old sequential send loop with ConnectionManager's per-socket
+writers. Reports, per broadcast, how long it takes until every healthy
+client has received the frame.
+
+Usage (from backend/):
+    python -m benchmarks.websocket_fanout --sockets 5000 --stalled 5
+
+Set WS_SEND_QUEUE_SIZE below --messages to see stalled clients dropped.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.config import settings
+from app.websocket.manager import ConnectionManager, ConnectionWriter
+from app.websocket.registry import Connection
+
+
+class FakeWebSocket:
+    def __init__(self, stall: float, on_receive):
+        self.stall = stall
+        self.on_receive = on_receive
+
+    async def send_text(self, frame: str):
+        if self.stall:
+            await asyncio.sleep(self.stall)
+        self.on_receive(self, frame)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def _build_room(sockets: int, stalled: int, stall: float):
+    state = {"pending": 0, "done": None}
+
+    def on_receive(ws, frame):
+        if ws.stall:
+            return
+        state["pending"] -= 1
+        if state["pending"] == 0:
+            state["done"].set()
+
+    room = [FakeWebSocket(stall if i < stalled else 0.0, on_receive) for i in range(sockets)]
+    return room, state
+
+
+async def _sequential(room, frame):
+    for connection in room:
+        try:
+            await connection.send_text(frame)
+        except Exception:
+            pass
+
+
+async def _measure(broadcast, room, state, healthy: int, messages: int):
+    latencies = []
+    for i in range(messages):
+        state["pending"] = healthy
+        state["done"] = asyncio.Event()
+        start = time.perf_counter()
+        await broadcast(f'{{"id": {i}}}')
+        await state["done"].wait()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _report(name, latencies):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{name:<22} p50 {statistics.median(ordered):8.2f} ms   p99 {p99:8.2f} ms")
+
+
+async def main(sockets: int, stalled: int, stall_ms: float, messages: int):
+    healthy = sockets - stalled
+    stall = stall_ms / 1000
+
+    room, state = _build_room(sockets, stalled, stall)
+    latencies = await _measure(lambda f: _sequential(room, f), room, state, healthy, messages)
+    _report("sequential send", latencies)
+
+    room, state = _build_room(sockets, stalled, stall)
+    manager = ConnectionManager()
+    for ws in room:
+        manager.connections.add(Connection(ws, "1", writer=ConnectionWriter(ws, settings.WS_SEND_QUEUE_SIZE)))
+    latencies = await _measure(lambda f: manager.broadcast_to_local(1, f), room, state, healthy, messages)
+    _report("per-socket writers", latencies)
+    print(f"stalled clients dropped: {stalled - sum(1 for c in manager.connections.room('1') if c.websocket.stall)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sockets", type=int, default=5000)
+    parser.add_argument("--stalled", type=int, default=5)
+    parser.add_argument("--stall-ms", type=float, default=20.0)
+    parser.add_argument("--messages", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.sockets, args.stalled, args.stall_ms, args.messages))
@@ -0,0 +1,185 @@
+"""
+WebSocket handshake rate and event-loop stalls during a reconnect storm.
+
+Opens --sockets chat sockets, --concurrency at a time, spread over
+--rooms events whose participants they are, then closes them. Every SQL
+statement is delayed by --db-latency-ms to stand in for the network round
+trip to a database server (SQLite has none): the synchronous engine
+sleeps, blocking whatever thread runs it, the async engine awaits. Three
+handshakes are compared:
+
+  sync query   the original handshake: JWT decode and a synchronous
+               db.query(User) on the event loop, no membership check
+  cold cache   the current handshake with empty token, user and
+               membership caches
+  warm cache   the current handshake again with the caches populated
+
+A probe task sleeps 1 ms in a loop throughout each storm; how late it
+wakes up is the stall every other socket and request on the worker sees.
+
+Usage (from backend/):
+    python -m benchmarks.ws_handshake --sockets 2000 --concurrency 20 --db-latency-ms 1
+
+Uses a throwaway SQLite file unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+if "DATABASE_URL" not in os.environ:
+    _db_path = os.path.join(tempfile.mkdtemp(), "bench_ws_handshake.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.util import await_only
+
+from app import models
+from app.core import security
+from app.core.config import settings
+from app.core.principals import principal_cache
+from app.db.base_class import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.main import app
+from app.services.membership import membership_cache
+from app.websocket.manager import manager
+
+from benchmarks.harness import AsgiWebSocket, install_fake_redis, percentile
+
+API = settings.API_V1_STR
+
+legacy_app = FastAPI()
+
+
+@legacy_app.websocket(API + "/ws/chat/{event_id}")
+async def legacy_chat(websocket: WebSocket, event_id: int, token: str = Query(...)):
+    """The handshake as it was before authentication moved off the event loop"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        user_id = int(payload["sub"])
+        db = SessionLocal()
+        try:
+            user = db.query(models.User).filter(models.User.id == user_id).first()
+        finally:
+            db.close()
+    except (JWTError, KeyError, ValueError):
+        await websocket.close(code=4003)
+        return
+    if not user:
+        await websocket.close(code=4003)
+        return
+    await manager.connect(websocket, event_id, user_id)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        await manager.disconnect(websocket, event_id)
+
+
+async def _seed(sockets: int, rooms: int):
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        users = [models.User(email=f"user{i}@example.com", hashed_password="x") for i in range(sockets)]
+        db.add_all(users)
+        await db.flush()
+        events = [
+            models.Event(
+                title=f"Event {i}", location="Hall", creator_id=users[0].id,
+                start_time=now + timedelta(hours=i), end_time=now + timedelta(hours=i + 1),
+            )
+            for i in range(rooms)
+        ]
+        db.add_all(events)
+        await db.flush()
+        db.add_all([
+            models.EventParticipant(event_id=events[i % rooms].id, user_id=user.id)
+            for i, user in enumerate(users)
+        ])
+        await db.commit()
+        return [(events[i % rooms].id, user.id) for i, user in enumerate(users)]
+
+
+async def _probe(lags: List[float], stop: asyncio.Event):
+    interval = 0.001
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+def _add_db_latency(seconds: float):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _blocking_round_trip(*args):
+        time.sleep(seconds)
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _async_round_trip(*args):
+        await_only(asyncio.sleep(seconds))
+
+
+async def _storm(name: str, asgi_app, members, tokens, concurrency: int):
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.sleep(0.01)
+
+    sockets = []
+    rejected = 0
+    pending = iter(members)
+
+    async def worker():
+        nonlocal rejected
+        for event_id, user_id in pending:
+            ws = AsgiWebSocket(asgi_app, f"{API}/ws/chat/{event_id}?token={tokens[user_id]}", lambda _: None)
+            if await ws.connect():
+                sockets.append(ws)
+            else:
+                rejected += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    await asyncio.gather(*(ws.close() for ws in sockets))
+
+    ordered = sorted(lags)
+    print(
+        f"{name:<12} {len(members) / elapsed:9.0f} handshakes/s   rejected {rejected:5d}   "
+        f"loop lag p50 {percentile(ordered, 0.50) * 1000:7.2f} ms   max {ordered[-1] * 1000 if ordered else 0:7.2f} ms"
+    )
+
+
+async def main(sockets: int, rooms: int, concurrency: int, db_latency_ms: float) -> int:
+    members = await _seed(sockets, rooms)
+    install_fake_redis(manager)
+    tokens = {user_id: security.create_access_token(user_id) for _, user_id in members}
+    if db_latency_ms > 0:
+        _add_db_latency(db_latency_ms / 1000)
+    print(f"{sockets} handshakes over {rooms} rooms, {concurrency} at a time, {db_latency_ms} ms per statement")
+
+    await _storm("sync query", legacy_app, members, tokens, concurrency)
+    principal_cache.clear()
+    membership_cache.clear()
+    await _storm("cold cache", app, members, tokens, concurrency)
+    await _storm("warm cache", app, members, tokens, concurrency)
+    print(f"membership cache: {membership_cache.stats()}")
+    await async_engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.sockets, args.rooms, args.concurrency, args.db_latency_ms)))
@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# Settings are read at import time, so configure before importing the app.
+# Tests never touch DATABASE_URL's database unless TEST_DATABASE_URL points there.
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+# Read-only endpoints go through a replica engine; it is the same database, so it never lags
+os.environ["DATABASE_REPLICA_URLS"] = json.dumps([os.environ["DATABASE_URL"]])
+os.environ["ENVIRONMENT"] = "testing"
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+
+import httpx
+from sqlalchemy import event
+
+from app import models
+from app.core import security
+from app.db.replicas import read_router
+from app.db.schema import create_schema
+from app.db.session import AsyncSessionLocal, async_engine
+from app.main import app
+
+_ids = itertools.count()
+
+
+def _wait_for_writers(dbapi_connection, connection_record):
+    # SQLite has one writer at a time; make concurrent writers queue for
+    # the lock the way they would on Postgres row locks instead of
+    # failing after the driver's default 5 seconds
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA busy_timeout = 60000")
+    cursor.close()
+
+
+for _engine in [async_engine] + [replica.engine for replica in read_router.replicas]:
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine.sync_engine, "connect", _wait_for_writers)
+
+
+@pytest.fixture(scope="session")
+def loop():
+    """One event loop for the session; the app's singletons bind to it"""
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(create_schema(async_engine))
+    yield loop
+    loop.run_until_complete(async_engine.dispose())
+    for replica in read_router.replicas:
+        loop.run_until_complete(replica.engine.dispose())
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    return loop.run_until_complete
+
+
+@pytest.fixture
+def client(loop):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    yield client
+    loop.run_until_complete(client.aclose())
+
+
+@pytest.fixture
+def make_users(run):
+    """make_users(n) -> [(user id, auth headers)] for n new users"""
+    def make(n: int, full_name: str = None):
+        async def insert():
+            async with AsyncSessionLocal() as db:
+                users = [
+                    models.User(email=f"user{next(_ids)}@example.com", full_name=full_name, hashed_password="x")
+                    for _ in range(n)
+                ]
+                db.add_all(users)
+                await db.commit()
+                return [u.id for u in users]
+        return [
+            (user_id, {"Authorization": f"Bearer {security.create_access_token(user_id)}"})
+            for user_id in run(insert())
+        ]
+    return make
+
+
+@pytest.fixture
+def make_event(run):
+    """make_event(creator_id, **columns) -> new event id"""
+    def make(creator_id: int, **columns):
+        async def insert():
+            now = datetime.utcnow()
+            async with AsyncSessionLocal() as db:
+                event = models.Event(**{
+                    "title": f"Event {next(_ids)}", "location": "Hall", "creator_id": creator_id,
+                    "start_time": now + timedelta(days=1), "end_time": now + timedelta(days=1, hours=2),
+                    **columns,
+                })
+                db.add(event)
+                await db.commit()
+                return event.id
+        return run(insert())
+    return make
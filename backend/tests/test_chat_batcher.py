@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app import models
+from app.db.session import AsyncSessionLocal
+from app.services.chat import ChatMessageBatcher
+
+
+@pytest.fixture
+def room(make_users, make_event):
+    (user_id, _), = make_users(1)
+    return user_id, make_event(user_id)
+
+
+async def _count(event_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).where(models.ChatMessage.event_id == event_id))
+
+
+def test_one_bad_message_fails_alone(run, room):
+    user_id, event_id = room
+    batcher = ChatMessageBatcher(max_batch_size=20, max_delay=0.05)
+
+    async def send():
+        # content is NOT NULL, so the None row poisons the multi-row INSERT
+        contents = [f"message {i}" for i in range(20)]
+        contents[13] = None
+        results = await asyncio.gather(
+            *(batcher.submit(user_id, event_id, content) for content in contents), return_exceptions=True,
+        )
+        await batcher.stop()
+        return results
+
+    results = run(send())
+    assert isinstance(results[13], IntegrityError)
+    saved = [r for i, r in enumerate(results) if i != 13]
+    assert [m.content for m in saved] == [f"message {i}" for i in range(20) if i != 13]
+    # Still in submission order
+    assert [m.id for m in saved] == sorted(m.id for m in saved)
+    assert run(_count(event_id)) == 19
+
+
+class _GatedSession:
+    """AsyncSessionLocal that only opens once the gate is set"""
+
+    def __init__(self, gate: asyncio.Event):
+        self.gate = gate
+
+    async def __aenter__(self):
+        await self.gate.wait()
+        self.db = AsyncSessionLocal()
+        return await self.db.__aenter__()
+
+    async def __aexit__(self, *exc):
+        return await self.db.__aexit__(*exc)
+
+
+def test_senders_wait_when_the_queue_is_full(run, room):
+    user_id, event_id = room
+
+    async def send():
+        gate = asyncio.Event()
+        batcher = ChatMessageBatcher(max_batch_size=1, max_delay=0, session_factory=lambda: _GatedSession(gate), max_queue=2)
+        senders = [asyncio.create_task(batcher.submit(user_id, event_id, f"queued {i}")) for i in range(6)]
+        await asyncio.sleep(0.05)
+        # One message is being flushed, two are queued, the other senders wait for room
+        queued = batcher.stats()["queued"]
+        waiting = sum(not task.done() for task in senders)
+        gate.set()
+        saved = await asyncio.gather(*senders)
+        await batcher.stop()
+        return queued, waiting, saved
+
+    queued, waiting, saved = run(send())
+    assert queued == 2
+    assert waiting == 6
+    assert [m.content for m in saved] == [f"queued {i}" for i in range(6)]
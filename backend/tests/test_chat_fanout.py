@@ -0,0 +1,126 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.db.session import AsyncSessionLocal
+from app.services.chat import SavedMessage
+from app.services.chat_fanout import ChatPushFanout
+from app.websocket.manager import ConnectionManager
+from app.websocket.presence import Presence
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FakeSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        pass
+
+    async def close(self, code=None):
+        pass
+
+
+class RecordingNotifications:
+    def __init__(self):
+        self.pushed = {}
+
+    async def send_new_message(self, user_id, sender_name, event_title, preview):
+        self.pushed[user_id] = preview
+
+    async def send_message_digest(self, user_id, event_title, count):
+        self.pushed[user_id] = count
+
+
+def _node(monkeypatch, server) -> Presence:
+    """A ConnectionManager without pubsub, and its Presence on the shared fake Redis"""
+    connections = ConnectionManager()
+
+    async def noop(*args):
+        pass
+
+    monkeypatch.setattr(connections, "_ensure_redis", noop)
+    monkeypatch.setattr(connections, "subscribe_to_channel", noop)
+    monkeypatch.setattr(connections, "unsubscribe_from_channel", noop)
+    client = fakeredis.FakeAsyncRedis(server=server)
+    return Presence(connections, client_factory=lambda: client, ttl=30)
+
+
+@pytest.fixture
+def chat(run, make_users, make_event):
+    """(event id, creator, [participants]); the creator has not joined their own event"""
+    users = [user_id for user_id, _ in make_users(5)]
+    event_id = make_event(users[0])
+
+    async def join():
+        async with AsyncSessionLocal() as db:
+            db.add_all(models.EventParticipant(event_id=event_id, user_id=user_id) for user_id in users[1:])
+            await db.commit()
+
+    run(join())
+    return event_id, users[0], users[1:]
+
+
+def _message(message_id: int, sender_id: int, event_id: int) -> SavedMessage:
+    return SavedMessage(message_id, sender_id, event_id, f"message {message_id}", datetime.utcnow())
+
+
+def test_pushes_only_users_offline_on_every_node(run, monkeypatch, chat):
+    event_id, creator, (here, elsewhere, offline, sender) = chat
+    server = fakeredis.FakeServer()
+    node, other_node = _node(monkeypatch, server), _node(monkeypatch, server)
+    notifications = RecordingNotifications()
+    fanout = ChatPushFanout(node, notifications)
+    fanout.window = fanout.min_interval = 0
+
+    async def scenario():
+        local, remote = FakeSocket(), FakeSocket()
+        await node.connections.connect(local, event_id, user_id=here)
+        await other_node.connections.connect(remote, event_id, user_id=elsewhere)
+        await asyncio.sleep(0.05)
+
+        await fanout._resolve([_message(1, sender, event_id)])
+        await fanout.flush_due(time.monotonic() + 1)
+        first = dict(notifications.pushed)
+
+        # Leaving on the other node makes the user offline everywhere
+        notifications.pushed.clear()
+        await other_node.connections.disconnect(remote, event_id)
+        await asyncio.sleep(0.05)
+        await fanout._resolve([_message(2, sender, event_id)])
+        await fanout.flush_due(time.monotonic() + 2)
+        second = dict(notifications.pushed)
+
+        await node.connections.disconnect(local, event_id)
+        await node.stop()
+        await other_node.stop()
+        return first, second
+
+    first, second = run(scenario())
+    # The creator is pushed although they never joined; the sender never is
+    assert first == {creator: "message 1", offline: "message 1"}
+    assert second == {creator: "message 2", elsewhere: "message 2", offline: "message 2"}
+
+
+def test_presence_falls_back_to_local_sockets(run, monkeypatch, chat):
+    event_id, _, (here, *_) = chat
+    node = _node(monkeypatch, fakeredis.FakeServer())
+
+    def unreachable():
+        raise ConnectionError("redis is down")
+
+    node.client_factory = unreachable
+
+    async def scenario():
+        socket = FakeSocket()
+        await node.connections.connect(socket, event_id, user_id=here)
+        online = await node.online_users([event_id])
+        await node.connections.disconnect(socket, event_id)
+        await node.stop()
+        return online
+
+    assert run(scenario()) == {event_id: {here}}
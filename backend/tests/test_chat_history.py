@@ -0,0 +1,60 @@
+import pytest
+
+from app import models
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+
+@pytest.fixture
+def room(run, make_users, make_event):
+    """An event with a named creator, an unnamed participant and one message from each"""
+    (creator_id, creator), = make_users(1, full_name="Ada Lovelace")
+    (member_id, member), = make_users(1)
+    event_id = make_event(creator_id)
+
+    async def seed():
+        async with AsyncSessionLocal() as db:
+            db.add(models.EventParticipant(event_id=event_id, user_id=member_id))
+            db.add_all([
+                models.ChatMessage(event_id=event_id, sender_id=creator_id, content="welcome"),
+                models.ChatMessage(event_id=event_id, sender_id=member_id, content="thanks"),
+            ])
+            await db.commit()
+
+    run(seed())
+    return event_id, creator, member
+
+
+def test_participants_read_history_without_emails(run, client, room):
+    event_id, creator, member = room
+    for headers in (creator, member):
+        response = run(client.get(f"/api/v1/events/{event_id}/messages", headers=headers))
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [(m["content"], m["sender_name"]) for m in items] == [("thanks", "Someone"), ("welcome", "Ada Lovelace")]
+        assert "@" not in response.text
+
+
+def test_history_is_refused_to_non_members(run, client, room, make_users):
+    event_id, _, _ = room
+    (_, outsider), = make_users(1)
+    response = run(client.get(f"/api/v1/events/{event_id}/messages", headers=outsider))
+    assert response.status_code == 403
+    assert "thanks" not in response.text
+
+
+def test_history_of_missing_event_is_404(run, client, make_users):
+    (_, headers), = make_users(1)
+    assert run(client.get("/api/v1/events/999999/messages", headers=headers)).status_code == 404
+
+
+def test_history_follows_join_and_leave(run, client, room, make_users, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    event_id, _, _ = room
+    (_, newcomer), = make_users(1)
+    url = f"/api/v1/events/{event_id}/messages"
+    assert run(client.get(url, headers=newcomer)).status_code == 403
+    assert run(client.post(f"/api/v1/events/{event_id}/join", headers=newcomer)).status_code == 200
+    assert run(client.get(url, headers=newcomer)).status_code == 200
+    assert run(client.post(f"/api/v1/events/{event_id}/leave", headers=newcomer)).status_code == 200
+    assert run(client.get(url, headers=newcomer)).status_code == 403
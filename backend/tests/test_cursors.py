@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    start = datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor([start, 7]), 2, (datetime, int)) == [start, 7]
+
+
+@pytest.mark.parametrize("values", [[[1], 2], [1, 2], ["a", "b"], [None, 2], [datetime(2024, 5, 1), "2"],
+                                    [datetime(2024, 5, 1), True], [{"dt": 5}, 2]])
+def test_cursor_with_wrong_types_is_rejected(values):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(values), 2, (datetime, int))
+
+
+@pytest.mark.parametrize("values", [[[1], 2], [1, 2], ["a", "b"], [1]])
+def test_events_page_rejects_tampered_cursor(run, client, values):
+    response = run(client.get("/api/v1/events/page", params={"cursor": encode_cursor(values)}))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
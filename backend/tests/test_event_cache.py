@@ -0,0 +1,80 @@
+import pytest
+
+from app.core.config import settings
+from app.core.profiling import assert_max_queries
+
+
+@pytest.fixture(autouse=True)
+def cache_replica_reads(monkeypatch):
+    # The test replica is the primary, so its reads may be cached straight away
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+
+def _etag(run, client, url, headers=None):
+    response = run(client.get(url, headers=headers))
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_repeated_get_with_if_none_match_is_304(run, client, make_users, make_event):
+    (creator_id, _), = make_users(1)
+    url = f"/api/v1/events/{make_event(creator_id)}"
+    etag = _etag(run, client, url)
+    # Served from the cache
+    with assert_max_queries(0):
+        again = run(client.get(url, headers={"If-None-Match": etag}))
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+    assert run(client.get(url, headers={"If-None-Match": f"W/{etag}"})).status_code == 304
+    assert run(client.get(url, headers={"If-None-Match": '"stale"'})).status_code == 200
+
+
+def test_list_pages_carry_etags(run, client, make_users, make_event):
+    (creator_id, _), = make_users(1)
+    make_event(creator_id)
+    etag = _etag(run, client, "/api/v1/events/page")
+    assert run(client.get("/api/v1/events/page", headers={"If-None-Match": etag})).status_code == 304
+
+
+def test_writes_change_the_etag(run, client, make_users, make_event):
+    (creator_id, creator), (_, member) = make_users(2)
+    event_id = make_event(creator_id, capacity=5)
+    url = f"/api/v1/events/{event_id}"
+    seen = [_etag(run, client, url), _etag(run, client, "/api/v1/events/")]
+
+    def changed():
+        current = [_etag(run, client, url), _etag(run, client, "/api/v1/events/")]
+        assert current[0] not in seen and current[1] not in seen
+        seen.extend(current)
+
+    assert run(client.put(url, json={"title": "Renamed"}, headers=creator)).status_code == 200
+    changed()
+    assert run(client.get(url)).json()["title"] == "Renamed"
+
+    assert run(client.post(f"{url}/join", headers=member)).status_code == 200
+    changed()
+    assert run(client.get(url)).json()["participant_count"] == 1
+
+    assert run(client.post(f"{url}/leave", headers=member)).status_code == 200
+    changed()
+    assert run(client.get(url)).json()["participant_count"] == 0
+
+
+def test_redis_backend_round_trip(run, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.services import event_cache
+
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(event_cache, "get_redis", lambda: client)
+    backend = event_cache.RedisCacheBackend(ttl=60)
+
+    async def scenario():
+        await backend.warm_up()
+        await backend.set("event:1", ('"abc"', b'{"id": 1}'))
+        before = await backend.version("events")
+        await backend.bump("events")
+        return await backend.get("event:1"), await backend.get("event:2"), before, await backend.version("events")
+
+    assert run(scenario()) == (('"abc"', b'{"id": 1}'), None, 0, 1)
@@ -0,0 +1,64 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from app import models
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+CAPACITY = 25
+JOINS = 300
+
+
+def test_concurrent_joins_never_overbook(run, client, make_users, make_event, monkeypatch):
+    # Hundreds of joins on one event would otherwise hit its join budget
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    users = make_users(JOINS)
+    event_id = make_event(users[0][0], capacity=CAPACITY)
+
+    async def join_all():
+        return await asyncio.gather(*(
+            client.post(f"{settings.API_V1_STR}/events/{event_id}/join", headers=headers)
+            for _, headers in users
+        ))
+
+    responses = run(join_all())
+    statuses = [r.status_code for r in responses]
+    assert set(statuses) <= {200, 409}, statuses
+    assert statuses.count(200) == CAPACITY
+    assert all(r.json()["detail"] == "Event is at full capacity" for r in responses if r.status_code == 409)
+
+    async def counts():
+        async with AsyncSessionLocal() as db:
+            participants = await db.scalar(
+                select(func.count()).select_from(models.EventParticipant)
+                .where(models.EventParticipant.event_id == event_id)
+            )
+            return participants, await db.scalar(
+                select(models.Event.participant_count).where(models.Event.id == event_id)
+            )
+
+    participants, participant_count = run(counts())
+    assert participants == CAPACITY
+    assert participant_count == participants
+
+
+def test_concurrent_duplicate_joins_count_once(run, client, make_users, make_event, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    (creator_id, _), (_, headers) = make_users(2)
+    event_id = make_event(creator_id, capacity=CAPACITY)
+
+    async def join_repeatedly():
+        return await asyncio.gather(*(
+            client.post(f"{settings.API_V1_STR}/events/{event_id}/join", headers=headers) for _ in range(50)
+        ))
+
+    statuses = [r.status_code for r in run(join_repeatedly())]
+    assert statuses.count(200) == 1
+    assert set(statuses) == {200, 409}
+
+    async def participant_count():
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(select(models.Event.participant_count).where(models.Event.id == event_id))
+
+    assert run(participant_count()) == 1
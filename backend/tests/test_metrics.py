@@ -0,0 +1,20 @@
+from app.core.metrics import CallbackGauge, Registry
+
+
+def test_gauges_share_one_stats_call_per_scrape():
+    registry = Registry()
+    calls = []
+
+    def stats():
+        calls.append(1)
+        return {"connections": 3, "rooms": 2}
+
+    shared = registry.per_scrape(stats)
+    registry.register(CallbackGauge("connections", "Connections.", lambda: shared()["connections"]))
+    registry.register(CallbackGauge("rooms", "Rooms.", lambda: shared()["rooms"]))
+
+    first = registry.render()
+    assert "connections 3" in first and "rooms 2" in first
+    assert len(calls) == 1
+    registry.render()
+    assert len(calls) == 2
@@ -0,0 +1,55 @@
+import pytest
+
+from app import models
+from app.core.metrics import db_queries_total
+from app.core.profiling import assert_max_queries
+from app.db.replicas import read_router
+from app.db.session import AsyncSessionLocal
+
+
+@pytest.fixture
+def crowded_events(run, make_users, make_event):
+    """Ten events with three participants each; returns the creator's headers"""
+    users = make_users(4)
+    (creator_id, headers), members = users[0], users[1:]
+
+    async def join_all(event_ids):
+        async with AsyncSessionLocal() as db:
+            db.add_all(
+                models.EventParticipant(event_id=event_id, user_id=user_id)
+                for event_id in event_ids for user_id, _ in members
+            )
+            await db.commit()
+
+    run(join_all([make_event(creator_id, capacity=10, participant_count=3) for _ in range(10)]))
+    return headers
+
+
+def test_event_list_is_one_query(run, client, crowded_events):
+    with assert_max_queries(1):
+        response = run(client.get("/api/v1/events/", params={"limit": 100}, headers=crowded_events))
+    assert response.status_code == 200
+    assert len(response.json()) >= 10
+
+
+def test_event_page_is_one_query(run, client, crowded_events):
+    with assert_max_queries(1):
+        response = run(client.get("/api/v1/events/page", params={"limit": 5}, headers=crowded_events))
+    assert response.status_code == 200
+    assert response.json()["next_cursor"]
+
+
+def test_assert_max_queries_reports_statements(run, client, crowded_events):
+    with pytest.raises(AssertionError, match=r"(?s)Expected at most 0 queries, got 1 queries.*FROM event"):
+        with assert_max_queries(0):
+            run(client.get("/api/v1/events/", params={"skip": 1}, headers=crowded_events))
+
+
+def test_replica_reads_are_measured(run, client, crowded_events):
+    assert read_router.replicas
+    before = db_queries_total._values.get((), 0)
+    with assert_max_queries(1) as profile:
+        response = run(client.get("/api/v1/events/", params={"skip": 2}, headers=crowded_events))
+    assert response.status_code == 200
+    assert profile.count == 1
+    assert db_queries_total._values.get((), 0) == before + 1
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.api.api_v1.endpoints.chat import websocket_chat_endpoint
+from app.core import rate_limit, security
+from app.core.config import settings
+from app.core.rate_limit import Bucket, Limit, MemoryBuckets, RateLimiter, RedisBuckets
+from app.websocket.manager import manager
+from app.websocket.presence import presence
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+def _event_json():
+    start = datetime.utcnow() + timedelta(days=1)
+    return {
+        "title": "Limited", "location": "Hall",
+        "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat(),
+    }
+
+
+def test_writes_over_budget_get_429_with_retry_after(run, client, make_users, monkeypatch):
+    monkeypatch.setattr(rate_limit, "WRITE_USER", Limit(rate=0.25, burst=2))
+    (_, headers), (_, other_headers) = make_users(2)
+    statuses = [run(client.post("/api/v1/events/", headers=headers, json=_event_json())).status_code for _ in range(2)]
+    assert statuses == [200, 200]
+
+    refused = run(client.post("/api/v1/events/", headers=headers, json=_event_json()))
+    assert refused.status_code == 429
+    # One token at 0.25 per second
+    assert refused.headers["Retry-After"] == "4"
+    # Budgets are per user
+    assert run(client.post("/api/v1/events/", headers=other_headers, json=_event_json())).status_code == 200
+
+
+def test_memory_buckets_refill_over_time():
+    now = [0.0]
+    buckets = MemoryBuckets(100, timer=lambda: now[0])
+    bucket = Bucket("chat_user", "1", Limit(rate=2.0, burst=3))
+    assert all(buckets.take([bucket], 1).allowed for _ in range(3))
+    refused = buckets.take([bucket], 1)
+    assert (refused.allowed, refused.retry_after, refused.scope) == (False, 0.5, "chat_user")
+
+    now[0] = 0.5
+    assert buckets.take([bucket], 1).allowed
+    assert not buckets.take([bucket], 1).allowed
+    # Refills up to the burst, no further
+    now[0] = 100.0
+    assert all(buckets.take([bucket], 1).allowed for _ in range(3))
+    assert not buckets.take([bucket], 1).allowed
+
+
+def test_all_buckets_are_charged_or_none():
+    buckets = MemoryBuckets(100, timer=lambda: 0.0)
+    user = Bucket("chat_user", "1", Limit(rate=1.0, burst=5))
+    room = Bucket("chat_event", "7", Limit(rate=1.0, burst=1))
+    assert buckets.take([user, room], 1).allowed
+    assert buckets.take([user, room], 1).scope == "chat_event"
+    # The refused message did not cost the user anything
+    assert buckets.buckets.get(("chat_user", "1"))[0] == 4
+
+
+def test_redis_buckets_refill_over_time(run, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: client)
+    shared = RedisBuckets(timeout=1.0)
+    bucket = Bucket("chat_user", "1", Limit(rate=20.0, burst=2))
+
+    async def scenario():
+        first = [(await shared.take([bucket], 1)).allowed for _ in range(3)]
+        refused = await shared.take([bucket], 1)
+        await asyncio.sleep(refused.retry_after + 0.02)
+        return first, refused, await shared.take([bucket], 1)
+
+    first, refused, later = run(scenario())
+    assert first == [True, True, False]
+    assert refused.scope == "chat_user" and 0 < refused.retry_after <= 0.05
+    assert later.allowed
+
+
+def test_falls_back_to_local_buckets_when_redis_fails(run, monkeypatch):
+    limiter = RateLimiter(shared=True, fallback_size=100, timeout=0.1, retry_seconds=60)
+    calls = []
+
+    async def unreachable(buckets, cost):
+        calls.append(1)
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(limiter.shared, "take", unreachable)
+    bucket = Bucket("write_user", "1", Limit(rate=0.001, burst=1))
+    first = run(limiter.hit(bucket))
+    second = run(limiter.hit(bucket))
+    # Still limited, by this process's own buckets, and Redis is not retried straight away
+    assert first.allowed and not second.allowed
+    assert second.scope == "write_user"
+    assert len(calls) == 1
+
+
+class ChatSocket:
+    """Sends the given messages, then disconnects; records what it receives"""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        # Let the socket's writer send what is queued
+        await asyncio.sleep(0.02)
+        if not self.messages:
+            raise WebSocketDisconnect()
+        return self.messages.pop(0)
+
+    async def send_text(self, frame):
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=None):
+        pass
+
+
+def test_chat_messages_over_budget_get_an_error_frame(run, monkeypatch, make_users, make_event):
+    monkeypatch.setattr(rate_limit, "CHAT_USER", Limit(rate=0.001, burst=2))
+    published = []
+
+    async def noop(*args):
+        pass
+
+    async def publish(event_id, message):
+        published.append(message["content"])
+
+    monkeypatch.setattr(manager, "_ensure_redis", noop)
+    monkeypatch.setattr(manager, "subscribe_to_channel", noop)
+    monkeypatch.setattr(manager, "unsubscribe_from_channel", noop)
+    monkeypatch.setattr(manager, "publish_message", publish)
+    (user_id, _), = make_users(1)
+    event_id = make_event(user_id)
+    socket = ChatSocket(["one", "two", "three"])
+
+    async def chat():
+        await websocket_chat_endpoint(socket, event_id, token=security.create_access_token(user_id))
+        await presence.stop()
+
+    run(chat())
+    assert published == ["one", "two"]
+    errors = [frame for frame in socket.sent if frame.get("type") == "error"]
+    assert len(errors) == 1
+    assert errors[0]["error"] == "rate_limited" and errors[0]["retry_after"] > 0
@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def cache_replica_reads(monkeypatch):
+    # Cached searches must still follow writes
+    monkeypatch.setattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+
+@pytest.fixture
+def tag():
+    """A word no other test's events contain"""
+    return "zq" + uuid.uuid4().hex[:10]
+
+
+def _search(run, client, q, **params):
+    response = run(client.get("/api/v1/events/search", params={"q": q, **params}))
+    assert response.status_code == 200
+    return [event["id"] for event in response.json()]
+
+
+def test_results_follow_create_update_and_delete(run, client, make_users, tag):
+    (_, headers), = make_users(1)
+    start = datetime.utcnow() + timedelta(days=1)
+    created = run(client.post("/api/v1/events/", headers=headers, json={
+        "title": f"Robotics {tag}", "location": "Lab", "description": "Build a robot",
+        "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat(),
+    }))
+    assert created.status_code == 200
+    event_id = created.json()["id"]
+    assert _search(run, client, tag) == [event_id]
+    assert _search(run, client, f"{tag}2") == []
+
+    updated = run(client.put(f"/api/v1/events/{event_id}", headers=headers, json={"title": f"Robotics {tag}2"}))
+    assert updated.status_code == 200
+    # The old word is gone from the index; the new one prefix-matches both queries
+    assert _search(run, client, f"{tag}2") == [event_id]
+    assert _search(run, client, f"robotics {tag}") == [event_id]
+    assert _search(run, client, "robot " + tag) == [event_id]
+
+    assert run(client.delete(f"/api/v1/events/{event_id}", headers=headers)).status_code == 200
+    assert _search(run, client, tag) == []
+
+
+def test_every_term_matches_as_a_prefix(run, client, make_users, make_event, tag):
+    (creator_id, _), = make_users(1)
+    event_id = make_event(creator_id, title=f"Chemistry Laboratory {tag}")
+    make_event(creator_id, title=f"Chemistry Lecture {tag}")
+    assert _search(run, client, f"chem lab {tag}") == [event_id]
+    assert _search(run, client, f"CHEMISTRY, laboratory! {tag[:6]}") == [event_id]
+    assert _search(run, client, f"biology {tag}") == []
+
+
+def test_time_window_filters(run, client, make_users, make_event, tag):
+    (creator_id, _), = make_users(1)
+    now = datetime.utcnow()
+    events = [
+        make_event(creator_id, title=f"Seminar {tag}", start_time=now + timedelta(days=day),
+                   end_time=now + timedelta(days=day, hours=1))
+        for day in (1, 3, 5)
+    ]
+    window = {
+        "starts_after": (now + timedelta(days=2)).isoformat(),
+        "ends_before": (now + timedelta(days=4)).isoformat(),
+    }
+    assert _search(run, client, tag, **window) == [events[1]]
+    assert _search(run, client, tag, starts_after=window["starts_after"]) == events[1:]
+    assert _search(run, client, tag, ends_before=window["ends_before"]) == events[:2]
+
+
+def test_title_matches_rank_above_location_and_description(run, client, make_users, make_event, tag):
+    (creator_id, _), = make_users(1)
+    now = datetime.utcnow()
+
+    def event(day, **columns):
+        return make_event(creator_id, start_time=now + timedelta(days=day),
+                          end_time=now + timedelta(days=day, hours=1), **columns)
+
+    # Start times run the other way, so only the ranking can produce this order
+    in_description = event(1, title="Meetup", description=f"Bring a {tag}")
+    in_location = event(2, title="Meetup", location=f"{tag} Hall")
+    in_title = event(3, title=f"{tag} Meetup")
+    assert _search(run, client, tag) == [in_title, in_location, in_description]
+    assert _search(run, client, tag, limit=1, skip=1) == [in_location]
@@ -0,0 +1,10 @@
+from benchmarks import startup
+
+# p50 time to ready allowed for a fresh worker in verify mode, as in the benchmark
+BUDGET_MS = 2500.0
+
+
+def test_worker_is_ready_within_budget(loop):
+    results = startup.measure(3, "verify", BUDGET_MS)
+    ready = results["startup.verify.ready"]
+    assert ready["p50_ms"] <= BUDGET_MS, ready
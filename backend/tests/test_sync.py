@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services.pagination import encode_cursor
+
+
+def test_sync_round_trips_its_token(run, client, make_users, make_event):
+    (user_id, headers), = make_users(1)
+    make_event(user_id)
+    first = run(client.get("/api/v1/sync", headers=headers))
+    assert first.status_code == 200
+    again = run(client.get("/api/v1/sync", params={"since": first.json()["next_token"]}, headers=headers))
+    assert again.status_code == 200
+
+
+@pytest.mark.parametrize("values", [list(range(1, 9)), list("abcdefgh"), [None, None] * 4, [[1], 0] * 4, [None, True] * 4])
+def test_sync_rejects_tampered_token(run, client, make_users, values):
+    (_, headers), = make_users(1)
+    response = run(client.get("/api/v1/sync", params={"since": encode_cursor(values)}, headers=headers))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid sync token"
+
+
+def _full_sync(run, client, headers):
+    """Follow next_token until has_more is false; returns the last token"""
+    params = {}
+    while True:
+        response = run(client.get("/api/v1/sync", params=params, headers=headers))
+        assert response.status_code == 200
+        body = response.json()
+        params = {"since": body["next_token"]}
+        if not body["has_more"]:
+            return body["next_token"]
+
+
+def _delta(run, client, headers, token):
+    response = run(client.get("/api/v1/sync", params={"since": token}, headers=headers))
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def no_resends(monkeypatch):
+    # Without the safety window a delta holds exactly what changed since the token
+    monkeypatch.setattr(settings, "SYNC_SAFETY_WINDOW_SECONDS", 0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+
+def test_delta_has_only_changes_and_tombstones(run, client, make_users, make_event, no_resends):
+    (user_id, headers), = make_users(1)
+    updated, deleted, untouched = (make_event(user_id) for _ in range(3))
+    token = _full_sync(run, client, headers)
+
+    start = datetime.utcnow() + timedelta(days=2)
+    created = run(client.post("/api/v1/events/", headers=headers, json={
+        "title": "New", "location": "Hall",
+        "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat(),
+    })).json()["id"]
+    assert run(client.put(f"/api/v1/events/{updated}", headers=headers, json={"title": "Renamed"})).status_code == 200
+    assert run(client.delete(f"/api/v1/events/{deleted}", headers=headers)).status_code == 200
+
+    delta = _delta(run, client, headers, token)
+    assert sorted(e["id"] for e in delta["events"]) == sorted([created, updated])
+    assert untouched not in {e["id"] for e in delta["events"]}
+    assert {e["id"]: e["title"] for e in delta["events"]}[updated] == "Renamed"
+    assert [(t["entity"], t["entity_id"]) for t in delta["tombstones"]] == [("event", deleted)]
+    assert delta["participations"] == [] and delta["messages"] == []
+    assert not delta["has_more"]
+    assert delta["next_token"] != token
+
+    # The advanced token has nothing left to send
+    after = _delta(run, client, headers, delta["next_token"])
+    assert (after["events"], after["tombstones"]) == ([], [])
+
+
+def test_leaving_sends_a_participation_tombstone(run, client, make_users, make_event, no_resends):
+    (creator_id, _), (user_id, headers) = make_users(2)
+    event_id = make_event(creator_id)
+    joined = run(client.post(f"/api/v1/events/{event_id}/join", headers=headers)).json()["id"]
+    token = _full_sync(run, client, headers)
+
+    assert run(client.post(f"/api/v1/events/{event_id}/leave", headers=headers)).status_code == 200
+    delta = _delta(run, client, headers, token)
+    assert [(t["entity"], t["entity_id"]) for t in delta["tombstones"]] == [("participation", joined)]
+    assert delta["participations"] == []
+    # Its participant_count changed
+    assert [e["id"] for e in delta["events"]] == [event_id]
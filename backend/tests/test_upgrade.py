@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.db.schema import create_schema, schema_differences
+from app.db.session import create_async_db_engine, get_async_database_url
+from app.db.upgrade import upgrade
+
+
+@pytest.fixture
+def old_engine(loop):
+    """
+    A database as it was before participant_count and the unique
+    participation constraint: two events, one holding a duplicate join
+    """
+    path = os.path.join(tempfile.mkdtemp(), "old.db")
+    engine = create_async_db_engine(get_async_database_url(f"sqlite:///{path}"))
+
+    async def make_old():
+        await create_schema(engine)
+        async with engine.begin() as conn:
+            for statement in [
+                "ALTER TABLE event DROP COLUMN participant_count",
+                "ALTER TABLE eventparticipant RENAME TO eventparticipant_new",
+                "CREATE TABLE eventparticipant AS SELECT * FROM eventparticipant_new WHERE 0",
+                "DROP TABLE eventparticipant_new",
+                "INSERT INTO user (id, email, hashed_password, is_active, is_superuser, created_at, updated_at) "
+                "VALUES (1, 'a@example.com', 'x', 1, 0, '2024-01-01', '2024-01-01'), "
+                "(2, 'b@example.com', 'x', 1, 0, '2024-01-01', '2024-01-01')",
+                "INSERT INTO event (id, title, location, capacity, creator_id, start_time, end_time, created_at, updated_at) "
+                "VALUES (1, 'Full', 'Hall', 2, 1, '2030-01-01', '2030-01-01', '2024-01-01', '2024-01-01'), "
+                "(2, 'Open', 'Hall', NULL, 1, '2030-01-01', '2030-01-01', '2024-01-01', '2024-01-01')",
+                "INSERT INTO eventparticipant (id, event_id, user_id, status, created_at, updated_at) "
+                "VALUES (1, 1, 1, 'GOING', '2024-01-01', '2024-01-01'), (2, 1, 2, 'GOING', '2024-01-01', '2024-01-01'), "
+                "(3, 1, 2, 'GOING', '2024-01-01', '2024-01-01'), (4, 2, 1, 'GOING', '2024-01-01', '2024-01-01')",
+            ]:
+                await conn.execute(text(statement))
+
+    loop.run_until_complete(make_old())
+    yield engine
+    loop.run_until_complete(engine.dispose())
+
+
+def test_upgrade_backfills_counts_and_enforces_one_join(run, old_engine):
+    assert len(run(upgrade(old_engine))) == 2
+
+    async def inspect_upgraded():
+        async with old_engine.connect() as conn:
+            counts = (await conn.execute(text("SELECT id, participant_count, updated_at FROM event ORDER BY id"))).all()
+            participants = (await conn.execute(text("SELECT id FROM eventparticipant ORDER BY id"))).scalars().all()
+            problems = await conn.run_sync(schema_differences)
+        return counts, participants, problems
+
+    counts, participants, problems = run(inspect_upgraded())
+    assert [(event_id, count) for event_id, count, _ in counts] == [(1, 2), (2, 1)]
+    assert all(str(updated_at).startswith("2024-01-01") for _, _, updated_at in counts)
+    assert participants == [1, 2, 4]
+    assert not [p for p in problems if "participant_count" in p or "uq_eventparticipant" in p]
+
+    async def join_again():
+        async with old_engine.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO eventparticipant (id, event_id, user_id, status) VALUES (5, 2, 1, 'GOING')"
+            ))
+
+    with pytest.raises(IntegrityError):
+        run(join_again())
+    # Nothing left to do
+    assert run(upgrade(old_engine)) == []
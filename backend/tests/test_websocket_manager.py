@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.websocket.manager import SLOW_CONSUMER_CLOSE_CODE, ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self, stalled: bool = False):
+        self.sent = []
+        self.closed_with = None
+        # A stalled client never finishes receiving a frame
+        self.stalled = stalled
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=None):
+        self.closed_with = code
+
+
+def _frame(message_id: int) -> str:
+    return json.dumps({"id": message_id, "content": f"message {message_id}"})
+
+
+def _history_loader(last_id: int):
+    """replay_loader over messages 1..last_id of one room"""
+    history = [(i, _frame(i)) for i in range(1, last_id + 1)]
+
+    async def loader(event_id, after_id, limit):
+        return [row for row in history if after_id is None or row[0] > after_id][-limit:]
+    return loader
+
+
+async def _reconnect(manager, last_seen_id: int, check=None):
+    """Frames a socket reconnecting with last_seen_id receives; check() runs while it is connected"""
+    socket = FakeSocket()
+    await manager.connect(socket, 7, user_id=1, last_seen_id=last_seen_id)
+    await asyncio.sleep(0.01)
+    if check is not None:
+        check()
+    await manager.disconnect(socket, 7)
+    return socket.sent
+
+
+@pytest.fixture
+def room_manager(monkeypatch):
+    """A ConnectionManager whose Redis subscriptions are recorded instead of made"""
+    manager = ConnectionManager()
+    manager.subscribed = set()
+
+    async def ensure_redis():
+        pass
+
+    async def subscribe(event_key):
+        manager.subscribed.add(event_key)
+
+    async def unsubscribe(event_key):
+        manager.subscribed.discard(event_key)
+
+    monkeypatch.setattr(manager, "_ensure_redis", ensure_redis)
+    monkeypatch.setattr(manager, "subscribe_to_channel", subscribe)
+    monkeypatch.setattr(manager, "unsubscribe_from_channel", unsubscribe)
+    return manager
+
+
+def test_idle_sweep_during_replay_keeps_the_room(run, monkeypatch, room_manager):
+    monkeypatch.setattr(settings, "WS_REPLAY_IDLE_SECONDS", 0)
+    load = _history_loader(5)
+
+    async def slow_loader(event_id, after_id, limit):
+        # The dispatcher's sweep runs while the replay waits on the database
+        room_manager._next_sweep = 0.0
+        await room_manager._expire_idle_rooms()
+        return await load(event_id, after_id, limit)
+
+    def still_subscribed():
+        assert room_manager.subscribed == {"7"}
+        assert room_manager.connections.has_room("7")
+        assert room_manager.replay.is_seeded("7")
+
+    room_manager.replay_loader = slow_loader
+    sent = run(_reconnect(room_manager, 3, still_subscribed))
+    assert [frame["id"] for frame in sent] == [4, 5]
+
+
+def test_long_absence_replays_newest_messages_after_a_marker(run, monkeypatch, room_manager):
+    monkeypatch.setattr(settings, "WS_REPLAY_MAX_MESSAGES", 3)
+    room_manager.replay.per_room = 2
+    room_manager.replay_loader = _history_loader(10)
+    sent = run(_reconnect(room_manager, 2))
+    assert sent[0] == {"type": "replay_truncated", "before_id": 8}
+    assert [frame["id"] for frame in sent[1:]] == [8, 9, 10]
+
+
+def test_replay_within_the_limit_has_no_marker(run, monkeypatch, room_manager):
+    monkeypatch.setattr(settings, "WS_REPLAY_MAX_MESSAGES", 8)
+    room_manager.replay.per_room = 2
+    room_manager.replay_loader = _history_loader(10)
+    sent = run(_reconnect(room_manager, 2))
+    assert [frame["id"] for frame in sent] == list(range(3, 11))
+
+
+def test_slow_consumer_is_dropped(run, monkeypatch, room_manager):
+    monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 2)
+    slow, fast = FakeSocket(stalled=True), FakeSocket()
+
+    async def flood():
+        await room_manager.connect(slow, 7, user_id=1)
+        await room_manager.connect(fast, 7, user_id=2)
+        for i in range(1, 6):
+            await room_manager.broadcast_to_local(7, _frame(i))
+            await asyncio.sleep(0)
+        # The drop runs as a task the manager holds on to until it finishes
+        pending = len(room_manager._dropping)
+        await asyncio.sleep(0.05)
+        await room_manager.disconnect(fast, 7)
+        return pending
+
+    assert run(flood()) == 1
+    assert not room_manager._dropping
+    assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert [frame["id"] for frame in fast.sent] == [1, 2, 3, 4, 5]
+    assert not room_manager.connections.has_room("7")